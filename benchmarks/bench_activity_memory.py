@@ -0,0 +1,57 @@
+"""Memory held by loaded activities: the slotted Activity versus a plain dataclass.
+
+Run from the repository root:  python -m benchmarks.bench_activity_memory [trips] [activities]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from benchmarks.synthetic import itineraries
+from src.modules.itinerary import Activity
+
+
+@dataclass
+class PlainActivity:
+    """The previous Activity layout: a __dict__ per object and one string per field."""
+    date: str
+    start_time: str
+    end_time: str
+    location: str
+    detail: str
+    notes: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PlainActivity":
+        return cls(data["date"], data["start_time"], data["end_time"],
+                   data.get("location", ""), data["detail"], data.get("notes", ""))
+
+
+def measure(cls, text: str):
+    """Bytes still allocated after parsing ``text`` and keeping only the activity objects."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    raw = json.loads(text)
+    activities = [cls.from_dict(a) for trip in raw.values() for a in trip["activities"]]
+    elapsed = time.perf_counter() - started
+    del raw
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(activities), held, elapsed
+
+
+def main(trips: int = 500, activities: int = 100):
+    text = json.dumps(itineraries(trips, activities))
+    print(f"{trips} trips x {activities} activities")
+    print(f"{'layout':<10}{'objects':>10}{'bytes':>14}{'per obj':>10}{'build s':>10}")
+    for label, cls in (("dataclass", PlainActivity), ("slotted", Activity)):
+        count, held, elapsed = measure(cls, text)
+        print(f"{label:<10}{count:>10,}{held:>14,}{held / count:>10.1f}{elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
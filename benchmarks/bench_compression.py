@@ -0,0 +1,50 @@
+"""Bytes versus CPU for each datafile codec on synthetic itinerary and budget stores.
+
+Run from the repository root:  python -m benchmarks.bench_compression [trips] [activities]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import budgets, itineraries
+from src.utils.compression import COMPRESSION_LEVELS, GZIP, XZ
+from src.utils.storage import JsonStorage, open_storage, BUDGETS, ITINERARIES
+
+CASES = [
+    ("json", ".json", None, None),
+    ("gzip -1", ".json.gz", GZIP, 1),
+    ("gzip -6", ".json.gz", GZIP, 6),
+    ("gzip -9", ".json.gz", GZIP, 9),
+    ("xz -0", ".json.xz", XZ, 0),
+    ("xz -6", ".json.xz", XZ, 6),
+    ("tpb", ".tpb", None, None),
+]
+
+
+def main(trips: int = 2000, activities: int = 50):
+    stores = [(ITINERARIES, itineraries(trips, activities), f"{trips} trips x {activities} activities"),
+              (BUDGETS, budgets(trips), f"{trips} budgets")]
+    with tempfile.TemporaryDirectory() as directory:
+        for kind, records, title in stores:
+            print(title)
+            print(f"{'codec':<10}{'bytes':>14}{'ratio':>8}{'write s':>10}{'read s':>10}")
+            baseline = None
+            for label, extension, codec, level in CASES:
+                path = os.path.join(directory, kind + extension)
+                engine = JsonStorage(path, level) if codec else open_storage(path)
+
+                started = time.perf_counter()
+                engine.save(kind, records)
+                written = time.perf_counter()
+                assert len(engine.load(kind)) == trips
+                read = time.perf_counter()
+
+                size = os.path.getsize(path)
+                baseline = baseline or size
+                print(f"{label:<10}{size:>14,}{baseline / size:>7.1f}x{written - started:>10.3f}{read - written:>10.3f}")
+            print()
+    print(f"(defaults: {COMPRESSION_LEVELS})")
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
@@ -0,0 +1,56 @@
+"""Synthetic datafiles for the benchmarks, shaped like the sample data in src/datafiles."""
+import random
+from datetime import date, timedelta
+
+LOCATIONS = ["London Eye", "Tower of London", "British Museum", "Shibuya Crossing", "Louvre Museum",
+             "Eiffel Tower", "Sydney Opera House", "Central Park", "Colosseum", "Sagrada Familia"]
+DETAILS = ["Guided tour", "Lunch with the team", "Museum visit", "Free time", "Dinner cruise",
+           "Shopping", "Morning briefing", "Photo walk", "Hotel check-in", "Airport transfer"]
+TRIP_TYPES = ["General", "Company", "Vacation", "Adventure", "Family", "Other"]
+CITIES = ["London", "Tokyo", "Paris", "Sydney", "New York", "Rome", "Barcelona"]
+CATEGORIES = ["Hotel", "Food", "Transport", "Flights", "Activities", "Shopping", "Insurance", "Misc"]
+CURRENCIES = ["RM", "$", "€", "£", "¥"]
+
+
+def itineraries(trips: int, activities_per_trip: int, seed: int = 0) -> dict:
+    """Serialized itineraries (the ``itineraries.json`` layout)."""
+    rng = random.Random(seed)
+    data = {}
+    for t in range(trips):
+        start = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+        days = rng.randrange(3, 15)
+        activities = []
+        for a in range(activities_per_trip):
+            hour = rng.randrange(7, 21)
+            activities.append({
+                "date": (start + timedelta(days=a % days)).isoformat(),
+                "start_time": f"{hour:02d}:{rng.choice((0, 15, 30, 45)):02d}",
+                "end_time": f"{hour + 1:02d}:{rng.choice((0, 15, 30, 45)):02d}",
+                "location": rng.choice(LOCATIONS),
+                "detail": rng.choice(DETAILS),
+                "notes": rng.choice(["", "", "Bring tickets", "Book in advance"]),
+            })
+        name = f"Trip {t}"
+        data[name] = {
+            "trip_name": name,
+            "location": rng.choice(CITIES),
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=days - 1)).isoformat(),
+            "trip_type": rng.choice(TRIP_TYPES),
+            "activities": activities,
+        }
+    return data
+
+
+def budgets(trips: int, seed: int = 0) -> dict:
+    """Serialized budgets (the ``budgets.json`` layout)."""
+    rng = random.Random(seed)
+    return {
+        f"Trip {t}": {
+            "total_budget": float(rng.randrange(1000, 50000)),
+            "currency": rng.choice(CURRENCIES),
+            "categories": {c: round(rng.uniform(50, 8000), 2)
+                           for c in rng.sample(CATEGORIES, rng.randrange(1, len(CATEGORIES)))},
+        }
+        for t in range(trips)
+    }
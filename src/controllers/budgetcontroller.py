@@ -1,15 +1,68 @@
-from src.modules.budget import Budget
-from src.utils.file import load_budgets, save_budgets
+import os
+
+from src.modules.budget import Budget, from_cents
+from src.utils.storage import BUDGETS
+from src.utils.file import load_budgets, save_budgets, apply_budget_record, BUDGETS_FILE
+from src.utils.catalog import trip_catalog
+from src.utils.journal import Journal
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 
 class BudgetController:
-    def __init__(self):
-        self.budgets = load_budgets()  # dict[str, Budget]
+    def __init__(self, filename: str = BUDGETS_FILE, autoload: bool = True):
+        self.filename = filename
+        self.journal = Journal(filename)
+        self.budgets = {}  # dict[str, Budget]
+        self._seen = None  # (snapshot, journal) signatures as of our last read or write
+        if autoload:
+            self.load()
+
+    def _files(self):
+        return _signature(self.filename), _signature(self.journal.path)
+
+    def load(self):
+        """Read the snapshot and replay the journal; safe to run on a worker thread."""
+        seen = self._files()
+        self.budgets = self.journal.replay(load_budgets(self.filename), apply_budget_record)
+        self._seen = seen
+        return self.budgets
+
+    def _refresh(self):
+        # another writer (e.g. a TripRepository commit) replaced the files under us:
+        # reload, so stale budgets are neither shown nor written back by compact()
+        if self._seen is not None and self._files() != self._seen:
+            self.load()
+
+    def _record(self, op, **fields):
+        # every mutation is one journal line; the snapshot is only rewritten on compaction
+        self.journal.append(op, **fields)
+        self._seen = self._files()
+        if op == "delete_trip":
+            trip_catalog.discard(BUDGETS, fields["trip"], self.filename)
+        else:
+            trip_catalog.put(self.budgets[fields["trip"]], filename=self.filename)
+        if self.journal.needs_compaction():
+            self.compact()
+
+    def compact(self):
+        self._refresh()
+        self.journal.compact(lambda: save_budgets(self.budgets, self.filename))
+        self._seen = self._files()
 
     # Trip management
     def get_trips(self):
+        self._refresh()
         return list(self.budgets.keys())
 
     def add_trip(self, trip_name, currency="RM"):
+        self._refresh()
         if trip_name in self.budgets:
             raise ValueError(f"Trip '{trip_name}' already exists")
         self.budgets[trip_name] = Budget(
@@ -18,34 +71,52 @@ class BudgetController:
             currency=currency,
             categories={}
         )
-        save_budgets(self.budgets)
+        self._record("add_trip", trip=trip_name, currency=currency)
 
     def delete_trip(self, trip_name):
+        self._refresh()
         if trip_name not in self.budgets:
             raise ValueError(f"Trip '{trip_name}' not found")
         del self.budgets[trip_name]
-        save_budgets(self.budgets)
+        self._record("delete_trip", trip=trip_name)
 
     def get_trip(self, trip_name):
+        self._refresh()
         return self.budgets.get(trip_name)
 
     # Budget details
     def update_total(self, trip_name, total):
+        self._refresh()
         self.budgets[trip_name].total_budget = total
-        save_budgets(self.budgets)
+        self._record("update_total", trip=trip_name, total=total)
 
     def add_category(self, trip_name, category, amount):
-        self.budgets[trip_name].categories[category] = amount
-        save_budgets(self.budgets)
+        self._refresh()
+        self.budgets[trip_name].set_category(category, amount)
+        self._record("set_category", trip=trip_name, category=category, amount=amount)
 
     def edit_category(self, trip_name, category, amount):
-        if category not in self.budgets[trip_name].categories:
+        self._refresh()
+        if category not in self.budgets[trip_name].category_cents:
             raise ValueError(f"Category '{category}' not found")
-        self.budgets[trip_name].categories[category] = amount
-        save_budgets(self.budgets)
+        self.budgets[trip_name].set_category(category, amount)
+        self._record("set_category", trip=trip_name, category=category, amount=amount)
 
     def delete_category(self, trip_name, category):
-        if category not in self.budgets[trip_name].categories:
+        self._refresh()
+        if category not in self.budgets[trip_name].category_cents:
             raise ValueError(f"Category '{category}' not found")
-        del self.budgets[trip_name].categories[category]
-        save_budgets(self.budgets)
+        self.budgets[trip_name].delete_category(category)
+        self._record("delete_category", trip=trip_name, category=category)
+
+    def restore_trip(self, trip_name, budget):
+        """Make a trip's budget equal ``budget`` (e.g. an undo state), journaling only the differences."""
+        self._refresh()
+        current = self.budgets[trip_name]
+        if current.total_cents != budget.total_cents:
+            self.update_total(trip_name, budget.total_budget)
+        for category in [c for c in current.category_cents if c not in budget.category_cents]:
+            self.delete_category(trip_name, category)
+        for category, cents in budget.category_cents.items():
+            if current.category_cents.get(category) != cents:
+                self.add_category(trip_name, category, from_cents(cents))
@@ -1,129 +1,174 @@
+from functools import lru_cache
+from itertools import chain, takewhile
 from src.modules.package import PackingList, PackingItem
-from src.utils.file import load_packing_lists, save_packing_lists
-from typing import Dict
+from src.utils.file import load_packing_lists, load_packing_list, PACKING_LISTS_FILE
+from src.utils.storage import PACKING_LISTS
+from src.utils.writebehind import saver_for
+from src.utils.catalog import trip_catalog
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# item database
+PACKING_DATABASE = {
+    "base_items": {
+        "Clothing": ["Underwear", "Socks", "Pajamas", "Change of clothes"],
+        "Toiletries": ["Toothbrush", "Toothpaste", "Shampoo", "Body Wash", "Towel", "Skincare Products"],
+        "Electronics": ["Phone Charger", "Power Bank", "Camera", "Earphones"],
+        "Documents": ["ID Card", "Passport", "Flight Ticket", "Hotel Confirmation", "Insurance Policy"],
+        "Medicines": ["Regular Medicine", "Band-aids", "Painkillers"],
+        "Others": ["Wallet", "Cash", "Credit Card", "Keys"]
+    },
+
+    "destination_items": {
+        "beach": {
+            "Clothing": ["Swimsuit", "Beach Shorts", "Sandals", "Sun Hat", "Sunglasses"],
+            "Supplies": ["Sunscreen", "Beach Towel", "Picnic Mat", "Snorkeling Gear", "Waterproof Bag", "Beach Umbrella"]
+        },
+        "mountain": {
+            "Clothing": ["Hiking Boots", "Windbreaker", "Long Pants", "Warm Clothes", "Hat"],
+            "Supplies": ["Trekking Poles", "Headlamp", "Thermos", "First Aid Kit", "Hiking Backpack", "Map"]
+        },
+        "city": {
+            "Clothing": ["Formal Wear", "Casual Shoes", "Jacket", "Scarf"],
+            "Supplies": ["Umbrella", "Shopping Bag", "City Map", "Metro Card"]
+        },
+        "countryside": {
+            "Clothing": ["Comfortable Shoes", "Long-Sleeve Clothes", "Insect-Proof Clothing", "Hat"],
+            "Supplies": ["Insect Repellent", "Flashlight", "Picnic Utensils", "Camera Tripod"]
+        }
+    },
+
+    "weather_items": {
+        "sunny": {
+            "Sun Protection": ["Sunscreen", "Sunglasses", "Sun Hat", "Sun-Protective Clothing"],
+        },
+        "rainy": {
+            "Rain Gear": ["Raincoat", "Umbrella", "Waterproof Bag", "Waterproof Shoe Covers"],
+        },
+        "cold": {
+            "Warm Gear": ["Thick Jacket", "Thermal Underwear", "Gloves", "Scarf", "Beanie", "Hand Warmers"],
+        },
+        "mild": {
+            "Moderate Weather Gear": ["Light Jacket", "Long-Sleeve Clothes", "Lightweight Shoes"]
+        }
+    }
+}
+
+# extra items for long trips: (minimum duration, category, item, quantity)
+DURATION_ITEMS = (
+    (7, "Skincare Products", "Laundry Detergent", 1),
+    (7, "Others", "Clothes Hangers", 3),
+    (14, "Medicine", "Cold Medicine", 1),
+    (14, "Medicine", "Stomach Medicine", 1),
+)
+
+# quantity formulas besides a fixed number
+PER_DAY = "per_day"  # one a day, for at most a week, for each traveler
+PER_TRAVELER = "per_traveler"
+
+BASE_QUANTITIES = {
+    **dict.fromkeys(["Underwear", "Socks", "Pajamas", "Change of clothes"], PER_DAY),
+    **dict.fromkeys(["Toothbrush", "Towel", "Phone Charger", "Power Bank", "Camera", "Earphones",
+                     "ID Card", "Passport", "Flight Ticket", "Hotel Confirmation", "Insurance Policy",
+                     "Wallet", "Credit Card", "Keys", "Cash"], PER_TRAVELER),
+}
+
+GENERATION_CACHE_SIZE = 256
+
+
+class PackingRule(NamedTuple):
+    """one item that goes on a list when its condition holds"""
+    category: str
+    item: str
+    quantity: int | str  # a fixed number, PER_DAY or PER_TRAVELER
+    condition: Tuple[str, object] | None  # ("destination", "beach"), ("weather", "sunny"), ("min_duration", 7); None = always
+
+    def quantity_for(self, duration: int, travelers: int) -> int:
+        if self.quantity == PER_DAY:
+            return min(duration, 7) * travelers
+        if self.quantity == PER_TRAVELER:
+            return travelers
+        return self.quantity
+
+
+def compile_rules(database: dict = PACKING_DATABASE) -> Tuple[PackingRule, ...]:
+    """flatten the item database into rules, in the order items are added to a list"""
+    rules = [PackingRule(category, item, BASE_QUANTITIES.get(item, 1), None)
+             for category, items in database["base_items"].items() for item in items]
+    for field, section in (("destination", "destination_items"), ("weather", "weather_items")):
+        for value, categories in database[section].items():
+            rules.extend(PackingRule(category, item, 1, (field, value))
+                         for category, items in categories.items() for item in items)
+    rules.extend(PackingRule(category, item, quantity, ("min_duration", days))
+                 for days, category, item, quantity in sorted(DURATION_ITEMS, key=lambda rule: rule[0]))
+    return tuple(rules)
+
+
+PACKING_RULES = compile_rules()
+
+def _group(rules: Tuple[PackingRule, ...]):
+    """split rules into (always, by destination/weather condition, by minimum duration)"""
+    always, by_condition, by_duration = [], {}, []
+    for rule in rules:
+        if rule.condition is None:
+            always.append(rule)
+        elif rule.condition[0] == "min_duration":
+            by_duration.append(rule)
+        else:
+            by_condition.setdefault(rule.condition, []).append(rule)
+    return tuple(always), by_condition, tuple(by_duration)
+
+
+# grouped by condition, so a generation only looks at the rules that apply
+_ALWAYS, _BY_CONDITION, _BY_DURATION = _group(PACKING_RULES)
+
+
+@lru_cache(maxsize=GENERATION_CACHE_SIZE)
+def _generate(destination: str, duration: int, weather: str, travelers: int) -> Tuple[Tuple[str, str, int], ...]:
+    """(item, category, quantity) for a trip shape; an item listed twice under one category is added up"""
+    quantities: Dict[Tuple[str, str], int] = {}
+    rules = chain(_ALWAYS,
+                  _BY_CONDITION.get(("destination", destination), ()),
+                  _BY_CONDITION.get(("weather", weather), ()),
+                  takewhile(lambda rule: rule.condition[1] <= duration, _BY_DURATION))
+    for rule in rules:
+        key = (rule.item, rule.category)
+        quantities[key] = quantities.get(key, 0) + rule.quantity_for(duration, travelers)
+    return tuple((item, category, quantity) for (item, category), quantity in quantities.items())
+
 
 class PackingController:
     """packing list controller"""
 
-    def __init__(self):
-        # item database
-        self.PACKING_DATABASE = {
-            "base_items": {
-                "Clothing": ["Underwear", "Socks", "Pajamas", "Change of clothes"],
-                "Toiletries": ["Toothbrush", "Toothpaste", "Shampoo", "Body Wash", "Towel", "Skincare Products"],
-                "Electronics": ["Phone Charger", "Power Bank", "Camera", "Earphones"],
-                "Documents": ["ID Card", "Passport", "Flight Ticket", "Hotel Confirmation", "Insurance Policy"],
-                "Medicines": ["Regular Medicine", "Band-aids", "Painkillers"],
-                "Others": ["Wallet", "Cash", "Credit Card", "Keys"]
-            },
-
-            "destination_items": {
-                "beach": {
-                    "Clothing": ["Swimsuit", "Beach Shorts", "Sandals", "Sun Hat", "Sunglasses"],
-                    "Supplies": ["Sunscreen", "Beach Towel", "Picnic Mat", "Snorkeling Gear", "Waterproof Bag", "Beach Umbrella"]
-                },
-                "mountain": {
-                    "Clothing": ["Hiking Boots", "Windbreaker", "Long Pants", "Warm Clothes", "Hat"],
-                    "Supplies": ["Trekking Poles", "Headlamp", "Thermos", "First Aid Kit", "Hiking Backpack", "Map"]
-                },
-                "city": {
-                    "Clothing": ["Formal Wear", "Casual Shoes", "Jacket", "Scarf"],
-                    "Supplies": ["Umbrella", "Shopping Bag", "City Map", "Metro Card"]
-                },
-                "countryside": {
-                    "Clothing": ["Comfortable Shoes", "Long-Sleeve Clothes", "Insect-Proof Clothing", "Hat"],
-                    "Supplies": ["Insect Repellent", "Flashlight", "Picnic Utensils", "Camera Tripod"]
-                }
-            },
-
-            "weather_items": {
-                "sunny": {
-                    "Sun Protection": ["Sunscreen", "Sunglasses", "Sun Hat", "Sun-Protective Clothing"],
-                },
-                "rainy": {
-                    "Rain Gear": ["Raincoat", "Umbrella", "Waterproof Bag", "Waterproof Shoe Covers"],
-                },
-                "cold": {
-                    "Warm Gear": ["Thick Jacket", "Thermal Underwear", "Gloves", "Scarf", "Beanie", "Hand Warmers"],
-                },
-                "mild": {
-                    "Moderate Weather Gear": ["Light Jacket", "Long-Sleeve Clothes", "Lightweight Shoes"]
-                }
-            }
-        }
+    def __init__(self, filename: str = PACKING_LISTS_FILE):
+        self.filename = filename
+        self.saver = saver_for(filename, PACKING_LISTS)
+
+        # shared by every controller and compiled into PACKING_RULES at import; treat as read-only
+        self.PACKING_DATABASE = PACKING_DATABASE
 
     def generate_packing_list(self, destination: str, duration: int, weather: str, travelers: int,
                               trip_name: str = None) -> PackingList:
-        """generate packing list"""
+        """generate packing list (memoized per trip shape; every call gets its own items)"""
 
         if not trip_name:
             trip_name = f"{destination} Trip"
 
-        # create empty list
-        packing_list = PackingList(
+        items = [PackingItem(item, category, False, quantity)
+                 for item, category, quantity in _generate(destination, duration, weather, travelers)]
+        return PackingList(
             trip_name=trip_name,
             destination_type=destination,
             duration=duration,
             weather=weather,
-            travelers=travelers
+            travelers=travelers,
+            items=items
         )
 
-        # add items
-        self._add_base_items(packing_list, duration, travelers)
-        self._add_destination_items(packing_list, destination)
-        self._add_weather_items(packing_list, weather)
-        self._adjust_quantities_by_duration(packing_list, duration, travelers)
-
-        return packing_list
-
-    def _add_base_items(self, packing_list: PackingList, duration: int, travelers: int):
-        """add base items"""
-        base_items = self.PACKING_DATABASE["base_items"]
-
-        for category, items in base_items.items():
-            for item_name in items:
-                if item_name in ["Underwear", "Socks", "Pajamas", "Change of clothes"]:
-                    quantity = min(duration, 7) * travelers
-                elif item_name in ["Toothbrush", "Towel", "Phone Charger", "Power Bank", "Camera", "Earphones",
-                                   "ID Card", "Passport", "Flight Ticket", "Hotel Confirmation", "Insurance Policy",
-                                   "Wallet", "Credit Card", "Keys", "Cash"]:
-                    quantity = travelers
-                else:
-                    quantity = 1
-
-                packing_list.add_item(item_name, category, quantity)
-
-    def _add_destination_items(self, packing_list: PackingList, destination: str):
-        """add item based on destination"""
-        if destination in self.PACKING_DATABASE["destination_items"]:
-            dest_items = self.PACKING_DATABASE["destination_items"][destination]
-            for category, items in dest_items.items():
-                for item_name in items:
-                    packing_list.add_item(item_name, category, 1)
-
-    def _add_weather_items(self, packing_list: PackingList, weather: str):
-        """add item based on weather"""
-        if weather in self.PACKING_DATABASE["weather_items"]:
-            weather_items = self.PACKING_DATABASE["weather_items"][weather]
-            for category, items in weather_items.items():
-                for item_name in items:
-                    packing_list.add_item(item_name, category, 1)
-
-    def _adjust_quantities_by_duration(self, packing_list: PackingList, duration: int, travelers: int):
-        """add item based on duration"""
-        if duration >= 7:
-            packing_list.add_item("Laundry Detergent", "Skincare Products", 1)
-            packing_list.add_item("Clothes Hangers", "Others", 3)
-        if duration >= 14:
-            packing_list.add_item("Cold Medicine", "Medicine", 1)
-            packing_list.add_item("Stomach Medicine", "Medicine", 1)
-
     def save_packing_list(self, packing_list: PackingList) -> bool:
         """save list"""
         try:
-            existing_lists = load_packing_lists()
-            existing_lists[packing_list.trip_name] = packing_list
-            save_packing_lists(existing_lists)
+            self.saver.put(packing_list.trip_name, packing_list.to_dict())
+            trip_catalog.put(packing_list, filename=self.filename)
             return True
         except Exception as e:
             print(f"Error while saving the file: {e}")
@@ -131,17 +176,26 @@ class PackingController:
 
     def load_all_lists(self) -> Dict[str, PackingList]:
         """load all lists"""
-        return load_packing_lists()
+        self.saver.flush()  # no-op unless saves are pending; the cache is kept current either way
+        return load_packing_lists(self.filename)
+
+    def get_list(self, trip_name: str) -> Optional[PackingList]:
+        """load one list"""
+        self.saver.flush()
+        return load_packing_list(trip_name, self.filename)
 
     def delete_list(self, trip_name: str) -> bool:
         """delete list"""
         try:
-            existing_lists = load_packing_lists()
-            if trip_name in existing_lists:
-                del existing_lists[trip_name]
-                save_packing_lists(existing_lists)
-                return True
-            return False
+            if self.get_list(trip_name) is None:
+                return False
+            self.saver.remove(trip_name)
+            trip_catalog.discard(PACKING_LISTS, trip_name, self.filename)
+            return True
         except Exception as e:
             print(f"Error while deleting the file: {e}")
             return False
+
+    def flush(self):
+        """write pending saves to disk"""
+        self.saver.flush()
@@ -1,16 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
-from src.modules.itinerary import Itinerary, Activity
-from src.utils.file import load_itineraries, save_itineraries
+from src.modules.itinerary import Itinerary, ItineraryHeader, Activity, ActivitySchedule
+from src.modules.timeparse import format_date, parse_date, parse_time
+from src.utils.file import load_itineraries, load_itinerary_headers, ITINERARIES_FILE
+from src.utils.storage import ITINERARIES
+from src.utils.writebehind import saver_for
+from src.utils.catalog import trip_catalog
+from src.utils.search import search_index_for
+from src.utils.history import History
+from src.utils.loader import load_async, poll_future
 from tkcalendar import DateEntry
 
 class ItineraryMenu:
-    def __init__(self, root):
+    def __init__(self, root, lazy: bool = True):
         self.root = root
-        self.itineraries = load_itineraries()
+        # filled in by on_itineraries_loaded once the background load finishes
+        self.itineraries: dict[str, Itinerary | ItineraryHeader] = {}
+        self.loading = True
+        self.saver = saver_for(ITINERARIES_FILE, ITINERARIES)
+        self.search = search_index_for(ITINERARIES_FILE)
         self.current_itinerary: str | None = None
-        self.activities = []
+        self.activities = ActivitySchedule()
         self.root.title("Itinerary Builder")
 
         root.geometry("1050x800")
@@ -140,6 +150,10 @@ class ItineraryMenu:
         ttk.Button(act_btns, text="➕ Add Activity", command=self.add_activity_popup).pack(side="left", padx=5)
         ttk.Button(act_btns, text="✏️ Update Activity", command=self.update_activity_popup).pack(side="left", padx=5)
         ttk.Button(act_btns, text="❌ Remove Activity", command=self.remove_activity).pack(side="left", padx=5)
+        ttk.Button(act_btns, text="↩️ Undo", command=self.undo).pack(side="left", padx=5)
+        ttk.Button(act_btns, text="↪️ Redo", command=self.redo).pack(side="left", padx=5)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
 
         # ================= BOTTOM SECTION: Itinerary Buttons =================
         self.button_frame = ttk.Frame(self.main_frame, style="Black.TFrame")
@@ -160,11 +174,32 @@ class ItineraryMenu:
         self.exit_button = ttk.Button(self.button_frame, text="⬅️ Back to Menu", command=self.go_back)
         self.exit_button.pack(side="right", padx=8)
 
-        # Fill itineraries
-        self.refresh_itinerary_list()
+        self.history = History(self.editor_state())
+
+        # Fill itineraries off the Tk thread; lazy mode only reads trip details and
+        # builds the activities when a trip is picked
+        self.itinerary_listbox.insert(tk.END, "⏳ Loading itineraries...")
+        future = load_async(load_itinerary_headers if lazy else load_itineraries)
+        if not self.search.loaded:
+            load_async(self.search.load)
+        poll_future(self.root, future, self.on_itineraries_loaded, self.on_itineraries_failed)
 
     # ================= FUNCTIONS =================
+    def on_itineraries_loaded(self, itineraries):
+        # anything saved while the load was running wins over the file contents
+        itineraries.update(self.itineraries)
+        self.itineraries = itineraries
+        self.loading = False
+        self.refresh_itinerary_list()
+
+    def on_itineraries_failed(self, error):
+        self.loading = False
+        self.refresh_itinerary_list()
+        messagebox.showerror("Loading error", f"Could not load itineraries:\n{error}", parent=self.root)
+
     def go_back(self):
+        self.saver.flush()
+        self.search.save()  # after the datafile, so the saved index matches it
         self.root.destroy()
         from src.gui.mainmenu import MainApp
         root = tk.Tk()
@@ -173,8 +208,8 @@ class ItineraryMenu:
 
     def validate_dates(self, start_date, end_date):
         try:
-            sd = datetime.strptime(start_date, "%Y-%m-%d")
-            ed = datetime.strptime(end_date, "%Y-%m-%d")
+            sd = parse_date(start_date)
+            ed = parse_date(end_date)
             if ed < sd:
                 messagebox.showerror("Invalid Dates", "End Date cannot be before Start Date.", parent=self.root)
                 return False
@@ -186,12 +221,12 @@ class ItineraryMenu:
     def validate_activity_date(self, date, parent=None):
         """ Ensure activity date is within itinerary range """
         try:
-            act_date = datetime.strptime(date, "%Y-%m-%d")
-            sd = datetime.strptime(self.start_date_entry.get(), "%Y-%m-%d")
-            ed = datetime.strptime(self.end_date_entry.get(), "%Y-%m-%d")
+            act_date = parse_date(date)
+            sd = parse_date(self.start_date_entry.get())
+            ed = parse_date(self.end_date_entry.get())
             if not (sd <= act_date <= ed):
                 messagebox.showerror("Invalid Date",
-                                     f"Activity date {date} must be between trip dates ({sd.date()} - {ed.date()}).", parent=parent)
+                                     f"Activity date {date} must be between trip dates ({format_date(sd)} - {format_date(ed)}).", parent=parent)
                 return False
             return True
         except Exception:
@@ -199,8 +234,8 @@ class ItineraryMenu:
 
     def validate_times(self, start_time, end_time, parent=None):
         try:
-            st = datetime.strptime(start_time, "%H:%M")
-            et = datetime.strptime(end_time, "%H:%M")
+            st = parse_time(start_time)
+            et = parse_time(end_time)
             if et < st:
                 messagebox.showerror("Invalid Time", "End Time cannot be before Start Time.", parent=parent)
                 return False
@@ -218,8 +253,11 @@ class ItineraryMenu:
             self.activity_tree.delete(i)
         self.current_itinerary = None
         self.itinerary_listbox.selection_clear(0, tk.END)
+        self.history.reset(self.editor_state())
 
     def refresh_itinerary_list(self):
+        if self.loading:
+            return
         self.itinerary_listbox.delete(0, tk.END)
         for name in sorted(self.itineraries.keys()):
             self.itinerary_listbox.insert(tk.END, name)
@@ -292,13 +330,24 @@ class ItineraryMenu:
                 notes=notes_entry.get()
             )
 
+            replaced = None
+            if mode == "update" and selection:
+                replaced = self.activities[self.activity_tree.index(selection)]
+            clashes = self.activities.conflicts_with(activity, ignore=replaced)
+            if clashes:
+                listed = "\n".join(f"{c.date} {c.start_time}-{c.end_time}  {c.detail}" for c in clashes)
+                if not messagebox.askyesno("Time Conflict",
+                                           f"This activity overlaps:\n{listed}\n\nKeep it anyway?", parent=popup):
+                    return
+
             if mode == "add":
-                self.activities.append(activity)
+                self.insert_activity_row(self.activities.add(activity), activity)
             elif mode == "update" and selection:
                 idx = self.activity_tree.index(selection)
-                self.activities[idx] = activity
+                self.activity_tree.delete(selection)
+                self.insert_activity_row(self.activities.replace(idx, activity), activity)
 
-            self.refresh_activity_table()
+            self.history.record(self.editor_state())
             popup.destroy()
 
         btn_text = "Update" if mode == "update" else "Add"
@@ -306,18 +355,16 @@ class ItineraryMenu:
                                                                                            columnspan=2, pady=10)
 
     def refresh_activity_table(self):
-        """ Refresh and auto-sort by date & time """
+        """ Redraw the table; self.activities is already ordered by date & time """
         self.activity_tree.delete(*self.activity_tree.get_children())
-        sorted_acts = sorted(self.activities, key=lambda a: (
-            datetime.strptime(a.date, "%Y-%m-%d"),
-            datetime.strptime(a.start_time, "%H:%M")
+        for act in self.activities:
+            self.insert_activity_row("end", act)
+
+    def insert_activity_row(self, index, act):
+        self.activity_tree.insert("", index, values=(
+            act.date, act.start_time, act.end_time,
+            act.location, act.detail, act.notes
         ))
-        self.activities = sorted_acts
-        for act in sorted_acts:
-            self.activity_tree.insert("", "end", values=(
-                act.date, act.start_time, act.end_time,
-                act.location, act.detail, act.notes
-            ))
 
     def remove_activity(self):
         selection = self.activity_tree.selection()
@@ -328,8 +375,35 @@ class ItineraryMenu:
             idx = self.activity_tree.index(item)
             del self.activities[idx]
             self.activity_tree.delete(item)
+        self.history.record(self.editor_state())
+
+    def editor_state(self):
+        return Itinerary(
+            trip_name=self.trip_title_entry.get(),
+            location=self.location_entry.get(),
+            start_date=self.start_date_entry.get(),
+            end_date=self.end_date_entry.get(),
+            trip_type=self.trip_type_combo.get(),
+            activities=self.activities
+        )
+
+    def undo(self):
+        self.restore_activities(self.history.undo())
+
+    def redo(self):
+        self.restore_activities(self.history.redo())
+
+    def restore_activities(self, snapshot):
+        # only the activities go back; the trip details stay as typed
+        if snapshot is None:
+            return
+        self.activities = ActivitySchedule(snapshot.entries)
+        self.refresh_activity_table()
 
     def save_itinerary(self):
+        if self.loading:
+            messagebox.showinfo("Please wait", "Saved itineraries are still loading.", parent=self.root)
+            return
         trip_name = self.trip_title_entry.get().strip()
         if not trip_name:
             messagebox.showwarning("Missing Info", "Trip Title is required.", parent=self.root)
@@ -358,7 +432,9 @@ class ItineraryMenu:
         )
 
         self.itineraries[list_name] = itinerary
-        save_itineraries(self.itineraries)
+        self.saver.put(list_name, itinerary.to_dict())
+        trip_catalog.put(itinerary, list_name)
+        self.search.update_trip(list_name, itinerary.activities)
         self.refresh_itinerary_list()
         messagebox.showinfo("Saved", f"Itinerary '{list_name}' saved successfully.", parent=self.root)
 
@@ -379,12 +455,17 @@ class ItineraryMenu:
         )
 
         self.itineraries[self.current_itinerary] = itinerary
-        save_itineraries(self.itineraries)
+        self.saver.put(self.current_itinerary, itinerary.to_dict())
+        trip_catalog.put(itinerary, self.current_itinerary)
+        self.search.update_trip(self.current_itinerary, itinerary.activities)
         self.refresh_itinerary_list()
         self.refresh_activity_table()  # FIX: ensures activities reload properly
         messagebox.showinfo("Updated", f"Itinerary '{self.current_itinerary}' updated successfully.", parent=self.root)
 
     def delete_itinerary(self):
+        if self.loading:
+            messagebox.showinfo("Please wait", "Saved itineraries are still loading.", parent=self.root)
+            return
         list_name = self.itinerary_listbox.get(tk.ANCHOR)
         if not list_name:
             messagebox.showwarning("No Selection", "Select an itinerary to delete.", parent=self.root)
@@ -394,17 +475,22 @@ class ItineraryMenu:
             return
         if list_name in self.itineraries:
             del self.itineraries[list_name]
-            save_itineraries(self.itineraries)
+            self.saver.remove(list_name)
+            trip_catalog.discard(ITINERARIES, list_name)
+            self.search.remove_trip(list_name)
             self.refresh_itinerary_list()
             self.reset_fields()
             messagebox.showinfo("Deleted", f"Itinerary '{list_name}' deleted successfully.", parent=self.root)
 
     def load_selected_itinerary(self, event):
         selection = self.itinerary_listbox.curselection()
-        if not selection:
+        if not selection or self.loading:
             return
         list_name = self.itinerary_listbox.get(selection[0])
         itinerary = self.itineraries[list_name]
+        if isinstance(itinerary, ItineraryHeader):
+            itinerary = itinerary.materialize()
+            self.itineraries[list_name] = itinerary
 
         self.reset_fields()
         self.current_itinerary = list_name
@@ -415,5 +501,6 @@ class ItineraryMenu:
         self.end_date_entry.set_date(itinerary.end_date)
         self.trip_type_combo.set(itinerary.trip_type)
 
-        self.activities = list(itinerary.activities)
+        self.activities = ActivitySchedule(itinerary.activities)
         self.refresh_activity_table()
+        self.history.reset(self.editor_state())
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
 from src.controllers.budgetcontroller import BudgetController
+from src.utils.history import History
+from src.utils.loader import load_async, poll_future
 
 class BudgetGUI:
     def __init__(self, root, trip_name, controller: BudgetController):
@@ -15,6 +17,8 @@ class BudgetGUI:
             self.root.destroy()
             return
 
+        self.history = History(trip)
+
         self.root.title(f"Budget Plan - {self.trip_name}")
         self.root.geometry("850x700")
         self.root.configure(bg="#121212")
@@ -89,7 +93,11 @@ class BudgetGUI:
         footer.grid(row=2, column=0, pady=10)
 
         ttk.Button(footer, text="🔄 Refresh View", command=self.view_budgets).grid(row=0, column=0, padx=10)
-        ttk.Button(footer, text="⬅️ Go Back", command=self.go_back).grid(row=0, column=1, padx=10)
+        ttk.Button(footer, text="↩️ Undo", command=self.undo).grid(row=0, column=1, padx=10)
+        ttk.Button(footer, text="↪️ Redo", command=self.redo).grid(row=0, column=2, padx=10)
+        ttk.Button(footer, text="⬅️ Go Back", command=self.go_back).grid(row=0, column=3, padx=10)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
 
         self.view_budgets()
 
@@ -98,6 +106,7 @@ class BudgetGUI:
         try:
             amount = float(self.amount_entry.get())
             self.controller.add_category(self.trip_name, category, amount)
+            self.remember()
             self.view_budgets()
             messagebox.showinfo("Added", f"Category '{category}' added with RM{amount:.2f}", parent=self.root)
         except ValueError as e:
@@ -132,6 +141,7 @@ class BudgetGUI:
             try:
                 amt = float(amount_var.get())
                 self.controller.edit_category(self.trip_name, cat_var.get(), amt)
+                self.remember()
                 self.view_budgets()
                 dialog.destroy()
                 messagebox.showinfo("Updated", f"Category '{cat_var.get()}' updated to RM{amt:.2f}", parent=self.root)
@@ -178,6 +188,7 @@ class BudgetGUI:
             if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{category}'?"):
                 try:
                     self.controller.delete_category(self.trip_name, category)
+                    self.remember()
                     self.view_budgets()
                     dialog.destroy()
                     messagebox.showinfo("Deleted", f"Category '{category}' has been removed.", parent=self.root)
@@ -201,12 +212,32 @@ class BudgetGUI:
             # Then save the total budget
             total = float(self.total_entry.get())
             self.controller.update_total(self.trip_name, total)
+            self.remember()
 
             messagebox.showinfo("Saved", "Budget saved successfully!", parent=self.root)
 
         except ValueError as e:
             messagebox.showerror("Error", f"Could not save budget: {e}", parent=self.root)
 
+    def remember(self):
+        self.history.record(self.controller.get_trip(self.trip_name))
+
+    def undo(self):
+        self.restore(self.history.undo(), "Nothing to undo.")
+
+    def redo(self):
+        self.restore(self.history.redo(), "Nothing to redo.")
+
+    def restore(self, snapshot, nothing_message):
+        if snapshot is None:
+            messagebox.showinfo("Budget", nothing_message, parent=self.root)
+            return
+        budget = snapshot.restore()
+        self.controller.restore_trip(self.trip_name, budget)
+        self.total_entry.delete(0, tk.END)
+        self.total_entry.insert(0, str(budget.total_budget))
+        self.view_budgets()
+
     def view_budgets(self):
         # Clear display frame
         for widget in self.display.winfo_children():
@@ -292,8 +323,8 @@ class BudgetMenu:
         btn_frame = tk.Frame(root, bg="#121212")
         btn_frame.pack(pady=15)
 
-        # Create a grid with 5 columns for the buttons
-        for i in range(5):
+        # Create a grid with 6 columns for the buttons
+        for i in range(6):
             btn_frame.grid_columnconfigure(i, weight=1)
 
         style = ttk.Style()
@@ -304,9 +335,28 @@ class BudgetMenu:
         ttk.Button(btn_frame, text="✏️ Open Plan", command=self.open_plan, style="White.TButton").grid(row=0, column=1, padx=2, pady=5, sticky="ew")
         ttk.Button(btn_frame, text="🗑 Delete Plan", command=self.delete_plan, style="White.TButton").grid(row=0, column=2, padx=2, pady=5, sticky="ew")
         ttk.Button(btn_frame, text="🔄 Refresh", command=self.refresh_list, style="White.TButton").grid(row=0, column=3, padx=2, pady=5, sticky="ew")
-        ttk.Button(btn_frame, text="⬅️ Back to Menu", command=self.go_back, style="White.TButton").grid(row=0, column=4, padx=2, pady=5, sticky="ew")
+        ttk.Button(btn_frame, text="📊 Dashboard", command=self.open_dashboard, style="White.TButton").grid(row=0, column=4, padx=2, pady=5, sticky="ew")
+        ttk.Button(btn_frame, text="⬅️ Back to Menu", command=self.go_back, style="White.TButton").grid(row=0, column=5, padx=2, pady=5, sticky="ew")
+
+        # load the trips off the Tk thread so the window paints straight away
+        self.loading = True
+        self.listbox.insert(tk.END, "⏳ Loading budget plans...")
+        poll_future(self.root, load_async(self.controller.load), self.on_loaded, self.on_load_failed)
+
+    def on_loaded(self, budgets):
+        self.loading = False
+        self.refresh_list()
 
+    def on_load_failed(self, error):
+        self.loading = False
         self.refresh_list()
+        messagebox.showerror("Loading error", f"Could not load budget plans:\n{error}", parent=self.root)
+
+    def check_loaded(self):
+        if self.loading:
+            messagebox.showinfo("Please wait", "Budget plans are still loading.", parent=self.root)
+            return False
+        return True
 
     def go_back(self):
         self.root.destroy()
@@ -316,11 +366,15 @@ class BudgetMenu:
         root.mainloop()
 
     def refresh_list(self):
+        if self.loading:
+            return
         self.listbox.delete(0, tk.END)
         for trip_name in self.controller.get_trips():
             self.listbox.insert(tk.END, trip_name)
 
     def add_plan(self):
+        if not self.check_loaded():
+            return
         dialog = tk.Toplevel(self.root)
         dialog.title("➕ New Budget Plan")
         dialog.geometry("300x300")
@@ -359,6 +413,8 @@ class BudgetMenu:
         ttk.Button(dialog, text="❌ Cancel", command=dialog.destroy).pack(pady=(0, 15), fill="x", padx=20)
 
     def open_plan(self):
+        if not self.check_loaded():
+            return
         selection = self.listbox.curselection()
         if not selection:
             messagebox.showwarning("No Selection", "Please select a plan to open.", parent=self.root)
@@ -368,6 +424,8 @@ class BudgetMenu:
         BudgetGUI(win, trip_name, self.controller)
 
     def delete_plan(self):
+        if not self.check_loaded():
+            return
         selection = self.listbox.curselection()
         if not selection:
             messagebox.showwarning("No Selection", "Please select a plan to delete.", parent=self.root)
@@ -382,3 +440,44 @@ class BudgetMenu:
                 messagebox.showerror("Delete Failed",
                                      f"Could not delete the selected plan.\n\nReason: {e}",
                                      parent=self.root)
+
+    def open_dashboard(self):
+        if not self.check_loaded():
+            return
+        from src.utils.analytics import BudgetMatrix  # NumPy is only loaded when the dashboard is used
+        matrix = BudgetMatrix.from_budgets(self.controller.budgets.values())
+
+        win = tk.Toplevel(self.root)
+        win.title("📊 Budget Dashboard")
+        win.geometry("700x550")
+        win.configure(bg="#121212")
+
+        ttk.Label(win, text="📊 Totals by Currency", font=("Segoe UI", 14, "bold")).pack(pady=(15, 5))
+        columns = ("Currency", "Trips", "Total", "Allocated", "Remaining")
+        tree = ttk.Treeview(win, columns=columns, show="headings", height=6)
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=120, anchor="center")
+        tree.pack(fill="x", padx=20)
+        rollups = list(matrix.rollups().values())
+        if len(rollups) > 1:
+            try:
+                combined = matrix.rollup_in("RM")
+                combined.currency = "All (RM)"
+                rollups.append(combined)
+            except (OSError, ValueError):
+                pass  # no usable rate table; show the per-currency rows only
+        for rollup in rollups:
+            tree.insert("", "end", values=(rollup.currency, rollup.trips, f"{rollup.total:.2f}",
+                                           f"{rollup.allocated:.2f}", f"{rollup.remaining:.2f}"))
+
+        ttk.Label(win, text="🏆 Top Trips by Allocated Amount", font=("Segoe UI", 14, "bold")).pack(pady=(15, 5))
+        for trip_name, amount in matrix.top_trips(5):
+            currency = self.controller.get_trip(trip_name).currency
+            ttk.Label(win, text=f"{trip_name}: {currency}{amount:.2f}").pack()
+
+        over = matrix.over_allocated()
+        ttk.Label(win, text="⚠️ Over-Allocated Trips", font=("Segoe UI", 14, "bold")).pack(pady=(15, 5))
+        ttk.Label(win, text=", ".join(over) if over else "None").pack()
+
+        ttk.Button(win, text="❌ Close", command=win.destroy, style="White.TButton").pack(pady=15)
@@ -4,6 +4,7 @@ from src.gui.ItineraryGUI import ItineraryMenu
 from src.gui.budgetgui import BudgetMenu
 from src.gui.packageGui import PackingListGUI
 from src.controllers.budgetcontroller import BudgetController
+from src.utils.loader import prefetch_all
 
 class MainApp:
     def __init__(self, root):
@@ -12,6 +13,9 @@ class MainApp:
         self.root.geometry("750x500")
         self.root.configure(bg="#121212")
 
+        # read all datafiles in the background while the menu is shown
+        prefetch_all()
+
         # Gradient Background
         self.bg_canvas = tk.Canvas(self.root, highlightthickness=0, bd=0)
         self.bg_canvas.pack(fill="both", expand=True)
@@ -110,7 +114,7 @@ class MainApp:
         self.root.destroy()
         new_root = tk.Tk()
         new_root.configure(bg="#121212")
-        controller = BudgetController()
+        controller = BudgetController(autoload=False)  # BudgetMenu loads it in the background
         BudgetMenu(new_root, controller)
         new_root.mainloop()
 
@@ -3,6 +3,7 @@ from tkinter import ttk, simpledialog, messagebox
 from src.controllers.packageController import PackingController
 from src.modules.package import PackingList
 from src.utils.file import load_packing_lists, save_packing_lists
+from src.utils.history import History
 
 
 class PackingListGUI:
@@ -16,6 +17,7 @@ class PackingListGUI:
 
         self.controller = PackingController()
         self.current_list = None
+        self.history = History()
 
         # ttk
         self.setup_styles()
@@ -159,6 +161,10 @@ class PackingListGUI:
         style.configure("White.TButton", background="white", foreground="black", padding=(8, 1))
         ttk.Button(row_frame, text="➕ Add", command=self.add_custom_item, style="White.TButton").pack(side="left", padx=5)
         ttk.Button(row_frame, text="🗑️ Delete", command=self.delete_item, style="White.TButton").pack(side="left", padx=5)
+        ttk.Button(row_frame, text="↩️ Undo", command=self.undo, style="White.TButton").pack(side="left", padx=5)
+        ttk.Button(row_frame, text="↪️ Redo", command=self.redo, style="White.TButton").pack(side="left", padx=5)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
 
     def create_button_frame(self):
         """create bottom button frame"""
@@ -184,6 +190,7 @@ class PackingListGUI:
         self.weather_var.set(packing_list.weather)
         self.travelers_var.set(str(packing_list.travelers))
 
+        self.history.reset(packing_list)
         self.update_display()
 
         messagebox.showinfo("Loading successful", f"Trip loaded: {packing_list.trip_name}", parent=self.root)
@@ -206,6 +213,7 @@ class PackingListGUI:
 
             self.current_list = self.controller.generate_packing_list(destination, duration, weather, travelers)
 
+            self.history.reset(self.current_list)
             self.update_display()
 
             messagebox.showinfo("Generation successful",
@@ -252,6 +260,7 @@ class PackingListGUI:
         if not item_text.startswith("📂"):
             success = self.current_list.toggle_packed(item_text)
             if success:
+                self.history.record(self.current_list)
                 self.update_display()
 
     def add_custom_item(self):
@@ -268,6 +277,7 @@ class PackingListGUI:
             return
 
         self.current_list.add_item(item_name, category)
+        self.history.record(self.current_list)
         self.update_display()
 
         self.new_item_var.set("")
@@ -293,9 +303,24 @@ class PackingListGUI:
             if confirm:
                 success = self.current_list.remove_item(item_text)
                 if success:
+                    self.history.record(self.current_list)
                     self.update_display()
                     messagebox.showinfo("Delete successful", f"Deleted items: {item_text}", parent=self.root)
 
+    def undo(self):
+        """go back to the list before the last change"""
+        self.restore(self.history.undo())
+
+    def redo(self):
+        """reapply the last undone change"""
+        self.restore(self.history.redo())
+
+    def restore(self, snapshot):
+        if snapshot is None:
+            return
+        self.current_list = snapshot.restore()
+        self.update_display()
+
     def save_list(self):
         """save list"""
         duration = int(self.duration_var.get())
@@ -326,6 +351,7 @@ class PackingListGUI:
 
     def go_back(self):
         """back to menu"""
+        self.controller.flush()
         self.root.destroy()
         from src.gui.mainmenu import MainApp
         root = tk.Tk()
@@ -434,10 +460,10 @@ class SavedListsSelector:
             return
 
         try:
-            saved_lists = self.controller.load_all_lists()
-            if list_name in saved_lists:
+            packing_list = self.controller.get_list(list_name)
+            if packing_list is not None:
                 # load main menu
-                self.parent_gui.load_saved_list(saved_lists[list_name])
+                self.parent_gui.load_saved_list(packing_list)
                 self.close_window()
             else:
                 messagebox.showerror("Error", "The specified list cannot be found!", parent=self.root)
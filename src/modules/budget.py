@@ -1,31 +1,92 @@
 from dataclasses import dataclass, field
+from decimal import Decimal, DecimalException, ROUND_HALF_UP
 from typing import Dict, Self
 from src.modules.trip import Trip
 
+CENTS = 100  # minor units per major unit
+
+
+def to_cents(amount) -> int:
+    """Round an amount (float, int, str or Decimal) to integer minor units, half up.
+
+    Raises ValueError for anything that is not a finite number, "nan" and "inf" included.
+    """
+    if isinstance(amount, int):
+        return amount * CENTS
+    try:
+        # go through str() so 0.1 means 0.10, not 0.1000000000000000055...
+        value = Decimal(str(amount))
+        if value.is_finite():
+            return int((value * CENTS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except DecimalException:
+        pass  # not a number, or too large to round
+    raise ValueError(f"Invalid amount: {amount!r}")
+
+
+def from_cents(cents: int) -> float:
+    return cents / CENTS
+
+
 @dataclass
 class Budget(Trip):
-    total_budget: float
+    """Trip budget held in integer cents.
+
+    ``allocated_cents`` is a running total kept by ``set_category``/``delete_category``,
+    so ``allocated`` and ``remaining`` are O(1) and exact. ``total_budget``, ``categories``
+    and the serialized form still use plain amounts.
+    """
+    total_cents: int
     currency: str = "RM"
-    categories: Dict[str, float] = field(default_factory=dict)
+    category_cents: Dict[str, int] = field(default_factory=dict)
 
     def __init__(self, trip_name: str, total_budget: float, currency: str = "RM", categories=None):
         super().__init__(trip_name)
-        self.total_budget = total_budget
+        self.total_cents = to_cents(total_budget)
         self.currency = currency
-        self.categories = categories or {}
+        self.category_cents = {}
+        self.allocated_cents = 0
+        for category, amount in (categories or {}).items():
+            self.set_category(category, amount)
+
+    # ---------- Amounts ----------
+    @property
+    def total_budget(self) -> float:
+        return from_cents(self.total_cents)
+
+    @total_budget.setter
+    def total_budget(self, amount) -> None:
+        self.total_cents = to_cents(amount)
+
+    @property
+    def categories(self) -> Dict[str, float]:
+        """Category amounts as plain numbers (a copy; change them with set_category)."""
+        return {category: from_cents(cents) for category, cents in self.category_cents.items()}
 
     @property
     def allocated(self) -> float:  # allocate total amount of all categories
-        return sum(self.categories.values())
+        return from_cents(self.allocated_cents)
+
+    @property
+    def remaining_cents(self) -> int:
+        return self.total_cents - self.allocated_cents
 
     @property
     def remaining(self) -> float: # display remaining balance
-        return self.total_budget - self.allocated
+        return from_cents(self.remaining_cents)
+
+    def set_category(self, category: str, amount) -> None:
+        cents = to_cents(amount)
+        self.allocated_cents += cents - self.category_cents.get(category, 0)
+        self.category_cents[category] = cents
+
+    def delete_category(self, category: str) -> None:
+        self.allocated_cents -= self.category_cents.pop(category)
 
     def to_dict(self) -> dict:
         # convert budget object to dictionary
         return {
             "total_budget": self.total_budget,
+            "currency": self.currency,
             "categories": self.categories
         }
 
@@ -34,6 +95,7 @@ class Budget(Trip):
         # convert dictionary to object
         return cls(
             trip_name=trip_name,
-            total_budget=float(data["total_budget"]),
-            categories={k: float(v) for k, v in data.get("categories", {}).items()}
+            total_budget=data["total_budget"],
+            currency=data.get("currency", "RM"),  # files written before currency was saved
+            categories=data.get("categories", {})
         )
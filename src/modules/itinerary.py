@@ -1,16 +1,116 @@
+import sys
+from bisect import bisect_right
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from typing import List, Self
+from typing import Callable, Dict, Iterable, Iterator, List, Self, Tuple
+from src.modules.timeparse import format_date, format_time, parse_date, parse_time
 from src.modules.trip import Trip
+from src.utils.intervals import IntervalIndex, overlapping_pairs
+
+
+# stand-ins for a stored date or time that does not parse (see _StoredActivity)
+_INVALID_DAY = 0
+_INVALID_MINUTE = -1
+_PARSED_FIELDS = (("date", parse_date, _INVALID_DAY), ("start_time", parse_time, _INVALID_MINUTE),
+                  ("end_time", parse_time, _INVALID_MINUTE))
+
+
+def _text(value) -> str:
+    return "" if value is None else value if isinstance(value, str) else str(value)
 
 
-@dataclass
 class Activity:
-    date: str
-    start_time: str
-    end_time: str
-    location: str
-    detail: str
-    notes: str = ""
+    """One scheduled activity.
+
+    Slotted and compact: the date is kept as a day ordinal, times as minutes since
+    midnight and the text fields are interned, so repeated locations share one string.
+    ``date``/``start_time``/``end_time`` still read and write as strings, normalized
+    (a stored "9:00" reads back as "09:00").
+
+    The constructor rejects a bad date or time with ValueError, but ``from_dict``
+    keeps an activity whose stored date or time does not parse, so one bad record
+    doesn't stop a whole itinerary from loading. Such an activity is not ``valid``:
+    the unparsable strings are kept in ``raw`` and written back unchanged, and it
+    takes part in no conflict checks.
+    """
+
+    __slots__ = ("day", "start_minute", "end_minute", "location", "detail", "notes")
+
+    raw = None  # stored values of the date/time fields that did not parse (and a missing detail), by name
+
+    def __init__(self, date: str, start_time: str, end_time: str, location: str, detail: str, notes: str = ""):
+        self.day = parse_date(date)
+        self.start_minute = parse_time(start_time)
+        self.end_minute = parse_time(end_time)
+        self.location = sys.intern(location)
+        self.detail = sys.intern(detail)
+        self.notes = sys.intern(notes)
+
+    @classmethod
+    def from_parsed(cls, day: int, start_minute: int, end_minute: int, location: str, detail: str,
+                    notes: str = "") -> "Activity":
+        """Build from already parsed values (a day ordinal and minute offsets)."""
+        activity = cls.__new__(cls)
+        activity.day, activity.start_minute, activity.end_minute = day, start_minute, end_minute
+        activity.location, activity.detail, activity.notes = sys.intern(location), sys.intern(detail), sys.intern(notes)
+        return activity
+
+    @property
+    def valid(self) -> bool:
+        """False if the stored date or a time could not be parsed."""
+        return self.raw is None
+
+    def _parsed(self, name: str) -> None:
+        # the field was set to a value that parses, so its stored original is no longer needed
+        if self.raw is not None:
+            self.raw = {field: value for field, value in self.raw.items() if field != name} or None
+
+    @property
+    def date(self) -> str:
+        if self.raw is not None and "date" in self.raw:
+            return self.raw["date"]
+        return format_date(self.day)
+
+    @date.setter
+    def date(self, value: str) -> None:
+        self.day = parse_date(value)
+        self._parsed("date")
+
+    @property
+    def start_time(self) -> str:
+        if self.raw is not None and "start_time" in self.raw:
+            return self.raw["start_time"]
+        return format_time(self.start_minute)
+
+    @start_time.setter
+    def start_time(self, value: str) -> None:
+        self.start_minute = parse_time(value)
+        self._parsed("start_time")
+
+    @property
+    def end_time(self) -> str:
+        if self.raw is not None and "end_time" in self.raw:
+            return self.raw["end_time"]
+        return format_time(self.end_minute)
+
+    @end_time.setter
+    def end_time(self, value: str) -> None:
+        self.end_minute = parse_time(value)
+        self._parsed("end_time")
+
+    @property
+    def sort_key(self) -> tuple:
+        return self.day, self.start_minute
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Activity):
+            return NotImplemented
+        return (self.raw == other.raw
+                and all(getattr(self, name) == getattr(other, name) for name in Activity.__slots__))
+
+    def __repr__(self) -> str:
+        return (f"Activity(date={self.date!r}, start_time={self.start_time!r}, end_time={self.end_time!r}, "
+                f"location={self.location!r}, detail={self.detail!r}, notes={self.notes!r})")
 
     def to_dict(self) -> dict:
         return {
@@ -18,20 +118,138 @@ class Activity:
             "start_time": self.start_time,
             "end_time": self.end_time,
             "location": self.location,
-            "detail": self.detail,
+            "detail": self.raw["detail"] if self.raw is not None and "detail" in self.raw else self.detail,
             "notes": self.notes,
         }
 
     @classmethod
     def from_dict(cls, data: dict) -> "Activity":
-        return cls(
-            date=data["date"],
-            start_time=data["start_time"],
-            end_time=data["end_time"],
-            location=data.get("location", ""),
-            detail=data["detail"],
-            notes=data.get("notes", "")
-        )
+        try:
+            return cls.from_parsed(parse_date(data["date"]), parse_time(data["start_time"]),
+                                   parse_time(data["end_time"]), data.get("location", ""), data["detail"],
+                                   data.get("notes", ""))
+        except (KeyError, TypeError, ValueError):
+            return _StoredActivity.from_bad_dict(data)
+
+
+class _StoredActivity(Activity):
+    """An Activity read from a record with a date or time that does not parse, or no detail."""
+
+    __slots__ = ("raw",)
+
+    @classmethod
+    def from_bad_dict(cls, data: dict) -> "_StoredActivity":
+        parsed, raw = [], {}
+        for name, parse, invalid in _PARSED_FIELDS:
+            value = data.get(name)
+            try:
+                parsed.append(parse(value))
+            except (TypeError, ValueError):
+                parsed.append(invalid)
+                raw[name] = value
+        if not isinstance(data.get("detail"), str):
+            raw["detail"] = data.get("detail")
+        activity = cls.from_parsed(*parsed, location=_text(data.get("location")), detail=_text(data.get("detail")),
+                                   notes=_text(data.get("notes")))
+        activity.raw = raw or None
+        return activity
+
+
+class ActivitySchedule(Sequence):
+    """Activities kept in (date, start time) order.
+
+    A parallel list of ``sort_key`` tuples is bisected on insert, so adding one
+    activity costs a binary search plus the list insert and nothing is re-sorted
+    or re-parsed. Activities with the same key stay in the order they were added.
+    Replace an activity (``replace``) rather than changing its date or times in place.
+
+    Double-booking checks use one IntervalIndex per day, built on the first
+    ``conflicts_with`` call and kept up to date by every change after that.
+    Activities that are not ``valid`` never conflict with anything.
+    """
+
+    def __init__(self, activities: Iterable[Activity] = ()):
+        self._items: List[Activity] = sorted(activities, key=lambda a: a.sort_key)
+        self._keys: List[tuple] = [a.sort_key for a in self._items]
+        self._days: Dict[int, IntervalIndex] | None = None
+
+    def add(self, activity: Activity) -> int:
+        """Insert in order and return the new activity's position."""
+        key = activity.sort_key
+        i = bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._items.insert(i, activity)
+        if self._days is not None and activity.valid:
+            self._day_index(activity.day).add(activity.start_minute, activity.end_minute, activity)
+        return i
+
+    def replace(self, index: int, activity: Activity) -> int:
+        """Swap the activity at ``index`` for ``activity``; returns its new position."""
+        del self[index]
+        return self.add(activity)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._keys.clear()
+        self._days = None
+
+    # ---------- Conflicts ----------
+    def _day_index(self, day: int) -> IntervalIndex:
+        index = self._days.get(day)
+        if index is None:
+            index = self._days[day] = IntervalIndex()
+        return index
+
+    def conflicts_with(self, activity: Activity, ignore: Activity | None = None) -> List[Activity]:
+        """Scheduled activities that overlap ``activity`` (other than ``ignore``)."""
+        if self._days is None:
+            self._days = {}
+            for scheduled in self._items:
+                if scheduled.valid:
+                    self._day_index(scheduled.day).add(scheduled.start_minute, scheduled.end_minute, scheduled)
+        index = self._days.get(activity.day)
+        if index is None or not activity.valid:
+            return []
+        return [other for other in index.overlapping(activity.start_minute, activity.end_minute)
+                if other is not activity and other is not ignore]
+
+    def conflicts(self) -> List[Tuple[Activity, Activity]]:
+        """Every pair of overlapping activities, earlier one first."""
+        pairs = []
+        start = 0
+        while start < len(self._items):
+            day = self._items[start].day
+            end = bisect_right(self._keys, (day, float("inf")), lo=start)
+            pairs.extend(overlapping_pairs((a.start_minute, a.end_minute, a)
+                                           for a in self._items[start:end] if a.valid))
+            start = end
+        return pairs
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __delitem__(self, index) -> None:
+        if self._days is not None:
+            removed = self._items[index]
+            for activity in removed if isinstance(index, slice) else (removed,):
+                if activity.valid:
+                    self._days[activity.day].remove(activity)
+        del self._items[index]
+        del self._keys[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Activity]:
+        return iter(self._items)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return self._items == list(other)
+
+    def __repr__(self) -> str:
+        return f"ActivitySchedule({self._items!r})"
 
 
 @dataclass
@@ -40,7 +258,7 @@ class Itinerary(Trip):
     start_date: str = ""
     end_date: str = ""
     trip_type: str = ""
-    activities: List[Activity] = field(default_factory=list)
+    activities: ActivitySchedule = field(default_factory=ActivitySchedule)
 
     def __init__(self, trip_name: str, location: str, start_date: str, end_date: str, trip_type: str, activities: List[Activity] = None):
         super().__init__(trip_name)
@@ -48,7 +266,38 @@ class Itinerary(Trip):
         self.start_date = start_date
         self.end_date = end_date
         self.trip_type = trip_type
-        self.activities = activities if activities else []
+        self.activities = ActivitySchedule(activities or ())
+
+    # ---------- Dates ----------
+    @property
+    def start_day(self) -> int:
+        return parse_date(self.start_date)
+
+    @property
+    def end_day(self) -> int:
+        return parse_date(self.end_date)
+
+    @property
+    def duration(self) -> int:
+        """Length of the trip in days, both ends included."""
+        return self.end_day - self.start_day + 1
+
+    def day_index(self, activity: Activity) -> int:
+        """0 for the trip's first day, 1 for the second, and so on."""
+        return activity.day - self.start_day
+
+    def out_of_range(self) -> List[Activity]:
+        """Activities dated outside the trip's start and end dates."""
+        first, last = self.start_day, self.end_day
+        return [a for a in self.activities if a.valid and not first <= a.day <= last]
+
+    def invalid(self) -> List[Activity]:
+        """Activities whose stored date or time could not be read."""
+        return [a for a in self.activities if not a.valid]
+
+    def conflicts(self) -> List[Tuple[Activity, Activity]]:
+        """Pairs of activities booked over each other."""
+        return self.activities.conflicts()
 
     # ---------- Serialization ----------
     def to_dict(self) -> dict:
@@ -72,3 +321,26 @@ class Itinerary(Trip):
             trip_type=data["trip_type"],
             activities=activities
         )
+
+
+class ItineraryHeader(Trip):
+    """Trip details of a stored itinerary without its activities.
+
+    Used to list trips cheaply; ``materialize`` builds the full Itinerary on demand.
+    """
+
+    def __init__(self, trip_name: str, location: str, start_date: str, end_date: str, trip_type: str,
+                 activity_count: int, loader: Callable[[], Itinerary]):
+        super().__init__(trip_name)
+        self.location = location
+        self.start_date = start_date
+        self.end_date = end_date
+        self.trip_type = trip_type
+        self.activity_count = activity_count
+        self._loader = loader
+
+    def materialize(self) -> Itinerary:
+        return self._loader()
+
+    def to_dict(self) -> dict:
+        return self.materialize().to_dict()
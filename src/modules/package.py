@@ -1,16 +1,21 @@
+import sys
 from dataclasses import dataclass, field
-from typing import List, Dict, Self
+from typing import ClassVar, List, Dict, Self, Tuple
 from src.modules.trip import Trip
 
 
-@dataclass
+@dataclass(slots=True)
 class PackingItem:
-    """pack item"""
+    """pack item (slotted; name and category are interned so lists share them)"""
     name: str
     category: str
     is_packed: bool = False
     quantity: int = 1
 
+    def __post_init__(self):
+        self.name = sys.intern(self.name)
+        self.category = sys.intern(self.category)
+
     def to_dict(self) -> dict:
         """Convert PackingItem to dict for JSON serialization."""
         return {
@@ -33,7 +38,14 @@ class PackingItem:
 
 @dataclass
 class PackingList(Trip):
-    """packing list"""
+    """packing list
+
+    ``total_items``/``packed_items`` are running totals kept by the mutating methods.
+    Change quantities through ``set_quantity`` so they stay right; set
+    ``PackingList.check_counters = True`` to recompute and assert them on every read.
+    """
+    check_counters: ClassVar[bool] = False
+
     destination_type: str = ""
     duration: int = 0
     weather: str = ""
@@ -47,43 +59,118 @@ class PackingList(Trip):
         self.weather = weather
         self.travelers = travelers
         self.items = items if items else []
+        self._reindex()
+
+    # ---------- Index ----------
+    def _reindex(self) -> None:
+        """Rebuild the lookup indexes from ``items``; needed only if the list is replaced."""
+        self._by_key: Dict[Tuple[str, str], PackingItem] = {}
+        self._by_name: Dict[str, List[PackingItem]] = {}
+        self._total = self._packed = 0
+        for item in self.items:
+            self._index(item)
+
+    def _index(self, item: PackingItem) -> None:
+        self._by_key.setdefault((item.name, item.category), item)
+        self._by_name.setdefault(item.name, []).append(item)
+        self._total += item.quantity
+        if item.is_packed:
+            self._packed += item.quantity
+
+    def _unindex(self, item: PackingItem) -> None:
+        same_name = self._by_name[item.name]
+        # by identity: a list loaded from a file can hold equal duplicates
+        del same_name[next(i for i, other in enumerate(same_name) if other is item)]
+        key = (item.name, item.category)
+        if self._by_key.get(key) is item:
+            del self._by_key[key]
+            duplicate = next((other for other in same_name if other.category == item.category), None)
+            if duplicate is not None:
+                self._by_key[key] = duplicate
+        if not same_name:
+            del self._by_name[item.name]
+        self._total -= item.quantity
+        if item.is_packed:
+            self._packed -= item.quantity
+
+    def get_item(self, name: str, category: str | None = None) -> PackingItem | None:
+        """The item called ``name`` (in ``category`` if given), first added first."""
+        if category is not None:
+            return self._by_key.get((name, category))
+        same_name = self._by_name.get(name)
+        return same_name[0] if same_name else None
 
     # ---------- Properties ----------
     @property
     def total_items(self) -> int:
-        return sum(item.quantity for item in self.items)
+        if self.check_counters:
+            self.verify_counters()
+        return self._total
 
     @property
     def packed_items(self) -> int:
-        return sum(item.quantity for item in self.items if item.is_packed)
+        if self.check_counters:
+            self.verify_counters()
+        return self._packed
 
     @property
     def packing_progress(self) -> float:
-        if self.total_items == 0:
+        if self.check_counters:
+            self.verify_counters()
+        if self._total == 0:
             return 0.0
-        return (self.packed_items / self.total_items) * 100
+        return (self._packed / self._total) * 100
+
+    def verify_counters(self) -> None:
+        """Recompute the totals from the items and assert the running ones match."""
+        total = sum(item.quantity for item in self.items)
+        packed = sum(item.quantity for item in self.items if item.is_packed)
+        assert (self._total, self._packed) == (total, packed), \
+            f"packing counters drifted: kept {self._total}/{self._packed}, actual {total}/{packed}"
 
     # ---------- Methods ----------
     def add_item(self, name: str, category: str, quantity: int = 1) -> None:
-        for item in self.items:
-            if item.name == name and item.category == category:
-                item.quantity += quantity
-                return
-        self.items.append(PackingItem(name, category, False, quantity))
+        item = self._by_key.get((name, category))
+        if item is not None:
+            self._change_quantity(item, item.quantity + quantity)
+            return
+        item = PackingItem(name, category, False, quantity)
+        self.items.append(item)
+        self._index(item)
 
     def remove_item(self, name: str) -> bool:
-        for i, item in enumerate(self.items):
-            if item.name == name:
+        item = self.get_item(name)
+        if item is None:
+            return False
+        # the lookup is O(1); deleting from the ordered list still shifts what follows
+        for i, candidate in enumerate(self.items):
+            if candidate is item:
                 del self.items[i]
-                return True
-        return False
+                break
+        self._unindex(item)
+        return True
 
     def toggle_packed(self, name: str) -> bool:
-        for item in self.items:
-            if item.name == name:
-                item.is_packed = not item.is_packed
-                return True
-        return False
+        item = self.get_item(name)
+        if item is None:
+            return False
+        item.is_packed = not item.is_packed
+        self._packed += item.quantity if item.is_packed else -item.quantity
+        return True
+
+    def set_quantity(self, name: str, quantity: int, category: str | None = None) -> bool:
+        item = self.get_item(name, category)
+        if item is None:
+            return False
+        self._change_quantity(item, quantity)
+        return True
+
+    def _change_quantity(self, item: PackingItem, quantity: int) -> None:
+        delta = quantity - item.quantity
+        item.quantity = quantity
+        self._total += delta
+        if item.is_packed:
+            self._packed += delta
 
     def get_items_by_category(self) -> Dict[str, List[PackingItem]]:
         categories = {}
@@ -0,0 +1,53 @@
+"""Parsing of the date and time strings used by itineraries.
+
+Dates (``YYYY-MM-DD``) become proleptic Gregorian day ordinals and times
+(``HH:MM``) minutes since midnight. Each distinct string is parsed once: the
+results sit in bounded LRU caches, so the same few dates and times repeated
+across thousands of activities cost a dict lookup after the first time.
+Invalid input raises ``ValueError`` like ``datetime.strptime`` does.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+
+CACHE_SIZE = 4096
+
+_TIMES = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(value: str) -> int:
+    """'YYYY-MM-DD' -> day ordinal."""
+    # fromisoformat also takes ISO week dates ("2024-W01-1"), so check the shape first
+    if (len(value) == 10 and value[4] == "-" == value[7]
+            and value[:4].isdigit() and value[5:7].isdigit() and value[8:].isdigit()):
+        try:
+            return date.fromisoformat(value).toordinal()
+        except ValueError:
+            pass
+    return datetime.strptime(value, "%Y-%m-%d").toordinal()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_time(value: str) -> int:
+    """'HH:MM' -> minutes since midnight."""
+    if len(value) == 5 and value[2] == ":" and value[:2].isdigit() and value[3:].isdigit():
+        hours, minutes = int(value[:2]), int(value[3:])
+        if hours < 24 and minutes < 60:
+            return hours * 60 + minutes
+    parsed = datetime.strptime(value, "%H:%M")
+    return parsed.hour * 60 + parsed.minute
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_date(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def format_time(minutes: int) -> str:
+    return _TIMES[minutes]
+
+
+def clear_caches() -> None:
+    parse_date.cache_clear()
+    parse_time.cache_clear()
+    format_date.cache_clear()
@@ -0,0 +1,171 @@
+"""Cross-trip budget analytics on NumPy arrays.
+
+All budgets are laid out as one trip x category matrix of integer cents plus a
+vector of totals and a vector of currency codes, so roll-ups, percentiles and
+rankings are a handful of array operations however many trips there are.
+Amounts in different currencies are never added together directly: ``rollups``
+is per currency, and ``rollup_in`` first converts every trip through the rate
+table in one vectorized pass.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from src.modules.budget import Budget, CENTS
+from src.utils.currency import RateTable, load_rates
+from src.utils.file import BUDGETS_FILE, load_budgets_journaled
+
+
+@dataclass
+class CurrencyRollup:
+    currency: str
+    trips: int
+    total: float
+    allocated: float
+    remaining: float
+    by_category: Dict[str, float]
+
+
+class BudgetMatrix:
+    """Budgets of many trips as arrays.
+
+    ``amounts[i, j]`` is what trip ``trips[i]`` set aside for ``categories[j]`` (in
+    cents), ``present[i, j]`` whether it has that category at all, ``totals[i]``
+    its total budget and ``currencies[codes[i]]`` its currency.
+    """
+
+    def __init__(self, trips: List[str], categories: List[str], amounts: np.ndarray, present: np.ndarray,
+                 totals: np.ndarray, currencies: List[str], codes: np.ndarray):
+        self.trips = trips
+        self.categories = categories
+        self.amounts = amounts
+        self.present = present
+        self.totals = totals
+        self.currencies = currencies
+        self.codes = codes
+        self._category_columns = {name: j for j, name in enumerate(categories)}
+
+    @classmethod
+    def from_budgets(cls, budgets: Iterable[Budget]) -> "BudgetMatrix":
+        budgets = list(budgets)
+        categories: Dict[str, int] = {}
+        currencies: Dict[str, int] = {}
+        rows, columns, values = [], [], []
+        totals = np.empty(len(budgets), dtype=np.int64)
+        codes = np.empty(len(budgets), dtype=np.int32)
+        for i, budget in enumerate(budgets):
+            totals[i] = budget.total_cents
+            codes[i] = currencies.setdefault(budget.currency, len(currencies))
+            for category, cents in budget.category_cents.items():
+                rows.append(i)
+                columns.append(categories.setdefault(category, len(categories)))
+                values.append(cents)
+        amounts = np.zeros((len(budgets), len(categories)), dtype=np.int64)
+        present = np.zeros(amounts.shape, dtype=bool)
+        amounts[rows, columns] = values
+        present[rows, columns] = True
+        return cls([b.trip_name for b in budgets], list(categories), amounts, present, totals,
+                   list(currencies), codes)
+
+    # ---------- Per trip ----------
+    @property
+    def allocated(self) -> np.ndarray:
+        """Allocated cents per trip."""
+        return self.amounts.sum(axis=1)
+
+    @property
+    def remaining(self) -> np.ndarray:
+        """Remaining cents per trip."""
+        return self.totals - self.allocated
+
+    def over_allocated(self) -> List[str]:
+        """Trips whose categories add up to more than their total budget."""
+        return [self.trips[i] for i in np.flatnonzero(self.allocated > self.totals)]
+
+    def _mask(self, currency: str | None) -> np.ndarray:
+        if currency is None:
+            return np.ones(len(self.trips), dtype=bool)
+        if currency not in self.currencies:
+            return np.zeros(len(self.trips), dtype=bool)
+        return self.codes == self.currencies.index(currency)
+
+    def top_trips(self, n: int = 10, by: str = "allocated", currency: str | None = None) -> List[Tuple[str, float]]:
+        """The ``n`` largest trips by ``allocated``, ``total``, ``remaining`` or a category name."""
+        if by == "allocated":
+            values = self.allocated
+        elif by == "total":
+            values = self.totals
+        elif by == "remaining":
+            values = self.remaining
+        elif by in self._category_columns:
+            values = self.amounts[:, self._category_columns[by]]
+        else:
+            raise ValueError(f"cannot rank by {by!r}")
+        rows = np.flatnonzero(self._mask(currency))
+        if n < len(rows):
+            rows = rows[np.argpartition(-values[rows], n - 1)[:n]]
+        rows = rows[np.argsort(-values[rows], kind="stable")]
+        return [(self.trips[i], int(values[i]) / CENTS) for i in rows]
+
+    # ---------- Across trips ----------
+    def rollups(self) -> Dict[str, CurrencyRollup]:
+        """Totals per currency, with the allocated amount broken down by category."""
+        # currency x category sums in one pass: one-hot(currency)^T @ amounts
+        one_hot = np.zeros((len(self.trips), len(self.currencies)), dtype=np.int64)
+        one_hot[np.arange(len(self.trips)), self.codes] = 1
+        by_category = one_hot.T @ self.amounts
+        has_category = (one_hot.T @ self.present.astype(np.int64)) > 0
+        count = one_hot.sum(axis=0)
+        totals = one_hot.T @ self.totals
+        allocated = by_category.sum(axis=1)
+        result = {}
+        for c, currency in enumerate(self.currencies):
+            result[currency] = CurrencyRollup(
+                currency=currency,
+                trips=int(count[c]),
+                total=int(totals[c]) / CENTS,
+                allocated=int(allocated[c]) / CENTS,
+                remaining=int(totals[c] - allocated[c]) / CENTS,
+                by_category={category: int(by_category[c, j]) / CENTS
+                             for j, category in enumerate(self.categories) if has_category[c, j]},
+            )
+        return result
+
+    def rollup_in(self, currency: str, rates: RateTable | None = None) -> CurrencyRollup:
+        """All trips converted to ``currency`` and added up."""
+        rates = rates or load_rates()
+        positions = rates.positions(self.currencies)[self.codes]  # rate-table position per trip
+        amounts = rates.convert_many(self.amounts, positions, currency)
+        total = int(rates.convert_many(self.totals, positions, currency).sum())
+        by_category = amounts.sum(axis=0)
+        allocated = int(by_category.sum())
+        has_category = self.present.any(axis=0)
+        return CurrencyRollup(
+            currency=currency,
+            trips=len(self.trips),
+            total=total / CENTS,
+            allocated=allocated / CENTS,
+            remaining=(total - allocated) / CENTS,
+            by_category={category: int(by_category[j]) / CENTS
+                         for j, category in enumerate(self.categories) if has_category[j]},
+        )
+
+    def category_percentiles(self, percentiles: Sequence[float] = (25, 50, 75, 90),
+                             currency: str | None = None) -> Dict[str, Dict[float, float]]:
+        """Percentiles of each category's amount over the trips that have that category."""
+        rows = self._mask(currency)
+        values = np.where(self.present[rows], self.amounts[rows], np.nan) / CENTS
+        result = {}
+        with np.errstate(all="ignore"):
+            has_any = self.present[rows].any(axis=0)
+            if not has_any.any():
+                return result
+            table = np.nanpercentile(values[:, has_any], percentiles, axis=0)
+        for column, j in enumerate(np.flatnonzero(has_any)):
+            result[self.categories[j]] = {p: float(table[k, column]) for k, p in enumerate(percentiles)}
+        return result
+
+
+def load_budget_matrix(filename: str = BUDGETS_FILE) -> BudgetMatrix:
+    return BudgetMatrix.from_budgets(load_budgets_journaled(filename).values())
@@ -0,0 +1,47 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# read once: os.umask can only be read by setting it, which is not thread-safe
+_UMASK = _read_umask()
+
+
+def file_mode(path: str) -> int:
+    """Permissions a rewrite of ``path`` should get: its current ones, or those of a new file."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: str | None = "utf-8"):
+    """Open a temp file next to ``path`` and move it over ``path`` once fully written.
+
+    The data is fsynced before the ``os.replace``, so readers (and a crash) only ever
+    see the old file or the complete new one. On error the temp file is removed.
+    The new file keeps the permissions of the one it replaces (a new file gets the
+    usual umask default rather than the 0600 of a temp file).
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.chmod(tmp_path, file_mode(path))
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
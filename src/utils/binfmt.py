@@ -0,0 +1,332 @@
+"""Compact binary datafile format (``.tpb``).
+
+Layout: the magic ``TPB1``, a string table, then the document as tagged values.
+Every string is stored once in the table and referenced by index, dates
+(``YYYY-MM-DD``) become 4-byte day ordinals and times (``HH:MM``) 2-byte minute
+counts. Lists of dicts sharing the same keys (activities, packing items) are
+written as one key header plus column types, followed by fixed-width rows that
+decode with a single ``struct.iter_unpack``.
+
+Convert between formats with::
+
+    python -m src.utils.binfmt convert src/datafiles/itineraries.json itineraries.tpb
+"""
+import argparse
+import json
+import os
+import re
+import struct
+from datetime import date
+from functools import lru_cache
+from typing import BinaryIO, List
+
+from src.utils.atomic import atomic_open
+from src.utils.compression import open_text_read, open_text_write
+from src.utils.journal import Journal
+
+MAGIC = b"TPB1"
+EXTENSION = ".tpb"
+
+NONE, FALSE, TRUE, INT, FLOAT, STR, DATE, TIME, LIST, DICT, RECORDS, FIXED_RECORDS = range(12)
+
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}\Z")
+_TIME_RE = re.compile(r"([01]\d|2[0-3]):[0-5]\d\Z")
+_DOUBLE = struct.Struct("<d")
+_ORDINAL = struct.Struct("<I")
+_MINUTES = struct.Struct("<H")
+
+# struct code of each value type allowed in a fixed-width record column
+_COLUMN_CODES = {FALSE: "?", INT: "q", FLOAT: "d", STR: "I", DATE: "I", TIME: "H"}
+_TIMES = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+
+
+@lru_cache(maxsize=4096)
+def _date_ordinal(value: str) -> int | None:
+    if not _DATE_RE.match(value):
+        return None
+    try:
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        return None
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings: List[str] = []
+        self.index = {}
+        self.body = bytearray()
+
+    def ref(self, s: str) -> int:
+        i = self.index.get(s)
+        if i is None:
+            i = self.index[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def column_type(self, v) -> int | None:
+        """Type of a value in a fixed-width column, or None if it needs a tag."""
+        if v is True or v is False:
+            return FALSE
+        if isinstance(v, int):
+            return INT if -(1 << 63) <= v < (1 << 63) else None
+        if isinstance(v, float):
+            return FLOAT
+        if isinstance(v, str):
+            if _date_ordinal(v) is not None:
+                return DATE
+            return TIME if _TIME_RE.match(v) else STR
+        return None
+
+    def column_value(self, kind: int, v):
+        if kind == STR:
+            return self.ref(v)
+        if kind == DATE:
+            return _date_ordinal(v)
+        if kind == TIME:
+            return int(v[:2]) * 60 + int(v[3:])
+        return v
+
+    def fixed_records(self, keys, items) -> bool:
+        """Write ``items`` as fixed-width rows if every column has a single type."""
+        if not keys:
+            return False  # a zero-width row would lose the number of items
+        columns = []
+        for key in keys:
+            kinds = {self.column_type(item[key]) for item in items}
+            if len(kinds) != 1 or None in kinds:
+                return False
+            columns.append(kinds.pop())
+        out = self.body
+        out.append(FIXED_RECORDS)
+        _write_varint(out, len(keys))
+        for key, kind in zip(keys, columns):
+            _write_varint(out, self.ref(key))
+            out.append(kind)
+        _write_varint(out, len(items))
+        row = struct.Struct("<" + "".join(_COLUMN_CODES[kind] for kind in columns))
+        for item in items:
+            out += row.pack(*(self.column_value(kind, item[key]) for key, kind in zip(keys, columns)))
+        return True
+
+    def value(self, v) -> None:
+        out = self.body
+        if v is None:
+            out.append(NONE)
+        elif v is True or v is False:
+            out.append(TRUE if v else FALSE)
+        elif isinstance(v, int):
+            if not -(1 << 63) <= v < (1 << 63):
+                raise ValueError(f"integer out of range: {v}")
+            out.append(INT)
+            _write_varint(out, (v << 1) ^ (v >> 63))  # zigzag, so small negatives stay short
+        elif isinstance(v, float):
+            out.append(FLOAT)
+            out += _DOUBLE.pack(v)
+        elif isinstance(v, str):
+            ordinal = _date_ordinal(v)
+            if ordinal is not None:
+                out.append(DATE)
+                out += _ORDINAL.pack(ordinal)
+            elif _TIME_RE.match(v):
+                out.append(TIME)
+                out += _MINUTES.pack(int(v[:2]) * 60 + int(v[3:]))
+            else:
+                out.append(STR)
+                _write_varint(out, self.ref(v))
+        elif isinstance(v, list):
+            keys = self._shared_keys(v)
+            if keys is not None and self.fixed_records(keys, v):
+                pass
+            elif keys is not None:
+                out.append(RECORDS)
+                _write_varint(out, len(keys))
+                for key in keys:
+                    _write_varint(out, self.ref(key))
+                _write_varint(out, len(v))
+                for record in v:
+                    for key in keys:
+                        self.value(record[key])
+            else:
+                out.append(LIST)
+                _write_varint(out, len(v))
+                for item in v:
+                    self.value(item)
+        elif isinstance(v, dict):
+            out.append(DICT)
+            _write_varint(out, len(v))
+            for key, item in v.items():
+                _write_varint(out, self.ref(str(key)))
+                self.value(item)
+        else:
+            raise TypeError(f"cannot encode {type(v).__name__}")
+
+    @staticmethod
+    def _shared_keys(items: list):
+        if not items or not all(isinstance(item, dict) for item in items):
+            return None
+        keys = list(items[0])
+        if all(list(item) == keys for item in items):
+            return keys
+        return None
+
+
+class _Decoder:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.strings: List[str] = []
+
+    def varint(self) -> int:
+        n = shift = 0
+        while True:
+            b = self.data[self.pos]
+            self.pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def fixed_records(self):
+        keys, converters = [], []
+        for _ in range(self.varint()):
+            keys.append(self.strings[self.varint()])
+            converters.append(self.data[self.pos])
+            self.pos += 1
+        count = self.varint()
+        row = struct.Struct("<" + "".join(_COLUMN_CODES[kind] for kind in converters))
+        end = self.pos + row.size * count
+        rows = row.iter_unpack(self.data[self.pos:end])
+        self.pos = end
+
+        strings, dates = self.strings, {}
+        columns = []
+        for kind in converters:
+            if kind == STR:
+                columns.append(strings.__getitem__)
+            elif kind == TIME:
+                columns.append(_TIMES.__getitem__)
+            elif kind == DATE:
+                columns.append(lambda o: dates.get(o) or dates.setdefault(o, date.fromordinal(o).isoformat()))
+            else:
+                columns.append(None)
+        if all(column is None for column in columns):
+            return [dict(zip(keys, values)) for values in rows]
+        return [
+            dict(zip(keys, [v if column is None else column(v) for column, v in zip(columns, values)]))
+            for values in rows
+        ]
+
+    def value(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == STR:
+            return self.strings[self.varint()]
+        if tag == DICT:
+            return {self.strings[self.varint()]: self.value() for _ in range(self.varint())}
+        if tag == FIXED_RECORDS:
+            return self.fixed_records()
+        if tag == RECORDS:
+            keys = [self.strings[self.varint()] for _ in range(self.varint())]
+            return [{key: self.value() for key in keys} for _ in range(self.varint())]
+        if tag == LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == DATE:
+            (ordinal,) = _ORDINAL.unpack_from(self.data, self.pos)
+            self.pos += 4
+            return date.fromordinal(ordinal).isoformat()
+        if tag == TIME:
+            (minutes,) = _MINUTES.unpack_from(self.data, self.pos)
+            self.pos += 2
+            return _TIMES[minutes]
+        if tag == INT:
+            n = self.varint()
+            return (n >> 1) ^ -(n & 1)
+        if tag == FLOAT:
+            (v,) = _DOUBLE.unpack_from(self.data, self.pos)
+            self.pos += 8
+            return v
+        if tag in (NONE, FALSE, TRUE):
+            return (None, False, True)[tag]
+        raise ValueError(f"corrupt datafile: unknown tag {tag} at byte {self.pos - 1}")
+
+
+def dumps(document) -> bytes:
+    encoder = _Encoder()
+    encoder.value(document)
+    out = bytearray(MAGIC)
+    _write_varint(out, len(encoder.strings))
+    for s in encoder.strings:
+        raw = s.encode("utf-8")
+        _write_varint(out, len(raw))
+        out += raw
+    return bytes(out + encoder.body)
+
+
+def loads(data: bytes):
+    if data[:4] != MAGIC:
+        raise ValueError("not a .tpb datafile")
+    decoder = _Decoder(data)
+    decoder.pos = 4
+    for _ in range(decoder.varint()):
+        length = decoder.varint()
+        decoder.strings.append(bytes(decoder.data[decoder.pos:decoder.pos + length]).decode("utf-8"))
+        decoder.pos += length
+    return decoder.value()
+
+
+def dump(document, f: BinaryIO) -> None:
+    f.write(dumps(document))
+
+
+def load(f: BinaryIO):
+    return loads(f.read())
+
+
+# ---------- Conversion ----------
+def read_document(path: str):
+    if Journal(path).exists():
+        # a budgets snapshot with changes still in its journal: convert what the app sees
+        from src.utils.file import load_budgets_journaled  # file.py imports storage, which imports this module
+        return {name: budget.to_dict() for name, budget in load_budgets_journaled(path).items()}
+    if path.lower().endswith(EXTENSION):
+        with open(path, "rb") as f:
+            return load(f)
+    with open_text_read(path) as f:
+        return json.load(f)
+
+
+def write_document(path: str, document) -> None:
+    def write():
+        if path.lower().endswith(EXTENSION):
+            with atomic_open(path, "wb") as f:
+                dump(document, f)
+        else:
+            with open_text_write(path) as f:
+                json.dump(document, f, indent=4, ensure_ascii=False)
+
+    # the new file is complete, so a journal left over from an older one must not be replayed on it
+    Journal(path).compact(write)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert datafiles between JSON and the compact .tpb format.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = sub.add_parser("convert", help="convert SRC to DST, formats chosen by file extension")
+    convert_cmd.add_argument("src")
+    convert_cmd.add_argument("dst")
+    args = parser.parse_args(argv)
+
+    write_document(args.dst, read_document(args.src))
+    before, after = os.path.getsize(args.src), os.path.getsize(args.dst)
+    print(f"Converted {args.src} ({before} bytes) to {args.dst} ({after} bytes)")
+
+
+if __name__ == "__main__":
+    main()
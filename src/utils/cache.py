@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Callable, Dict, Tuple
+
+
+class RecordCache:
+    """Process-wide cache of parsed datafile records, keyed by file path and kind.
+
+    An entry is reused as long as the file's ``(mtime, size)`` is unchanged, so a
+    datafile is only parsed again after something else rewrote it. Writers that go
+    through ``update`` keep the cached records current without a re-read and call
+    ``refresh`` once their write has reached the disk.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[tuple | None, Dict[str, dict]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path: str) -> tuple | None:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, path: str, kind: str, load: Callable[[], Dict[str, dict]]) -> Dict[str, dict]:
+        """Return the cached records, calling ``load`` only if the file changed."""
+        key = (os.path.abspath(path), kind)
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+        records = load()
+        with self._lock:
+            self._entries[key] = (signature, records)
+        return records
+
+    def peek(self, path: str, kind: str) -> Dict[str, dict] | None:
+        """A copy of the cached records if the entry is still valid, without loading anything."""
+        key = (os.path.abspath(path), kind)
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                return dict(entry[1])
+        return None
+
+    def store(self, path: str, kind: str, records: Dict[str, dict]) -> None:
+        """Remember ``records`` as the current content of a file that was just written."""
+        with self._lock:
+            self._entries[(os.path.abspath(path), kind)] = (self._signature(path), records)
+
+    def update(self, path: str, kind: str, name: str, record: dict | None) -> None:
+        """Apply one upsert (or delete when ``record`` is None) to a cached entry in place."""
+        with self._lock:
+            entry = self._entries.get((os.path.abspath(path), kind))
+            if entry is None:
+                return
+            if record is None:
+                entry[1].pop(name, None)
+            else:
+                entry[1][name] = record
+
+    def refresh(self, path: str, kind: str) -> None:
+        """Accept the file's current (mtime, size) for an entry that ``update`` kept in sync."""
+        key = (os.path.abspath(path), kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (self._signature(path), entry[1])
+
+    def invalidate(self, path: str, kind: str | None = None) -> None:
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path and kind in (None, k[1])]:
+                del self._entries[key]
+
+
+records_cache = RecordCache()
@@ -0,0 +1,188 @@
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+from src.modules.budget import Budget
+from src.modules.itinerary import Itinerary, ItineraryHeader
+from src.modules.package import PackingList
+from src.modules.timeparse import parse_date
+from src.utils.file import (BUDGETS_FILE, PACKING_LISTS_FILE, ITINERARIES_FILE, load_budgets_journaled,
+                            load_packing_lists, load_itinerary_headers)
+from src.utils.intervals import IntervalIndex
+from src.utils.storage import BUDGETS, PACKING_LISTS, ITINERARIES, KINDS
+
+# indexed attribute -> the kind of model that carries it
+INDEXED_FIELDS: Dict[str, str] = {
+    "location": ITINERARIES,
+    "trip_type": ITINERARIES,
+    "destination_type": PACKING_LISTS,
+    "weather": PACKING_LISTS,
+    "currency": BUDGETS,
+}
+
+
+def kind_of(model) -> str:
+    if isinstance(model, Budget):
+        return BUDGETS
+    if isinstance(model, PackingList):
+        return PACKING_LISTS
+    if isinstance(model, (Itinerary, ItineraryHeader)):
+        return ITINERARIES
+    raise TypeError(f"not a trip model: {type(model).__name__}")
+
+
+def _normalize(value) -> str:
+    # "City" from the GUI and "city" from older files are the same destination
+    return str(value).strip().casefold()
+
+
+@dataclass
+class TripEntry:
+    """Everything stored under one trip name."""
+    trip_name: str
+    budget: Budget | None = None
+    packing_list: PackingList | None = None
+    itinerary: Itinerary | ItineraryHeader | None = None
+
+
+class TripCatalog:
+    """Budgets, packing lists and itineraries joined by trip name, with secondary indexes.
+
+    Each field in ``INDEXED_FIELDS`` maps a normalized value to the set of trip names
+    having it, so ``find(trip_type="Company", location="London")`` intersects two sets
+    instead of scanning every record. Itinerary date ranges sit in an interval index,
+    so ``active_on``/``overlapping`` are O(log n + k). Controllers call ``put``/``discard``
+    on every change; the catalog only tracks changes once it is loaded (queries load
+    it on first use), because loading reads the current state of the stores anyway.
+    """
+
+    def __init__(self, budgets_file: str = BUDGETS_FILE, packing_lists_file: str = PACKING_LISTS_FILE,
+                 itineraries_file: str = ITINERARIES_FILE):
+        self.paths = {BUDGETS: budgets_file, PACKING_LISTS: packing_lists_file, ITINERARIES: itineraries_file}
+        self.loaded = False
+        self._models: Dict[str, Dict[str, object]] = {kind: {} for kind in KINDS}
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {name: {} for name in INDEXED_FIELDS}
+        self._reset_spans()
+        self._lock = threading.RLock()
+
+    def _reset_spans(self) -> None:
+        self._spans: IntervalIndex[str] = IntervalIndex()
+        self._span_keys: Dict[str, str] = {}  # name -> the exact object stored in _spans
+
+    def load(self) -> "TripCatalog":
+        """(Re)build the catalog from the stores; safe to run on a worker thread."""
+        budgets = load_budgets_journaled(self.paths[BUDGETS])
+        packing_lists = load_packing_lists(self.paths[PACKING_LISTS])
+        itineraries = load_itinerary_headers(self.paths[ITINERARIES])
+        with self._lock:
+            self._models = {kind: {} for kind in KINDS}
+            self._indexes = {name: {} for name in INDEXED_FIELDS}
+            self._reset_spans()
+            for kind, models in ((BUDGETS, budgets), (PACKING_LISTS, packing_lists), (ITINERARIES, itineraries)):
+                for name, model in models.items():
+                    self._put(kind, name, model)
+            self.loaded = True
+        return self
+
+    # ---------- Changes ----------
+    def _tracks(self, kind: str, filename: str | None) -> bool:
+        if not self.loaded:
+            return False
+        return filename is None or os.path.abspath(filename) == os.path.abspath(self.paths[kind])
+
+    def put(self, model, name: str | None = None, filename: str | None = None) -> None:
+        """Add or replace a model stored under ``name`` (its trip name by default) in ``filename``."""
+        kind = kind_of(model)
+        with self._lock:
+            if self._tracks(kind, filename):
+                self._discard(kind, name or model.trip_name)
+                self._put(kind, name or model.trip_name, model)
+
+    def discard(self, kind: str, name: str, filename: str | None = None) -> None:
+        with self._lock:
+            if self._tracks(kind, filename):
+                self._discard(kind, name)
+
+    def _put(self, kind: str, name: str, model) -> None:
+        self._models[kind][name] = model
+        for field, field_kind in INDEXED_FIELDS.items():
+            if field_kind == kind:
+                self._indexes[field].setdefault(_normalize(getattr(model, field)), set()).add(name)
+        if kind == ITINERARIES:
+            try:
+                first, last = parse_date(model.start_date), parse_date(model.end_date)
+            except ValueError:
+                return  # no usable dates, so it cannot match a date query
+            key = self._span_keys[name] = name
+            self._spans.add(first, max(first, last) + 1, key)
+
+    def _discard(self, kind: str, name: str) -> None:
+        model = self._models[kind].pop(name, None)
+        if model is None:
+            return
+        for field, field_kind in INDEXED_FIELDS.items():
+            if field_kind == kind:
+                key = _normalize(getattr(model, field))
+                names = self._indexes[field][key]
+                names.discard(name)
+                if not names:
+                    del self._indexes[field][key]
+        if kind == ITINERARIES and name in self._span_keys:
+            self._spans.remove(self._span_keys.pop(name))
+
+    # ---------- Queries ----------
+    def _ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
+
+    def get(self, name: str) -> TripEntry | None:
+        self._ensure_loaded()
+        with self._lock:
+            if not any(name in models for models in self._models.values()):
+                return None
+            return TripEntry(name, self._models[BUDGETS].get(name), self._models[PACKING_LISTS].get(name),
+                             self._models[ITINERARIES].get(name))
+
+    def names(self) -> List[str]:
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(set().union(*(models.keys() for models in self._models.values())))
+
+    def find(self, **criteria) -> List[str]:
+        """Trip names matching every ``field=value`` given (case-insensitive), sorted."""
+        unknown = set(criteria) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"not an indexed field: {', '.join(sorted(unknown))}")
+        if not criteria:
+            return self.names()
+        self._ensure_loaded()
+        with self._lock:
+            matches = sorted((self._indexes[field].get(_normalize(value), set()) for field, value in criteria.items()),
+                             key=len)
+            return sorted(matches[0].intersection(*matches[1:]))
+
+    def trips(self, **criteria) -> List[TripEntry]:
+        return [self.get(name) for name in self.find(**criteria)]
+
+    def values(self, field: str) -> List[str]:
+        """The distinct (normalized) values of an indexed field."""
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._indexes[field])
+
+    def active_on(self, day: str) -> List[str]:
+        """Names of the trips whose itinerary includes ``day`` (YYYY-MM-DD)."""
+        return self.overlapping(day, day)
+
+    def overlapping(self, start: str, end: str) -> List[str]:
+        """Names of the trips whose itinerary shares at least one day with ``[start, end]``."""
+        first, last = parse_date(start), parse_date(end)
+        if last < first:
+            raise ValueError(f"end date {end} is before start date {start}")
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._spans.overlapping(first, last + 1))
+
+
+trip_catalog = TripCatalog()
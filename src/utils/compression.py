@@ -0,0 +1,70 @@
+import gzip
+import io
+import lzma
+from contextlib import contextmanager
+from typing import Dict
+
+from src.utils.atomic import atomic_open
+
+GZIP = "gzip"
+XZ = "xz"
+
+# default level per codec; change these (or pass level=) to trade CPU for size
+COMPRESSION_LEVELS: Dict[str, int] = {GZIP: 6, XZ: 6}
+
+_EXTENSIONS = {".gz": GZIP, ".xz": XZ}
+_MAGIC = {GZIP: b"\x1f\x8b", XZ: b"\xfd7zXZ\x00"}
+
+
+def codec_for_path(path: str) -> str | None:
+    """Codec chosen by file extension when writing, e.g. ``budgets.json.gz``."""
+    for extension, codec in _EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return codec
+    return None
+
+
+def detect_codec(path: str) -> str | None:
+    """Codec of an existing file, from its magic bytes rather than its name."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for codec, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def _compressed_binary(raw, codec: str, mode: str, level: int | None = None):
+    if codec == GZIP:
+        return gzip.GzipFile(fileobj=raw, mode=mode,
+                             compresslevel=COMPRESSION_LEVELS[GZIP] if level is None else level)
+    if mode.startswith("w"):
+        return lzma.LZMAFile(raw, mode=mode, preset=COMPRESSION_LEVELS[XZ] if level is None else level)
+    return lzma.LZMAFile(raw, mode=mode)
+
+
+@contextmanager
+def open_text_read(path: str):
+    """Open a datafile for reading as text, decompressing on the fly if needed."""
+    codec = detect_codec(path)
+    if codec is None:
+        with open(path, "r", encoding="utf-8") as f:
+            yield f
+        return
+    with open(path, "rb") as raw, _compressed_binary(raw, codec, "rb") as binary, \
+            io.TextIOWrapper(binary, encoding="utf-8") as f:
+        yield f
+
+
+@contextmanager
+def open_text_write(path: str, level: int | None = None):
+    """Atomically write a datafile as text, compressing on the fly if its extension asks for it."""
+    codec = codec_for_path(path)
+    if codec is None:
+        with atomic_open(path) as f:
+            yield f
+        return
+    with atomic_open(path, "wb") as raw:
+        with _compressed_binary(raw, codec, "wb", level) as binary, \
+                io.TextIOWrapper(binary, encoding="utf-8") as f:
+            yield f
@@ -0,0 +1,70 @@
+"""Currency conversion from a local rate table.
+
+``src/datafiles/rates.json`` gives the value of one unit of each currency in a
+base currency. It is read once into a ``RateTable`` (cached until the file
+changes), and amounts are converted as whole NumPy vectors: one multiply per
+batch, whatever mix of currencies the batch holds.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+RATES_FILE = "src/datafiles/rates.json"
+
+
+class RateTable:
+    """Exchange rates as an array indexed by currency code position."""
+
+    def __init__(self, base: str, rates: Dict[str, float]):
+        if rates.get(base) != 1:
+            raise ValueError(f"base currency {base!r} must have a rate of 1")
+        self.base = base
+        self.codes: List[str] = list(rates)
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self.to_base = np.array([float(rates[code]) for code in self.codes], dtype=np.float64)
+
+    def _position(self, currency: str) -> int:
+        try:
+            return self.index[currency]
+        except KeyError:
+            raise ValueError(f"no exchange rate for currency {currency!r}") from None
+
+    def positions(self, currencies: Iterable[str]) -> np.ndarray:
+        """Rate-table positions of ``currencies``, for ``convert_many``."""
+        return np.array([self._position(c) for c in currencies], dtype=np.intp)
+
+    def rate(self, source: str, target: str) -> float:
+        """How many ``target`` units one ``source`` unit is worth."""
+        return float(self.to_base[self._position(source)] / self.to_base[self._position(target)])
+
+    def convert(self, cents: int, source: str, target: str) -> int:
+        """Convert one amount in cents, rounded to the nearest cent."""
+        return int(np.rint(cents * self.rate(source, target)))
+
+    def convert_many(self, cents: np.ndarray, positions: np.ndarray, target: str) -> np.ndarray:
+        """Convert amounts in cents to ``target`` cents in one pass.
+
+        ``positions[i]`` is the rate-table position of the currency of row ``i`` of
+        ``cents`` (see ``positions``); ``cents`` may be a vector or a trips x
+        categories matrix.
+        """
+        factors = self.to_base[positions] / self.to_base[self._position(target)]
+        if cents.ndim == 2:
+            factors = factors[:, None]
+        return np.rint(cents * factors).astype(np.int64)
+
+
+@lru_cache(maxsize=8)
+def _load(path: str, signature: tuple) -> RateTable:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return RateTable(data["base"], data["rates"])
+
+
+def load_rates(path: str = RATES_FILE) -> RateTable:
+    """The rate table in ``path``, parsed again only after the file changes."""
+    st = os.stat(path)
+    return _load(os.path.abspath(path), (st.st_mtime_ns, st.st_size))
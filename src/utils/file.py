@@ -1,76 +1,213 @@
-import json
-import os
-from typing import Dict
+from typing import Dict, Iterable, Iterator, Tuple
 from src.modules.budget import Budget
 from src.modules.package import PackingList
-from src.modules.itinerary import Itinerary
-
-def load_budgets(filename: str = "src/datafiles/budgets.json") -> Dict[str, Budget]:
-    if not os.path.exists(filename):
-        return {}
-
-    with open(filename, "r") as f:
-        raw_data = json.load(f)
+from src.modules.itinerary import Itinerary, ItineraryHeader
+from src.utils.cache import records_cache
+from src.utils.journal import Journal
+from src.utils.storage import open_storage, BUDGETS, PACKING_LISTS, ITINERARIES
+
+# Datafiles ending in .db/.sqlite/.sqlite3 are stored in SQLite, .tpb in the compact binary
+# format (see utils/binfmt.py), directories as one shard per trip, everything else as JSON
+# (compressed when the name ends in .gz/.xz, see utils/compression.py).
+BUDGETS_FILE = "src/datafiles/budgets.json"
+PACKING_LISTS_FILE = "src/datafiles/packing_lists.json"
+ITINERARIES_FILE = "src/datafiles/itineraries.json"
+
+
+def _load_records(filename: str, kind: str) -> Dict[str, dict]:
+    """Serialized records of a datafile, re-read only when the file changed on disk."""
+    return records_cache.get(filename, kind, lambda: open_storage(filename).load(kind))
+
+def cache_records(filename: str, kind: str) -> None:
+    """Read a datafile's records into the record cache without building any trip objects."""
+    _load_records(filename, kind)
+
+def _save_records(filename: str, kind: str, records: Dict[str, dict]) -> None:
+    open_storage(filename).save(kind, records)
+    records_cache.store(filename, kind, records)
+
+def _upsert_record(filename: str, kind: str, name: str, record: dict | None) -> bool:
+    """Write one record (or delete it when ``record`` is None), keeping the cache in sync."""
+    engine = open_storage(filename)
+    if record is None:
+        found = engine.delete(kind, name)
+    else:
+        engine.upsert(kind, name, record)
+        found = True
+    records_cache.update(filename, kind, name, record)
+    records_cache.refresh(filename, kind)
+    return found
+
+
+def load_budgets(filename: str = BUDGETS_FILE) -> Dict[str, Budget]:
+    raw_data = _load_records(filename, BUDGETS)
 
     return {
         trip_name: Budget.from_dict(trip_name, data)
         for trip_name, data in raw_data.items()
     }
 
-def save_budgets(budgets: Dict[str, Budget], filename: str = "src/datafiles/budgets.json") -> None:
-    """Serialize Budget objects and save to JSON."""
+def apply_budget_record(budgets: Dict[str, Budget], record: dict) -> None:
+    """Replay one BudgetController journal record onto a dict of budgets."""
+    op = record["op"]
+    trip_name = record["trip"]
+    if op == "add_trip":
+        budgets[trip_name] = Budget(trip_name=trip_name, total_budget=0,
+                                    currency=record.get("currency", "RM"), categories={})
+        return
+    if op == "delete_trip":
+        budgets.pop(trip_name, None)
+        return
+    budget = budgets.get(trip_name)
+    if budget is None:
+        return  # the trip was removed from the snapshot by another writer
+    if op == "update_total":
+        budget.total_budget = record["total"]
+    elif op == "set_category":
+        budget.set_category(record["category"], record["amount"])
+    elif op == "delete_category" and record["category"] in budget.category_cents:
+        budget.delete_category(record["category"])
+
+def load_budgets_journaled(filename: str = BUDGETS_FILE) -> Dict[str, Budget]:
+    """Budgets as BudgetController sees them: the snapshot plus its unfolded journal."""
+    return Journal(filename).replay(load_budgets(filename), apply_budget_record)
+
+def save_budgets(budgets: Dict[str, Budget], filename: str = BUDGETS_FILE) -> None:
+    """Serialize Budget objects and save them all."""
     serializable = {trip_name: budget.to_dict() for trip_name, budget in budgets.items()}
+    _save_records(filename, BUDGETS, serializable)
+
+def iter_budgets(filename: str = BUDGETS_FILE) -> Iterator[Tuple[str, Budget]]:
+    """Yield budgets one at a time instead of loading the whole datafile.
+
+    While the journal holds changes not folded into the snapshot yet, the budgets
+    have to be replayed as a whole first, so they are yielded from that.
+    """
+    if Journal(filename).exists():
+        yield from load_budgets_journaled(filename).items()
+        return
+    for trip_name, data in open_storage(filename).iter_records(BUDGETS):
+        yield trip_name, Budget.from_dict(trip_name, data)
 
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+def save_budgets_stream(budgets: Iterable[Tuple[str, Budget]], filename: str = BUDGETS_FILE) -> None:
+    """Write ``(trip_name, budget)`` pairs as they are produced, replacing snapshot and journal."""
+    Journal(filename).compact(lambda: open_storage(filename).save_stream(
+        BUDGETS, ((name, budget.to_dict()) for name, budget in budgets)))
+    records_cache.invalidate(filename, BUDGETS)
 
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(serializable, f, indent=4)
+def upsert_budget(budget: Budget, filename: str = BUDGETS_FILE) -> None:
+    """Insert or replace a single budget."""
+    _upsert_record(filename, BUDGETS, budget.trip_name, budget.to_dict())
 
+def delete_budget(trip_name: str, filename: str = BUDGETS_FILE) -> bool:
+    return _upsert_record(filename, BUDGETS, trip_name, None)
 
-def load_packing_lists(filename: str = "src/datafiles/packing_lists.json") -> Dict[str, PackingList]:
-    """Load packing lists from JSON file."""
-    if not os.path.exists(filename):
-        return {}
 
-    with open(filename, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
+def load_packing_lists(filename: str = PACKING_LISTS_FILE) -> Dict[str, PackingList]:
+    """Load packing lists from the datafile."""
+    raw_data = _load_records(filename, PACKING_LISTS)
 
     return {
         list_name: PackingList.from_dict(data)
         for list_name, data in raw_data.items()
     }
 
-def save_packing_lists(packing_lists: Dict[str, PackingList], filename: str = "src/datafiles/packing_lists.json") -> None:
-    """Serialize PackingList objects and save to JSON."""
+def load_packing_list(list_name: str, filename: str = PACKING_LISTS_FILE) -> PackingList | None:
+    """Load a single packing list."""
+    data = _load_records(filename, PACKING_LISTS).get(list_name)
+    return PackingList.from_dict(data) if data is not None else None
+
+def save_packing_lists(packing_lists: Dict[str, PackingList], filename: str = PACKING_LISTS_FILE) -> None:
+    """Serialize PackingList objects and save them all."""
     serializable = {list_name: packing_list.to_dict() for list_name, packing_list in packing_lists.items()}
+    _save_records(filename, PACKING_LISTS, serializable)
+
+def iter_packing_lists(filename: str = PACKING_LISTS_FILE) -> Iterator[Tuple[str, PackingList]]:
+    """Yield packing lists one at a time instead of loading the whole datafile."""
+    for list_name, data in open_storage(filename).iter_records(PACKING_LISTS):
+        yield list_name, PackingList.from_dict(data)
 
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+def save_packing_lists_stream(packing_lists: Iterable[Tuple[str, PackingList]],
+                              filename: str = PACKING_LISTS_FILE) -> None:
+    """Write ``(list_name, packing_list)`` pairs as they are produced."""
+    open_storage(filename).save_stream(
+        PACKING_LISTS, ((name, packing_list.to_dict()) for name, packing_list in packing_lists))
+    records_cache.invalidate(filename, PACKING_LISTS)
 
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(serializable, f, indent=4, ensure_ascii=False)
+def upsert_packing_list(packing_list: PackingList, filename: str = PACKING_LISTS_FILE) -> None:
+    """Insert or replace a single packing list."""
+    _upsert_record(filename, PACKING_LISTS, packing_list.trip_name, packing_list.to_dict())
 
+def delete_packing_list(list_name: str, filename: str = PACKING_LISTS_FILE) -> bool:
+    return _upsert_record(filename, PACKING_LISTS, list_name, None)
 
-def load_itineraries(filename: str = "src/datafiles/itineraries.json") -> Dict[str, Itinerary]:
-    """Load itineraries (with activities) from JSON file."""
-    if not os.path.exists(filename):
-        return {}
 
-    with open(filename, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def load_itineraries(filename: str = ITINERARIES_FILE) -> Dict[str, Itinerary]:
+    """Load itineraries (with activities) from the datafile."""
+    data = _load_records(filename, ITINERARIES)
 
     return {
         list_name: Itinerary.from_dict(data)
         for list_name, data in data.items()
     }
 
-def save_itineraries(itineraries: Dict[str, Itinerary], filename: str = "src/datafiles/itineraries.json") -> None:
-    """Serialize Itinerary objects (including activities) and save to JSON."""
+def load_itinerary(list_name: str, filename: str = ITINERARIES_FILE) -> Itinerary | None:
+    """Load a single itinerary with its activities."""
+    data = open_storage(filename).load_one(ITINERARIES, list_name)
+    return Itinerary.from_dict(data) if data is not None else None
+
+def load_itinerary_headers(filename: str = ITINERARIES_FILE) -> Dict[str, ItineraryHeader]:
+    """Load trip details only; activities are built when a header is materialized.
+
+    Records already in the cache are reused. Otherwise the engine reads headers only:
+    SQLite counts activity rows and JSON files step over each activity list without
+    decoding it. The other engines return whole records.
+    """
+    records = records_cache.peek(filename, ITINERARIES)
+    if records is None:
+        records = open_storage(filename).load_headers(ITINERARIES)
+    headers = {}
+    for list_name, data in records.items():
+        if "activities" in data:
+            # the engine had to read the activities anyway, keep the raw dicts until needed
+            count = len(data["activities"])
+            loader = lambda data=data: Itinerary.from_dict(data)
+        else:
+            count = data.get("activity_count", 0)
+            loader = lambda list_name=list_name: load_itinerary(list_name, filename)
+        headers[list_name] = ItineraryHeader(
+            trip_name=data["trip_name"],
+            location=data["location"],
+            start_date=data["start_date"],
+            end_date=data["end_date"],
+            trip_type=data["trip_type"],
+            activity_count=count,
+            loader=loader
+        )
+    return headers
+
+def save_itineraries(itineraries: Dict[str, Itinerary], filename: str = ITINERARIES_FILE) -> None:
+    """Serialize Itinerary objects (including activities) and save them all."""
     serializable = {
         list_name: itinerary.to_dict()
         for list_name, itinerary in itineraries.items()
     }
+    _save_records(filename, ITINERARIES, serializable)
+
+def iter_itineraries(filename: str = ITINERARIES_FILE) -> Iterator[Tuple[str, Itinerary]]:
+    """Yield itineraries one at a time instead of loading the whole datafile."""
+    for list_name, data in open_storage(filename).iter_records(ITINERARIES):
+        yield list_name, Itinerary.from_dict(data)
+
+def save_itineraries_stream(itineraries: Iterable[Tuple[str, Itinerary]], filename: str = ITINERARIES_FILE) -> None:
+    """Write ``(list_name, itinerary)`` pairs as they are produced."""
+    open_storage(filename).save_stream(
+        ITINERARIES, ((name, itinerary.to_dict()) for name, itinerary in itineraries))
+    records_cache.invalidate(filename, ITINERARIES)
 
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+def upsert_itinerary(list_name: str, itinerary: Itinerary, filename: str = ITINERARIES_FILE) -> None:
+    """Insert or replace a single itinerary under ``list_name``."""
+    _upsert_record(filename, ITINERARIES, list_name, itinerary.to_dict())
 
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(serializable, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+def delete_itinerary(list_name: str, filename: str = ITINERARIES_FILE) -> bool:
+    return _upsert_record(filename, ITINERARIES, list_name, None)
@@ -0,0 +1,166 @@
+"""Undo/redo over budgets, packing lists and itineraries.
+
+A ``Snapshot`` is an immutable copy of a model: its plain fields in a tuple and
+its collection (budget categories, packing items or activities) in a ``PList``.
+Recording a new state compares it with the last snapshot and splices only the
+changed run into that snapshot's list, so consecutive snapshots share every
+untouched element and tree node and each step costs memory in proportion to
+what changed, not to the size of the trip.
+
+``record`` is linear in the size of the trip, since it scans the model to find
+the changed run. ``undo``/``redo`` only move the cursor and hand back the stored
+snapshot; an editor reads what it needs from it (the itinerary editor takes the
+activities straight from ``entries``) or builds a whole new model with
+``Snapshot.restore`` when it wants one.
+"""
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Sequence
+
+from src.modules.budget import Budget, from_cents
+from src.modules.itinerary import Itinerary
+from src.modules.package import PackingItem, PackingList
+from src.utils.persistent import PList
+
+
+@dataclass(frozen=True)
+class _Layout:
+    """How to take a kind of model apart into (fields, entries) and put it back together."""
+    model_type: type
+    fields: Callable[[object], tuple]
+    entries: Callable[[object], Iterable]
+    build: Callable[[tuple, Iterable], object]
+
+
+def _build_budget(fields: tuple, categories: Iterable) -> Budget:
+    trip_name, total_cents, currency = fields
+    return Budget(trip_name, from_cents(total_cents), currency,
+                  {category: from_cents(cents) for category, cents in categories})
+
+
+def _build_packing_list(fields: tuple, items: Iterable) -> PackingList:
+    return PackingList(*fields, items=[PackingItem(*item) for item in items])
+
+
+_LAYOUTS = (
+    _Layout(Budget,
+            lambda b: (b.trip_name, b.total_cents, b.currency),
+            lambda b: b.category_cents.items(),
+            _build_budget),
+    # packing items are changed in place by the editor, so keep them as tuples
+    _Layout(PackingList,
+            lambda p: (p.trip_name, p.destination_type, p.duration, p.weather, p.travelers),
+            lambda p: ((i.name, i.category, i.is_packed, i.quantity) for i in p.items),
+            _build_packing_list),
+    # activities are replaced, never changed in place, so the objects themselves are shared
+    _Layout(Itinerary,
+            lambda i: (i.trip_name, i.location, i.start_date, i.end_date, i.trip_type),
+            lambda i: i.activities,
+            lambda fields, activities: Itinerary(*fields, activities=list(activities))),
+)
+
+
+def _layout_of(model) -> _Layout:
+    for layout in _LAYOUTS:
+        if isinstance(model, layout.model_type):
+            return layout
+    raise TypeError(f"no history for {type(model).__name__}")
+
+
+def _changed(previous: PList, current: Sequence) -> PList:
+    """``previous`` with the run that differs from ``current`` spliced in (``previous`` if equal)."""
+    n, m = len(previous), len(current)
+    prefix = 0
+    for old, new in zip(previous, current):
+        if not (old is new or old == new):
+            break
+        prefix += 1
+    if prefix == n == m:
+        return previous
+    suffix = 0
+    limit = min(n, m) - prefix
+    for old, new in zip(reversed(previous), reversed(current)):
+        if suffix == limit or not (old is new or old == new):
+            break
+        suffix += 1
+    return previous.splice(prefix, n - suffix, current[prefix:m - suffix])
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    layout: _Layout
+    fields: tuple
+    entries: PList
+
+    @classmethod
+    def capture(cls, model, previous: "Snapshot | None" = None) -> "Snapshot":
+        """Snapshot ``model``, sharing whatever did not change since ``previous``."""
+        layout = _layout_of(model)
+        entries = list(layout.entries(model))
+        if previous is not None and previous.layout is layout:
+            return cls(layout, layout.fields(model), _changed(previous.entries, entries))
+        return cls(layout, layout.fields(model), PList(entries))
+
+    def restore(self):
+        """A new model equal to the one captured, built in O(n)."""
+        return self.layout.build(self.fields, self.entries)
+
+
+class History:
+    """Snapshots of one model, with a cursor for undo and redo.
+
+    Editors call ``record`` after each change; recording after an undo drops
+    the redo states, as usual. At most ``limit`` states are kept.
+    """
+
+    def __init__(self, model=None, limit: int = 100):
+        self.limit = limit
+        self.reset(model)
+
+    def reset(self, model=None) -> None:
+        """Forget every state and start again from ``model`` (if given)."""
+        self._snapshots: List[Snapshot] = []
+        self._cursor = -1
+        if model is not None:
+            self.record(model)
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    @property
+    def current(self) -> Snapshot | None:
+        return self._snapshots[self._cursor] if self._snapshots else None
+
+    @property
+    def can_undo(self) -> bool:
+        return self._cursor > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._cursor < len(self._snapshots) - 1
+
+    def record(self, model) -> bool:
+        """Add the state of ``model``; False if nothing changed since the current state."""
+        current = self.current
+        snapshot = Snapshot.capture(model, current)
+        if current is not None and snapshot.fields == current.fields and snapshot.entries is current.entries:
+            return False
+        del self._snapshots[self._cursor + 1:]
+        self._snapshots.append(snapshot)
+        if len(self._snapshots) > self.limit:
+            del self._snapshots[0]
+        self._cursor = len(self._snapshots) - 1
+        return True
+
+    def undo(self) -> Snapshot | None:
+        """The previous state, or None if there is none; O(1), nothing is rebuilt."""
+        if not self.can_undo:
+            return None
+        self._cursor -= 1
+        return self._snapshots[self._cursor]
+
+    def redo(self) -> Snapshot | None:
+        """The state undone last, or None if there is none; O(1), nothing is rebuilt."""
+        if not self.can_redo:
+            return None
+        self._cursor += 1
+        return self._snapshots[self._cursor]
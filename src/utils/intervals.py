@@ -0,0 +1,165 @@
+"""Interval index for half-open ``[start, end)`` ranges of integers.
+
+A treap ordered by ``(start, end)`` where every node also keeps the largest end
+in its subtree, so a subtree that ends before the query starts is skipped
+whole. ``overlapping`` costs O(log n + k) expected for k results; inserts and
+removals are O(log n) expected. An empty range ``[t, t)`` is treated as
+``[t, t + 1)``, so a zero-length activity still collides with one running at t.
+"""
+import heapq
+import random
+from typing import Generic, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Node:
+    __slots__ = ("key", "value", "priority", "max_end", "left", "right")
+
+    def __init__(self, key: tuple, value, priority: float):
+        self.key = key  # (start, end, sequence)
+        self.value = value
+        self.priority = priority
+        self.max_end = key[1]
+        self.left = self.right = None
+
+    def update(self) -> None:
+        m = self.key[1]
+        if self.left is not None and self.left.max_end > m:
+            m = self.left.max_end
+        if self.right is not None and self.right.max_end > m:
+            m = self.right.max_end
+        self.max_end = m
+
+
+def _rotate_right(node: _Node) -> _Node:
+    top = node.left
+    node.left, top.right = top.right, node
+    node.update()
+    top.update()
+    return top
+
+
+def _rotate_left(node: _Node) -> _Node:
+    top = node.right
+    node.right, top.left = top.left, node
+    node.update()
+    top.update()
+    return top
+
+
+class IntervalIndex(Generic[T]):
+    """Values stored under ``[start, end)`` ranges, queried by overlap.
+
+    Values are told apart by identity, so the same range may hold several values.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, T]] = (), seed: int | None = None):
+        self._root: _Node | None = None
+        self._keys = {}  # id(value) -> key, to find a value's node on removal
+        self._sequence = 0
+        self._random = random.Random(seed)
+        for start, end, value in intervals:
+            self.add(start, end, value)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, value) -> bool:
+        return id(value) in self._keys
+
+    def add(self, start: int, end: int, value: T) -> None:
+        if end < start:
+            raise ValueError(f"interval ends before it starts: [{start}, {end})")
+        if id(value) in self._keys:
+            raise ValueError("value is already in the index")
+        key = (start, _end(start, end), self._sequence)
+        self._sequence += 1
+        self._keys[id(value)] = key
+        self._root = self._insert(self._root, _Node(key, value, self._random.random()))
+
+    def _insert(self, node: _Node | None, new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                return _rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                return _rotate_left(node)
+        node.update()
+        return node
+
+    def remove(self, value: T) -> bool:
+        key = self._keys.pop(id(value), None)
+        if key is None:
+            return False
+        self._root = self._delete(self._root, key)
+        return True
+
+    def _delete(self, node: _Node | None, key: tuple) -> _Node | None:
+        if node is None:
+            return None
+        if key < node.key:
+            node.left = self._delete(node.left, key)
+        elif key > node.key:
+            node.right = self._delete(node.right, key)
+        elif node.left is None:
+            return node.right
+        elif node.right is None:
+            return node.left
+        elif node.left.priority > node.right.priority:
+            node = _rotate_right(node)
+            node.right = self._delete(node.right, key)
+        else:
+            node = _rotate_left(node)
+            node.left = self._delete(node.left, key)
+        node.update()
+        return node
+
+    def overlapping(self, start: int, end: int) -> List[T]:
+        """Values whose range overlaps ``[start, end)``, in ``(start, end)`` order."""
+        found: List[T] = []
+        self._collect(self._root, start, _end(start, end), found)
+        return found
+
+    def _collect(self, node: _Node | None, start: int, end: int, found: List[T]) -> None:
+        if node is None or node.max_end <= start:
+            return  # everything below ends before the query begins
+        self._collect(node.left, start, end, found)
+        node_start, node_end, _ = node.key
+        if node_start >= end:
+            return  # this node and its right subtree start after the query ends
+        if node_end > start:
+            found.append(node.value)
+        self._collect(node.right, start, end, found)
+
+    def __iter__(self) -> Iterator[T]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.value
+            node = node.right
+
+
+def _end(start: int, end: int) -> int:
+    return end if end > start else start + 1
+
+
+def overlapping_pairs(intervals: Iterable[Tuple[int, int, T]]) -> List[Tuple[T, T]]:
+    """Every pair of overlapping intervals, by a sweep over the starts: O(n log n + k)."""
+    ordered = sorted(((start, _end(start, end), value) for start, end, value in intervals),
+                     key=lambda interval: (interval[0], interval[1]))
+    active: List[Tuple[int, int, T]] = []  # heap of (end, order, value) still running
+    pairs: List[Tuple[T, T]] = []
+    for order, (start, end, value) in enumerate(ordered):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        pairs.extend((other, value) for _, _, other in active)
+        heapq.heappush(active, (end, order, value))
+    return pairs
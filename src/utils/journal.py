@@ -0,0 +1,65 @@
+import json
+import os
+from typing import Callable, Dict, Iterator
+
+
+class Journal:
+    """Append-only change log kept next to a snapshot datafile.
+
+    Each mutation is written as one JSON line, so recording a change costs a few
+    bytes no matter how large the snapshot is. On load the snapshot is read once
+    and the journal is replayed on top of it; once the journal grows past
+    ``compact_every`` records it is folded back into the snapshot and truncated.
+    """
+
+    def __init__(self, snapshot_path: str, compact_every: int = 200):
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path.rstrip("/" + os.sep) + ".journal"
+        self.compact_every = compact_every
+        self.pending = 0
+
+    def append(self, op: str, **fields) -> None:
+        """Write one mutation record and flush it to disk."""
+        record = {"op": op, **fields}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def records(self) -> Iterator[dict]:
+        """Yield journal records in the order they were written."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # a torn last line from a crash mid-append; everything before it is valid
+                    return
+
+    def replay(self, state: Dict, apply: Callable[[Dict, dict], None]) -> Dict:
+        """Apply every journal record to ``state`` and return it."""
+        self.pending = 0
+        for record in self.records():
+            apply(state, record)
+            self.pending += 1
+        return state
+
+    def needs_compaction(self) -> bool:
+        return self.pending >= self.compact_every
+
+    def compact(self, write_snapshot: Callable[[], None]) -> None:
+        """Write the full snapshot, then drop the records it now contains."""
+        write_snapshot()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.pending = 0
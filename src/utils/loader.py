@@ -0,0 +1,55 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+from src.utils.file import (cache_records, load_budgets_journaled, BUDGETS_FILE, PACKING_LISTS_FILE,
+                            ITINERARIES_FILE)
+from src.utils.storage import PACKING_LISTS, ITINERARIES
+
+# one worker per store, so all three can be read at the same time
+_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="datafile-loader")
+
+
+def load_async(load: Callable, *args) -> Future:
+    """Run a loader on the worker pool and return its Future."""
+    return _executor.submit(load, *args)
+
+
+def prefetch_all(budgets_file: str = BUDGETS_FILE, packing_lists_file: str = PACKING_LISTS_FILE,
+                 itineraries_file: str = ITINERARIES_FILE) -> Dict[str, Future]:
+    """Start reading all three stores in parallel.
+
+    Packing lists and itineraries are only parsed into the record cache, so the
+    windows opened afterwards build just the objects they show. Budgets are read
+    with their journal replayed, the way BudgetController and the catalog see them.
+    """
+    return {
+        "budgets": load_async(load_budgets_journaled, budgets_file),
+        "packing_lists": load_async(cache_records, packing_lists_file, PACKING_LISTS),
+        "itineraries": load_async(cache_records, itineraries_file, ITINERARIES),
+    }
+
+
+def poll_future(widget, future: Future, on_done: Callable, on_error: Callable = None, interval_ms: int = 50) -> None:
+    """Call ``on_done(result)`` on the Tk thread once ``future`` finishes.
+
+    Tk widgets may only be touched from the thread running mainloop, so instead of
+    a callback from the worker the widget checks the future with ``after()``.
+    """
+    def check():
+        try:
+            if not widget.winfo_exists():
+                return
+        except Exception:
+            return  # the window was destroyed while loading
+        if not future.done():
+            widget.after(interval_ms, check)
+            return
+        error = future.exception()
+        if error is None:
+            on_done(future.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            raise error
+
+    widget.after(0, check)
@@ -0,0 +1,190 @@
+"""Persistent (immutable) lists for snapshots.
+
+``PList`` is an implicit treap: a balanced tree ordered by position, where each
+node knows the size of its subtree. Nodes are never changed after they are
+built, so every "change" (``set``, ``insert``, ``delete``, ``splice``) returns a
+new list that shares all untouched nodes with the old one and copies only the
+O(log n) nodes on the path to the change. The old list stays valid and
+unchanged, which is what the undo history relies on.
+"""
+import random
+from collections.abc import Sequence
+from typing import Generic, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+_random = random.Random()
+
+
+class _Node:
+    __slots__ = ("value", "priority", "size", "left", "right")
+
+    def __init__(self, value, priority: float, left: "_Node | None", right: "_Node | None"):
+        self.value = value
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.size = 1 + _size(left) + _size(right)
+
+
+def _size(node: _Node | None) -> int:
+    return node.size if node is not None else 0
+
+
+def _split(node: _Node | None, k: int):
+    """(first k values, the rest); copies only the nodes on the way down."""
+    if node is None:
+        return None, None
+    left_size = _size(node.left)
+    if k <= left_size:
+        first, rest = _split(node.left, k)
+        return first, _Node(node.value, node.priority, rest, node.right)
+    first, rest = _split(node.right, k - left_size - 1)
+    return _Node(node.value, node.priority, node.left, first), rest
+
+
+def _merge(a: _Node | None, b: _Node | None) -> _Node | None:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        return _Node(a.value, a.priority, a.left, _merge(a.right, b))
+    return _Node(b.value, b.priority, _merge(a, b.left), b.right)
+
+
+def _set(node: _Node, i: int, value) -> _Node:
+    left_size = _size(node.left)
+    if i < left_size:
+        return _Node(node.value, node.priority, _set(node.left, i, value), node.right)
+    if i > left_size:
+        return _Node(node.value, node.priority, node.left, _set(node.right, i - left_size - 1, value))
+    return _Node(value, node.priority, node.left, node.right)
+
+
+def _build(values: Sequence, lo: int, hi: int) -> _Node | None:
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    return _Node(values[mid], 0.0, _build(values, lo, mid), _build(values, mid + 1, hi))
+
+
+def _tree(values: Sequence) -> _Node | None:
+    """A perfectly balanced tree over ``values`` in O(n)."""
+    root = _build(values, 0, len(values))
+    # hand out random priorities largest first in level order, so every parent
+    # outranks its children and later inserts balance like in any treap
+    priorities = iter(sorted((_random.random() for _ in range(len(values))), reverse=True))
+    level = [root] if root is not None else []
+    while level:
+        below = []
+        for node in level:
+            node.priority = next(priorities)
+            if node.left is not None:
+                below.append(node.left)
+            if node.right is not None:
+                below.append(node.right)
+        level = below
+    return root
+
+
+class PList(Sequence, Generic[T]):
+    """An immutable list whose updates share structure with the list they came from."""
+    __slots__ = ("_root",)
+
+    def __init__(self, values: Iterable[T] = ()):
+        self._root = _tree(values if isinstance(values, (list, tuple)) else list(values))
+
+    @classmethod
+    def _wrap(cls, root: _Node | None) -> "PList[T]":
+        plist = cls.__new__(cls)
+        plist._root = root
+        return plist
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def _index(self, i: int) -> int:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("PList index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return PList(list(self)[i])
+            if stop <= start:
+                return PList()
+            middle, _ = _split(_split(self._root, start)[1], stop - start)
+            return self._wrap(middle)
+        i = self._index(i)
+        node = self._root
+        while True:
+            left_size = _size(node.left)
+            if i < left_size:
+                node = node.left
+            elif i > left_size:
+                i -= left_size + 1
+                node = node.right
+            else:
+                return node.value
+
+    def __iter__(self) -> Iterator[T]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.value
+            node = node.right
+
+    def __reversed__(self) -> Iterator[T]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.value
+            node = node.left
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PList):
+            return self._root is other._root or (len(self) == len(other) and all(
+                a is b or a == b for a, b in zip(self, other)))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PList({list(self)!r})"
+
+    # ---------- Updates (each returns a new list) ----------
+    def set(self, i: int, value: T) -> "PList[T]":
+        return self._wrap(_set(self._root, self._index(i), value))
+
+    def insert(self, i: int, value: T) -> "PList[T]":
+        first, rest = _split(self._root, max(0, min(i, len(self))))
+        return self._wrap(_merge(_merge(first, _Node(value, _random.random(), None, None)), rest))
+
+    def append(self, value: T) -> "PList[T]":
+        return self.insert(len(self), value)
+
+    def delete(self, i: int) -> "PList[T]":
+        i = self._index(i)
+        first, rest = _split(self._root, i)
+        return self._wrap(_merge(first, _split(rest, 1)[1]))
+
+    def splice(self, start: int, stop: int, values: Sequence[T] = ()) -> "PList[T]":
+        """A list with ``self[start:stop]`` replaced by ``values``."""
+        first, rest = _split(self._root, start)
+        _, rest = _split(rest, stop - start)
+        return self._wrap(_merge(_merge(first, _tree(values)), rest))
+
+    def tolist(self) -> List[T]:
+        return list(self)
@@ -0,0 +1,253 @@
+import json
+import os
+import uuid
+from typing import Dict, List, Tuple
+
+from src.modules.budget import Budget
+from src.modules.itinerary import Itinerary
+from src.modules.package import PackingList
+from src.utils.atomic import atomic_open, file_mode
+from src.utils.cache import records_cache
+from src.utils.catalog import kind_of, trip_catalog
+from src.utils.file import BUDGETS_FILE, PACKING_LISTS_FILE, ITINERARIES_FILE, load_budgets_journaled
+from src.utils.journal import Journal
+from src.utils.search import search_index_for
+from src.utils.storage import open_storage, ShardedStorage, BUDGETS, PACKING_LISTS, ITINERARIES, KINDS
+from src.utils.writebehind import flush_savers
+
+COMMIT_LOG = ".trip-repository.commit"
+
+
+def _from_record(kind: str, name: str, data: dict):
+    if kind == BUDGETS:
+        return Budget.from_dict(name, data)
+    if kind == PACKING_LISTS:
+        return PackingList.from_dict(data)
+    return Itinerary.from_dict(data)
+
+
+def recover(directory: str) -> bool:
+    """Finish a commit that was interrupted after its commit log was written.
+
+    Returns True if there was one to finish.
+    """
+    log_path = os.path.join(directory, COMMIT_LOG)
+    if not os.path.exists(log_path):
+        return False
+    with open(log_path, "r", encoding="utf-8") as f:
+        log = json.load(f)
+    for staged, target in log["replace"]:
+        if os.path.exists(staged):
+            os.replace(staged, target)
+    for path in log["remove"]:
+        if os.path.exists(path):
+            os.remove(path)
+    os.remove(log_path)
+    return True
+
+
+class TripRepository:
+    """Unit of work over the budget, packing list and itinerary stores.
+
+    ``add``/``remove``/``delete_trip`` only record changes. ``commit`` first works
+    out which stores really change (removing a trip a store does not have is
+    dropped, so no file is created for it), then writes them all in one round:
+
+    - every changed whole-file store (JSON, compressed JSON, .tpb) is written once
+      to a staged file, and every changed sharded directory gets staged copies of
+      its new shards and manifest. Then a commit log is fsynced and every staged
+      file is moved into place. A crash after the log is written is rolled forward
+      by ``recover`` the next time a repository is opened; a crash before it
+      leaves the old files untouched.
+    - the kinds kept in one SQLite database are changed in a single transaction.
+
+    A database transaction cannot share a commit log, so a commit whose changes
+    span a database and anything else (say a JSON budgets file and an itineraries
+    database) raises ValueError before writing anything. There is no undo for a commit
+    that went through; ``rollback`` only drops changes not committed yet.
+
+    Controllers and editors with the stores open stay correct: write-behind
+    saves are flushed before the commit, the record cache and trip catalog are
+    updated after it, and BudgetController reloads when it sees its files changed.
+
+    Usage::
+
+        with TripRepository() as repo:
+            repo.delete_trip("Japan")
+    """
+
+    def __init__(self, budgets_file: str = BUDGETS_FILE, packing_lists_file: str = PACKING_LISTS_FILE,
+                 itineraries_file: str = ITINERARIES_FILE):
+        self.paths = {BUDGETS: budgets_file, PACKING_LISTS: packing_lists_file, ITINERARIES: itineraries_file}
+        self._changes: Dict[str, Dict[str, dict | None]] = {kind: {} for kind in KINDS}
+        for directory in {os.path.dirname(os.path.abspath(path)) for path in self.paths.values()}:
+            recover(directory)
+
+    # ---------- Recording changes ----------
+    def add(self, model, name: str | None = None) -> None:
+        """Insert or replace a Budget, PackingList or Itinerary (under ``name`` or its trip name)."""
+        self._changes[kind_of(model)][name or model.trip_name] = model.to_dict()
+
+    def remove(self, kind: str, name: str) -> None:
+        self._changes[kind][name] = None
+
+    def delete_trip(self, trip_name: str) -> None:
+        """Remove a trip's budget, packing list and itinerary."""
+        for kind in KINDS:
+            self.remove(kind, trip_name)
+
+    def get(self, kind: str, name: str):
+        """The trip as it will be after commit: pending changes first, then the store."""
+        if name in self._changes[kind]:
+            data = self._changes[kind][name]
+        elif kind == BUDGETS:
+            return load_budgets_journaled(self.paths[kind]).get(name)
+        else:
+            data = open_storage(self.paths[kind]).load_one(kind, name)
+        return _from_record(kind, name, data) if data is not None else None
+
+    @property
+    def dirty(self) -> bool:
+        return any(self._changes.values())
+
+    def rollback(self) -> None:
+        for changes in self._changes.values():
+            changes.clear()
+
+    # ---------- Commit ----------
+    def commit(self) -> None:
+        changed = {kind: changes for kind, changes in self._changes.items() if changes}
+        if not changed:
+            return
+        for kind in changed:
+            flush_savers(self.paths[kind], kind)  # queued GUI saves must not land on top of ours
+
+        # work out what really changes, without writing anything yet
+        whole_files: Dict[str, Tuple[str, Dict[str, dict]]] = {}  # path -> (kind, new records)
+        shards: Dict[str, Tuple[str, Dict[str, dict], List[str]]] = {}  # directory -> (kind, upserts, deletes)
+        batches: Dict[str, Dict[str, Tuple[Dict[str, dict], List[str]]]] = {}  # path -> apply_batch changes
+        effective: Dict[str, Dict[str, dict | None]] = {}
+        for kind, changes in changed.items():
+            path = self.paths[kind]
+            engine = open_storage(path)
+            upserts = {name: record for name, record in changes.items() if record is not None}
+            deletes = [name for name, record in changes.items() if record is None]
+            if engine.rewrites_whole_file:
+                records = self._current_records(kind, path)
+                deletes = [name for name in deletes if name in records]
+                if not upserts and not deletes:
+                    continue
+                for name in deletes:
+                    del records[name]
+                records.update(upserts)
+                whole_files[path] = (kind, records)
+            else:
+                deletes = [name for name in deletes if self._stored(engine, kind, path, name)]
+                if not upserts and not deletes:
+                    continue
+                if isinstance(engine, ShardedStorage):
+                    shards[path] = (kind, upserts, deletes)
+                else:
+                    batches.setdefault(path, {})[kind] = (upserts, deletes)
+            effective[kind] = {**upserts, **dict.fromkeys(deletes)}
+        if len(batches) + bool(whole_files or shards) > 1:
+            raise ValueError(f"changes to {', '.join(sorted([*batches, *whole_files, *shards]))} "
+                             "cannot be committed atomically together; commit them separately")
+
+        for path, kinds in batches.items():
+            if BUDGETS in kinds:
+                # fold the controller's journal in first, or replaying it would undo our changes
+                self._fold_journal(path)
+            open_storage(path).apply_batch(kinds)
+            records_cache.invalidate(path)
+        if whole_files or shards:
+            self._replace_files(whole_files, shards)
+
+        for kind, changes in effective.items():
+            for name, record in changes.items():
+                if record is None:
+                    trip_catalog.discard(kind, name, self.paths[kind])
+                else:
+                    trip_catalog.put(_from_record(kind, name, record), name, self.paths[kind])
+                if kind == ITINERARIES and search_index_for(self.paths[kind]).loaded:
+                    activities = _from_record(kind, name, record).activities if record is not None else ()
+                    search_index_for(self.paths[kind]).update_trip(name, activities)
+        self.rollback()
+
+    def _replace_files(self, whole_files: Dict[str, Tuple[str, Dict[str, dict]]],
+                       shards: Dict[str, Tuple[str, Dict[str, dict], List[str]]]) -> None:
+        for path, (kind, _, _) in shards.items():
+            if kind == BUDGETS:
+                self._fold_journal(path)  # the staged manifest is based on the stored shards
+        token = uuid.uuid4().hex[:12]
+        replace: List[Tuple[str, str]] = []
+        remove: List[str] = []
+        try:
+            for path, (kind, records) in whole_files.items():
+                staged = self._staging_path(path, token)
+                open_storage(staged).save(kind, records)
+                os.chmod(staged, file_mode(path))  # it replaces ``path``, so it takes over its permissions
+                replace.append((staged, path))
+                if kind == BUDGETS and os.path.exists(Journal(path).path):
+                    remove.append(Journal(path).path)  # folded into the new snapshot
+            for path, (kind, upserts, deletes) in shards.items():
+                moves, removals = open_storage(path).stage(kind, upserts, deletes, f".pending-{token}-")
+                replace.extend(moves)
+                remove.extend(removals)
+        except BaseException:
+            for staged, _ in replace:
+                if os.path.exists(staged):
+                    os.remove(staged)
+            raise
+
+        # next to the stores rather than inside a sharded directory, where recover() looks for it
+        directory = os.path.dirname(os.path.abspath(next(iter([*whole_files, *shards]))))
+        log = {"replace": [[os.path.abspath(s), os.path.abspath(t)] for s, t in replace],
+               "remove": [os.path.abspath(p) for p in remove]}
+        with atomic_open(os.path.join(directory, COMMIT_LOG)) as f:
+            json.dump(log, f)
+        # from here on the commit is durable; recover() finishes it after a crash
+        recover(directory)
+        for path, (kind, records) in whole_files.items():
+            records_cache.store(path, kind, records)
+        for path in shards:
+            records_cache.invalidate(path)
+
+    @staticmethod
+    def _stored(engine, kind: str, path: str, name: str) -> bool:
+        journaled = kind == BUDGETS and Journal(path).exists()
+        if not os.path.exists(path) and not journaled:
+            return False  # don't let the lookup create an empty database
+        if journaled:
+            return name in load_budgets_journaled(path)
+        return engine.load_one(kind, name) is not None
+
+    @staticmethod
+    def _fold_journal(path: str) -> None:
+        journal = Journal(path)
+        if journal.exists():
+            budgets = load_budgets_journaled(path)
+            journal.compact(lambda: open_storage(path).save(BUDGETS, {n: b.to_dict() for n, b in budgets.items()}))
+
+    def _current_records(self, kind: str, path: str) -> Dict[str, dict]:
+        if kind == BUDGETS:
+            return {name: budget.to_dict() for name, budget in load_budgets_journaled(path).items()}
+        cached = records_cache.peek(path, kind)
+        return cached if cached is not None else open_storage(path).load(kind)
+
+    @staticmethod
+    def _staging_path(path: str, token: str) -> str:
+        # same directory (so os.replace stays atomic) and same extension (so the same format)
+        directory, base = os.path.split(path)
+        return os.path.join(directory, f".pending-{token}-{base}")
+
+    # ---------- Context manager ----------
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
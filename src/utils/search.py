@@ -0,0 +1,271 @@
+"""Full-text search over itinerary activities.
+
+An inverted index maps each token of an activity's location, detail and notes
+to the activities containing it, weighted by field (a hit in the location
+counts more than one in the notes). Tokens are also kept sorted, so a query
+word matches every token it is a prefix of with two bisections. Results are
+ranked by the weighted hits times each token's inverse document frequency.
+
+The index is saved next to the datafile (``itineraries.json.search``) together
+with the datafile's (mtime, size); it is rebuilt only when that no longer
+matches. Search from the command line with::
+
+    python -m src.utils.search museum
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from src.modules.itinerary import Activity
+from src.utils.atomic import atomic_open
+from src.utils.file import ITINERARIES_FILE, iter_itineraries
+
+VERSION = 2
+EXTENSION = ".search"
+
+# field -> weight of a token found in it
+FIELD_WEIGHTS = {"location": 3, "detail": 2, "notes": 1}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def _fingerprint(activity: Activity) -> tuple:
+    return (activity.day, activity.start_minute, activity.end_minute,
+            activity.location, activity.detail, activity.notes)
+
+
+@dataclass
+class SearchHit:
+    trip_name: str
+    activity: Activity
+    score: float
+
+
+class SearchIndex:
+    """Inverted index over the activities of one itinerary datafile.
+
+    ``update_trip`` diffs a trip's activities against what is indexed and only
+    touches the postings of activities that were added or removed. Activities
+    whose stored date or time does not parse are not indexed.
+    """
+
+    def __init__(self, filename: str = ITINERARIES_FILE):
+        self.filename = filename
+        self.path = filename.rstrip("/" + os.sep) + EXTENSION
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._docs: Dict[int, Tuple[str, tuple]] = {}  # doc id -> (trip name, fingerprint)
+        self._trip_docs: Dict[str, Dict[tuple, List[int]]] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}  # token -> {doc id: weight}
+        self._tokens: List[str] = []  # sorted, for prefix lookups
+        self._next_id = 0
+
+    # ---------- Loading and saving ----------
+    def _signature(self) -> list | None:
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+    def load(self) -> "SearchIndex":
+        """Read the saved index, or rebuild it if the datafile changed since it was saved."""
+        with self._lock:
+            if not self._read():
+                self.rebuild()
+            self.loaded = True
+        return self
+
+    def _read(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if saved.get("version") != VERSION or saved.get("source") != self._signature():
+            return False
+        self._clear()
+        for doc_id, trip_name, fingerprint in saved["docs"]:
+            fingerprint = tuple(fingerprint)
+            self._docs[doc_id] = (trip_name, fingerprint)
+            self._trip_docs.setdefault(trip_name, {}).setdefault(fingerprint, []).append(doc_id)
+        for token, flat in saved["postings"].items():
+            self._postings[token] = dict(zip(flat[::2], flat[1::2]))
+        self._tokens = sorted(self._postings)
+        self._next_id = saved["next_id"]
+        return True
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._clear()
+            if self._signature() is not None:
+                for list_name, itinerary in iter_itineraries(self.filename):
+                    self._add_all(list_name, itinerary.activities)
+            self._tokens = sorted(self._postings)
+
+    def save(self) -> None:
+        """Write the index next to the datafile; call after the datafile itself is written."""
+        with self._lock:
+            if not self.loaded:
+                return
+            document = {
+                "version": VERSION,
+                "source": self._signature(),
+                "next_id": self._next_id,
+                "docs": [[doc_id, trip_name, list(fingerprint)] for doc_id, (trip_name, fingerprint) in self._docs.items()],
+                "postings": {token: [v for pair in docs.items() for v in pair] for token, docs in self._postings.items()},
+            }
+            with atomic_open(self.path) as f:
+                json.dump(document, f, ensure_ascii=False, separators=(",", ":"))
+
+    def _ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
+
+    # ---------- Changes ----------
+    def _add_all(self, trip_name: str, activities: Iterable[Activity]) -> None:
+        # bulk path for rebuild: the sorted token list is rebuilt once at the end
+        for activity in activities:
+            if activity.valid:
+                self._add_doc(trip_name, _fingerprint(activity), keep_sorted=False)
+
+    def _add_doc(self, trip_name: str, fingerprint: tuple, keep_sorted: bool = True) -> None:
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = (trip_name, fingerprint)
+        self._trip_docs.setdefault(trip_name, {}).setdefault(fingerprint, []).append(doc_id)
+        location, detail, notes = fingerprint[3:]
+        for field, text in (("location", location), ("detail", detail), ("notes", notes)):
+            for token in tokenize(text):
+                docs = self._postings.get(token)
+                if docs is None:
+                    docs = self._postings[token] = {}
+                    if keep_sorted:
+                        insort(self._tokens, token)
+                docs[doc_id] = docs.get(doc_id, 0) + FIELD_WEIGHTS[field]
+
+    def _remove_doc(self, doc_id: int) -> None:
+        trip_name, fingerprint = self._docs.pop(doc_id)
+        ids = self._trip_docs[trip_name][fingerprint]
+        ids.remove(doc_id)
+        if not ids:
+            del self._trip_docs[trip_name][fingerprint]
+            if not self._trip_docs[trip_name]:
+                del self._trip_docs[trip_name]
+        for token in set(tokenize(" ".join(fingerprint[3:]))):
+            docs = self._postings.get(token)
+            if docs is None or docs.pop(doc_id, None) is None or docs:
+                continue
+            del self._postings[token]
+            self._tokens.pop(bisect_left(self._tokens, token))
+
+    def update_trip(self, trip_name: str, activities: Iterable[Activity]) -> None:
+        """Make the indexed activities of ``trip_name`` match ``activities``."""
+        with self._lock:
+            self._ensure_loaded()
+            wanted: Dict[tuple, int] = {}
+            for activity in activities:
+                if not activity.valid:
+                    continue
+                fingerprint = _fingerprint(activity)
+                wanted[fingerprint] = wanted.get(fingerprint, 0) + 1
+            for fingerprint, ids in list(self._trip_docs.get(trip_name, {}).items()):
+                surplus = len(ids) - wanted.pop(fingerprint, 0)
+                for doc_id in ids[:max(surplus, 0)]:
+                    self._remove_doc(doc_id)
+                if surplus < 0:
+                    wanted[fingerprint] = -surplus
+            for fingerprint, count in wanted.items():
+                for _ in range(count):
+                    self._add_doc(trip_name, fingerprint)
+
+    def remove_trip(self, trip_name: str) -> None:
+        self.update_trip(trip_name, ())
+
+    # ---------- Queries ----------
+    def _matching(self, word: str) -> Dict[int, float]:
+        """doc id -> score for every token starting with ``word``."""
+        total = len(self._docs)
+        start = bisect_left(self._tokens, word)
+        tokens = self._tokens[start:bisect_left(self._tokens, word + "\U0010ffff", start)]
+        scores: Dict[int, float] = {}
+        for token in tokens:
+            docs = self._postings[token]
+            idf = math.log(1 + total / len(docs))
+            if token != word:
+                idf *= 0.5  # a whole-word match ranks above a prefix match
+            if not scores:
+                scores = {doc_id: weight * idf for doc_id, weight in docs.items()}
+                continue
+            for doc_id, weight in docs.items():
+                score = weight * idf
+                if score > scores.get(doc_id, 0):
+                    scores[doc_id] = score
+        return scores
+
+    def search(self, query: str, limit: int | None = 50) -> List[SearchHit]:
+        """Activities containing every word of ``query`` (as a word or word prefix), best first."""
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            per_word = sorted((self._matching(word) for word in words), key=len)
+            scores = per_word[0]
+            for other in per_word[1:]:
+                scores = {doc_id: score + other[doc_id] for doc_id, score in scores.items() if doc_id in other}
+            rank = lambda item: (-item[1], item[0])  # ties in indexing order
+            if limit is None or limit >= len(scores):
+                ranked = sorted(scores.items(), key=rank)
+            else:
+                ranked = heapq.nsmallest(limit, scores.items(), key=rank)
+            hits = []
+            for doc_id, score in ranked:
+                trip_name, fingerprint = self._docs[doc_id]
+                hits.append(SearchHit(trip_name, Activity.from_parsed(*fingerprint), score))
+            return hits
+
+
+_indexes: Dict[str, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def search_index_for(filename: str = ITINERARIES_FILE) -> SearchIndex:
+    """Return the shared index of a datafile."""
+    with _indexes_lock:
+        index = _indexes.get(filename)
+        if index is None:
+            index = _indexes[filename] = SearchIndex(filename)
+        return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search itinerary activities by location, detail and notes.")
+    parser.add_argument("query")
+    parser.add_argument("--file", default=ITINERARIES_FILE, help="itinerary datafile")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = search_index_for(args.file).load()
+    for hit in index.search(args.query, args.limit):
+        a = hit.activity
+        print(f"{hit.score:6.2f}  {hit.trip_name}: {a.date} {a.start_time}-{a.end_time} {a.location} - {a.detail}")
+    index.save()
+
+
+if __name__ == "__main__":
+    main()
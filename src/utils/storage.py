@@ -0,0 +1,652 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from typing import Dict, Iterable, Iterator, List, Tuple
+from src.utils import binfmt
+from src.utils.atomic import atomic_open
+from src.utils.compression import detect_codec, open_text_read, open_text_write
+from src.utils.journal import Journal
+from src.utils.stream import iter_entries, iter_headers, write_entries
+
+BUDGETS = "budgets"
+PACKING_LISTS = "packing_lists"
+ITINERARIES = "itineraries"
+KINDS = (BUDGETS, PACKING_LISTS, ITINERARIES)
+
+# the key of each kind's child rows inside a record
+CHILD_KEYS = {BUDGETS: "categories", PACKING_LISTS: "items", ITINERARIES: "activities"}
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+class StorageEngine:
+    """Persists the serialized (``to_dict``) form of trips, keyed by trip name."""
+
+    # True when any write means rewriting every record of the kind
+    rewrites_whole_file = True
+
+    def load(self, kind: str) -> Dict[str, dict]:
+        raise NotImplementedError
+
+    def load_one(self, kind: str, name: str) -> dict | None:
+        return self.load(kind).get(name)
+
+    def load_headers(self, kind: str) -> Dict[str, dict]:
+        """Records without their child rows where the engine can skip them; a
+        ``<children>_count`` key is added in that case. Engines that must read the
+        whole record anyway may return it as-is."""
+        return self.load(kind)
+
+    def iter_records(self, kind: str) -> Iterator[Tuple[str, dict]]:
+        """Yield ``(name, record)`` pairs without holding the whole store in memory."""
+        return iter(self.load(kind).items())
+
+    def save(self, kind: str, records: Dict[str, dict]) -> None:
+        """Replace every stored record of ``kind`` with ``records``."""
+        raise NotImplementedError
+
+    def save_stream(self, kind: str, records: Iterable[Tuple[str, dict]]) -> None:
+        """Like ``save``, but consumes ``(name, record)`` pairs lazily where the engine can."""
+        self.save(kind, dict(records))
+
+    def upsert(self, kind: str, name: str, record: dict) -> None:
+        records = self.load(kind)
+        records[name] = record
+        self.save(kind, records)
+
+    def delete(self, kind: str, name: str) -> bool:
+        records = self.load(kind)
+        if name not in records:
+            return False
+        del records[name]
+        self.save(kind, records)
+        return True
+
+    def apply(self, kind: str, upserts: Dict[str, dict], deletes: Iterable[str] = ()) -> None:
+        """Apply a batch of upserts and deletes as one write."""
+        records = self.load(kind)
+        for name in deletes:
+            records.pop(name, None)
+        records.update(upserts)
+        self.save(kind, records)
+
+    def apply_batch(self, changes: Dict[str, Tuple[Dict[str, dict], Iterable[str]]]) -> None:
+        """``apply`` for several kinds stored by this engine, as ``{kind: (upserts, deletes)}``."""
+        for kind, (upserts, deletes) in changes.items():
+            self.apply(kind, upserts, deletes)
+
+
+class JsonStorage(StorageEngine):
+    """The original layout: one JSON file holding every trip of a single kind.
+
+    ``.json.gz`` and ``.json.xz`` paths are compressed while writing; compressed
+    files are recognised by their magic bytes when reading, whatever their name.
+    """
+
+    def __init__(self, path: str, level: int | None = None):
+        self.path = path
+        self.level = level
+
+    def load(self, kind: str) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        with open_text_read(self.path) as f:
+            if detect_codec(self.path) is None:
+                return json.load(f)
+            # decompress incrementally rather than into one big string first
+            return dict(iter_entries(f))
+
+    def load_one(self, kind: str, name: str) -> dict | None:
+        for key, record in self.iter_records(kind):
+            if key == name:
+                return record
+        return None
+
+    def load_headers(self, kind: str) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        with open_text_read(self.path) as f:
+            return dict(iter_headers(f, CHILD_KEYS[kind], CHILD_TABLES[kind][1]))
+
+    def iter_records(self, kind: str) -> Iterator[Tuple[str, dict]]:
+        if not os.path.exists(self.path):
+            return
+        with open_text_read(self.path) as f:
+            yield from iter_entries(f)
+
+    def save(self, kind: str, records: Dict[str, dict]) -> None:
+        with open_text_write(self.path, self.level) as f:
+            json.dump(records, f, indent=4, ensure_ascii=False)
+
+    def save_stream(self, kind: str, records: Iterable[Tuple[str, dict]]) -> None:
+        with open_text_write(self.path, self.level) as f:
+            write_entries(f, records)
+
+
+class BinaryStorage(StorageEngine):
+    """Like JsonStorage, but in the compact binary format of ``binfmt``."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, kind: str) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "rb") as f:
+            return binfmt.load(f)
+
+    def save(self, kind: str, records: Dict[str, dict]) -> None:
+        with atomic_open(self.path, "wb") as f:
+            binfmt.dump(records, f)
+
+
+class ShardedStorage(StorageEngine):
+    """One JSON file per trip inside a directory, plus a ``manifest.json`` index.
+
+    The manifest maps each trip name to its shard file, size and SHA-256, so saving
+    a trip rewrites only that shard and the (small) manifest, and a single trip can
+    be read without touching the others.
+    """
+
+    MANIFEST = "manifest.json"
+    rewrites_whole_file = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest_path = os.path.join(path, self.MANIFEST)
+
+    @staticmethod
+    def shard_name(name: str) -> str:
+        # readable prefix plus a hash of the full name, so names never collide
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")[:40] or "trip"
+        return f"{slug}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:10]}.json"
+
+    # ---------- Manifest ----------
+    def read_manifest(self) -> Dict[str, dict]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: Dict[str, dict], prefix: str = "") -> str:
+        path = os.path.join(self.path, prefix + self.MANIFEST)
+        with atomic_open(path) as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+        return path
+
+    # ---------- Shards ----------
+    def _read_shard(self, entry: dict) -> dict:
+        with open(os.path.join(self.path, entry["file"]), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_shard(self, name: str, record: dict, prefix: str = "") -> dict:
+        data = json.dumps(record, indent=4, ensure_ascii=False).encode("utf-8")
+        entry = {"file": self.shard_name(name), "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+        with atomic_open(os.path.join(self.path, prefix + entry["file"]), "wb") as f:
+            f.write(data)
+        return entry
+
+    def _remove_shard(self, entry: dict) -> None:
+        try:
+            os.remove(os.path.join(self.path, entry["file"]))
+        except FileNotFoundError:
+            pass
+
+    def verify(self) -> list:
+        """Names whose shard is missing or no longer matches the manifest hash."""
+        damaged = []
+        for name, entry in self.read_manifest().items():
+            try:
+                with open(os.path.join(self.path, entry["file"]), "rb") as f:
+                    ok = hashlib.sha256(f.read()).hexdigest() == entry["sha256"]
+            except FileNotFoundError:
+                ok = False
+            if not ok:
+                damaged.append(name)
+        return damaged
+
+    # ---------- StorageEngine ----------
+    def load(self, kind: str) -> Dict[str, dict]:
+        return dict(self.iter_records(kind))
+
+    def load_one(self, kind: str, name: str) -> dict | None:
+        entry = self.read_manifest().get(name)
+        return self._read_shard(entry) if entry is not None else None
+
+    def iter_records(self, kind: str) -> Iterator[Tuple[str, dict]]:
+        for name, entry in self.read_manifest().items():
+            yield name, self._read_shard(entry)
+
+    def save(self, kind: str, records: Dict[str, dict]) -> None:
+        self.save_stream(kind, records.items())
+
+    def save_stream(self, kind: str, records: Iterable[Tuple[str, dict]]) -> None:
+        old = self.read_manifest()
+        manifest = {name: self._write_shard(name, record) for name, record in records}
+        self._write_manifest(manifest)
+        for name, entry in old.items():
+            if name not in manifest:
+                self._remove_shard(entry)
+
+    def upsert(self, kind: str, name: str, record: dict) -> None:
+        self.apply(kind, {name: record})
+
+    def delete(self, kind: str, name: str) -> bool:
+        found = name in self.read_manifest()
+        if found:
+            self.apply(kind, {}, [name])
+        return found
+
+    def apply(self, kind: str, upserts: Dict[str, dict], deletes: Iterable[str] = ()) -> None:
+        manifest = self.read_manifest()
+        removed = [manifest.pop(name) for name in deletes if name in manifest]
+        for name, record in upserts.items():
+            manifest[name] = self._write_shard(name, record)
+        # shards are written before the manifest points at them, and removed only after it stops
+        self._write_manifest(manifest)
+        live = {entry["file"] for entry in manifest.values()}
+        for entry in removed:
+            if entry["file"] not in live:  # deleted and saved again in the same batch
+                self._remove_shard(entry)
+
+    def stage(self, kind: str, upserts: Dict[str, dict], deletes: Iterable[str],
+              prefix: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Write what ``apply`` would under file names starting with ``prefix``, leaving the store as it is.
+
+        Returns the ``(staged, target)`` moves that make the change live, shards first
+        and the manifest last, and the shard files to remove after them.
+        """
+        manifest = self.read_manifest()
+        removed = [manifest.pop(name) for name in deletes if name in manifest]
+        replace = []
+        try:
+            for name, record in upserts.items():
+                entry = manifest[name] = self._write_shard(name, record, prefix)
+                target = os.path.join(self.path, entry["file"])
+                replace.append((os.path.join(self.path, prefix + entry["file"]), target))
+            replace.append((self._write_manifest(manifest, prefix), self.manifest_path))
+        except BaseException:
+            for staged, _ in replace:
+                os.remove(staged)
+            raise
+        live = {entry["file"] for entry in manifest.values()}
+        remove = [os.path.join(self.path, entry["file"]) for entry in removed if entry["file"] not in live]
+        return replace, remove
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trips (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    trip_name TEXT,
+    location TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    trip_type TEXT,
+    destination_type TEXT,
+    duration INTEGER,
+    weather TEXT,
+    travelers INTEGER,
+    total_budget REAL,
+    currency TEXT,
+    UNIQUE (kind, name)
+);
+CREATE INDEX IF NOT EXISTS idx_trips_name ON trips (name);
+CREATE INDEX IF NOT EXISTS idx_trips_location ON trips (location);
+
+CREATE TABLE IF NOT EXISTS budget_categories (
+    trip_id INTEGER NOT NULL REFERENCES trips (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (trip_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS packing_items (
+    trip_id INTEGER NOT NULL REFERENCES trips (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    is_packed INTEGER NOT NULL DEFAULT 0,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (trip_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS activities (
+    trip_id INTEGER NOT NULL REFERENCES trips (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    location TEXT NOT NULL DEFAULT '',
+    detail TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (trip_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_activities_date ON activities (date);
+CREATE INDEX IF NOT EXISTS idx_activities_location ON activities (location);
+"""
+
+# columns added after the first release, for databases created before them
+ADDED_COLUMNS = {"trips": (("trip_name", "TEXT"),)}
+
+# trip header columns stored for each kind (children live in their own tables); the
+# stored trip_name can differ from the key the record is saved under
+HEADER_COLUMNS = {
+    BUDGETS: ("total_budget", "currency"),
+    PACKING_LISTS: ("trip_name", "destination_type", "duration", "weather", "travelers"),
+    ITINERARIES: ("trip_name", "location", "start_date", "end_date", "trip_type"),
+}
+
+# child table of each kind, and the count key load_headers reports for it
+CHILD_TABLES = {
+    BUDGETS: ("budget_categories", "category_count"),
+    PACKING_LISTS: ("packing_items", "item_count"),
+    ITINERARIES: ("activities", "activity_count"),
+}
+
+
+class SqliteStorage(StorageEngine):
+    """All three kinds in one SQLite database, written one trip (row set) at a time."""
+
+    rewrites_whole_file = False
+
+    # databases whose schema is already in place; engines are created per call, so
+    # this is kept per file rather than per instance
+    _ready: set = set()
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        key = os.path.abspath(self.path)
+        fresh = key not in self._ready or not os.path.exists(self.path)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        if fresh:
+            conn.executescript(SCHEMA)
+            self._add_missing_columns(conn)
+            self._ready.add(key)
+        return conn
+
+    @staticmethod
+    def _add_missing_columns(conn) -> None:
+        for table, columns in ADDED_COLUMNS.items():
+            present = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns:
+                if column not in present:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        conn.commit()
+
+    # ---------- Reading ----------
+    def load(self, kind: str) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        columns = HEADER_COLUMNS[kind]
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT id, name, {', '.join(columns)} FROM trips WHERE kind = ? ORDER BY id", (kind,)
+            ).fetchall()
+            children = self._load_children(conn, kind)
+        records = {}
+        for trip_id, name, *values in rows:
+            record = self._header_record(kind, name, dict(zip(columns, values)))
+            self._attach_children(kind, record, children.get(trip_id, []))
+            records[name] = record
+        return records
+
+    def load_one(self, kind: str, name: str) -> dict | None:
+        if not os.path.exists(self.path):
+            return None
+        columns = HEADER_COLUMNS[kind]
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT id, {', '.join(columns)} FROM trips WHERE kind = ? AND name = ?", (kind, name)
+            ).fetchone()
+            if row is None:
+                return None
+            trip_id, *values = row
+            children = self._load_children(conn, kind, trip_id)
+        record = self._header_record(kind, name, dict(zip(columns, values)))
+        self._attach_children(kind, record, children.get(trip_id, []))
+        return record
+
+    def iter_records(self, kind: str) -> Iterator[Tuple[str, dict]]:
+        if not os.path.exists(self.path):
+            return
+        columns = HEADER_COLUMNS[kind]
+        with closing(self._connect()) as conn:
+            # one pass over two cursors, both ordered by trip id: a merge join that
+            # holds one trip's rows at a time
+            trips = conn.execute(
+                f"SELECT id, name, {', '.join(columns)} FROM trips WHERE kind = ? ORDER BY id", (kind,))
+            children = conn.execute(self._children_query(kind), (kind,))
+            child = next(children, None)
+            for trip_id, name, *values in trips:
+                while child is not None and child[0] < trip_id:
+                    child = next(children, None)  # rows of a trip deleted mid-read
+                rows = []
+                while child is not None and child[0] == trip_id:
+                    rows.append(child[1:])
+                    child = next(children, None)
+                record = self._header_record(kind, name, dict(zip(columns, values)))
+                self._attach_children(kind, record, rows)
+                yield name, record
+
+    def load_headers(self, kind: str) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        columns = HEADER_COLUMNS[kind]
+        child_table, count_key = CHILD_TABLES[kind]
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT t.name, {', '.join('t.' + c for c in columns)}, "
+                f"(SELECT COUNT(*) FROM {child_table} c WHERE c.trip_id = t.id) "
+                f"FROM trips t WHERE t.kind = ? ORDER BY t.id", (kind,)
+            ).fetchall()
+        headers = {}
+        for name, *values, count in rows:
+            record = self._header_record(kind, name, dict(zip(columns, values)))
+            record[count_key] = count
+            headers[name] = record
+        return headers
+
+    @staticmethod
+    def _children_query(kind):
+        """Child rows of every trip of ``kind`` (first column the trip id), ordered by trip and position."""
+        if kind == BUDGETS:
+            return ("SELECT c.trip_id, c.name, c.amount FROM budget_categories c "
+                    "JOIN trips t ON t.id = c.trip_id WHERE t.kind = ? ORDER BY c.trip_id, c.position")
+        if kind == PACKING_LISTS:
+            return ("SELECT p.trip_id, p.name, p.category, p.is_packed, p.quantity FROM packing_items p "
+                    "JOIN trips t ON t.id = p.trip_id WHERE t.kind = ? ORDER BY p.trip_id, p.position")
+        return ("SELECT a.trip_id, a.date, a.start_time, a.end_time, a.location, a.detail, a.notes "
+                "FROM activities a JOIN trips t ON t.id = a.trip_id WHERE t.kind = ? "
+                "ORDER BY a.trip_id, a.position")
+
+    def _load_children(self, conn, kind, trip_id=None):
+        query = self._children_query(kind)
+        params = (kind,)
+        if trip_id is not None:
+            query = query.replace(" ORDER BY", " AND t.id = ? ORDER BY")
+            params = (kind, trip_id)
+        grouped = {}
+        for trip_id, *values in conn.execute(query, params):
+            grouped.setdefault(trip_id, []).append(values)
+        return grouped
+
+    @staticmethod
+    def _header_record(kind, name, header):
+        if kind == BUDGETS:
+            record = {"total_budget": header["total_budget"]}
+            if header["currency"] is not None:
+                record["currency"] = header["currency"]
+            return record
+        record = dict(header)
+        if record["trip_name"] is None:
+            record["trip_name"] = name  # rows written before trip_name had its own column
+        return record
+
+    @staticmethod
+    def _attach_children(kind, record, rows):
+        if kind == BUDGETS:
+            record["categories"] = {name: amount for name, amount in rows}
+        elif kind == PACKING_LISTS:
+            record["items"] = [
+                {"name": name, "category": category, "is_packed": bool(is_packed), "quantity": quantity}
+                for name, category, is_packed, quantity in rows
+            ]
+        else:
+            record["activities"] = [
+                {"date": date, "start_time": start, "end_time": end,
+                 "location": location, "detail": detail, "notes": notes}
+                for date, start, end, location, detail, notes in rows
+            ]
+
+    # ---------- Writing ----------
+    def save(self, kind: str, records: Dict[str, dict]) -> None:
+        with closing(self._connect()) as conn, conn:
+            existing = {name for (name,) in conn.execute("SELECT name FROM trips WHERE kind = ?", (kind,))}
+            for name in existing - records.keys():
+                conn.execute("DELETE FROM trips WHERE kind = ? AND name = ?", (kind, name))
+            for name, record in records.items():
+                self._write_trip(conn, kind, name, record)
+
+    def save_stream(self, kind: str, records: Iterable[Tuple[str, dict]]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM trips WHERE kind = ?", (kind,))
+            for name, record in records:
+                self._write_trip(conn, kind, name, record)
+
+    def upsert(self, kind: str, name: str, record: dict) -> None:
+        with closing(self._connect()) as conn, conn:
+            self._write_trip(conn, kind, name, record)
+
+    def delete(self, kind: str, name: str) -> bool:
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute("DELETE FROM trips WHERE kind = ? AND name = ?", (kind, name))
+            return cursor.rowcount > 0
+
+    def apply(self, kind: str, upserts: Dict[str, dict], deletes: Iterable[str] = ()) -> None:
+        self.apply_batch({kind: (upserts, deletes)})
+
+    def apply_batch(self, changes: Dict[str, Tuple[Dict[str, dict], Iterable[str]]]) -> None:
+        # one transaction, so changes to several kinds land together or not at all
+        with closing(self._connect()) as conn, conn:
+            for kind, (upserts, deletes) in changes.items():
+                for name in deletes:
+                    conn.execute("DELETE FROM trips WHERE kind = ? AND name = ?", (kind, name))
+                for name, record in upserts.items():
+                    self._write_trip(conn, kind, name, record)
+
+    def _write_trip(self, conn, kind, name, record):
+        columns = HEADER_COLUMNS[kind]
+        values = [record.get(column) for column in columns]
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in columns)
+        conn.execute(
+            f"INSERT INTO trips (kind, name, {', '.join(columns)}) VALUES (?, ?{', ?' * len(columns)}) "
+            f"ON CONFLICT (kind, name) DO UPDATE SET {assignments}",
+            (kind, name, *values),
+        )
+        (trip_id,) = conn.execute("SELECT id FROM trips WHERE kind = ? AND name = ?", (kind, name)).fetchone()
+
+        if kind == BUDGETS:
+            conn.execute("DELETE FROM budget_categories WHERE trip_id = ?", (trip_id,))
+            conn.executemany(
+                "INSERT INTO budget_categories (trip_id, position, name, amount) VALUES (?, ?, ?, ?)",
+                [(trip_id, i, category, amount)
+                 for i, (category, amount) in enumerate(record.get("categories", {}).items())],
+            )
+        elif kind == PACKING_LISTS:
+            conn.execute("DELETE FROM packing_items WHERE trip_id = ?", (trip_id,))
+            conn.executemany(
+                "INSERT INTO packing_items (trip_id, position, name, category, is_packed, quantity) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(trip_id, i, item["name"], item["category"], int(item.get("is_packed", False)),
+                  item.get("quantity", 1))
+                 for i, item in enumerate(record.get("items", []))],
+            )
+        else:
+            conn.execute("DELETE FROM activities WHERE trip_id = ?", (trip_id,))
+            conn.executemany(
+                "INSERT INTO activities (trip_id, position, date, start_time, end_time, location, detail, notes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(trip_id, i, a["date"], a["start_time"], a["end_time"], a.get("location", ""),
+                  a["detail"], a.get("notes", ""))
+                 for i, a in enumerate(record.get("activities", []))],
+            )
+
+
+def open_storage(path: str) -> StorageEngine:
+    """Pick the storage engine for a datafile path: a directory (or a path ending in a
+    separator) is sharded, otherwise the extension decides."""
+    if os.path.isdir(path) or path.endswith(("/", os.sep)):
+        return ShardedStorage(path)
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteStorage(path)
+    if path.lower().endswith(binfmt.EXTENSION):
+        return BinaryStorage(path)
+    return JsonStorage(path)
+
+
+def infer_kind(path: str) -> str | None:
+    """Guess the kind stored in a single-kind datafile from its name, e.g. budgets.json."""
+    stem = os.path.basename(os.path.normpath(path)).split(".")[0]
+    return stem if stem in KINDS else None
+
+
+def _source_records(src: str, kind: str) -> Iterator[Tuple[str, dict]]:
+    """Records to copy out of ``src``; budgets include whatever their journal has not folded in yet."""
+    if kind == BUDGETS and os.path.exists(Journal(src).path):
+        from src.utils.file import load_budgets_journaled  # file.py imports this module
+        return ((name, budget.to_dict()) for name, budget in load_budgets_journaled(src).items())
+    return open_storage(src).iter_records(kind)
+
+
+def migrate(src: str, dst: str, kinds: Iterable[str]) -> Dict[str, int]:
+    """Copy every record of each kind from one datafile to another; returns counts per kind."""
+    target = open_storage(dst)
+    counts = {}
+    for kind in kinds:
+        counts[kind] = 0
+
+        def counted(kind=kind):
+            for name, record in _source_records(src, kind):
+                counts[kind] += 1
+                yield name, record
+
+        # streamed so migrating a large store holds about one trip in memory
+        if kind == BUDGETS:
+            # a journal left next to the target would otherwise be replayed over the copy
+            Journal(dst).compact(lambda: target.save_stream(kind, counted()))
+        else:
+            target.save_stream(kind, counted())
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate travel planner datafiles between storage engines.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = sub.add_parser("migrate", help="copy trips from SRC to DST (JSON <-> SQLite)")
+    migrate_cmd.add_argument("src")
+    migrate_cmd.add_argument("dst")
+    migrate_cmd.add_argument("--kind", choices=KINDS,
+                             help="kind to copy; inferred from the JSON file name when omitted")
+    args = parser.parse_args(argv)
+
+    kind = args.kind or infer_kind(args.src) or infer_kind(args.dst)
+    if kind is None:
+        parser.error("could not infer --kind from the file names; pass it explicitly")
+
+    counts = migrate(args.src, args.dst, [kind])
+    print(f"Migrated {counts[kind]} {kind} from {args.src} to {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import json
+import re
+from typing import IO, Iterable, Iterator, Tuple
+
+CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",:]}"
+_decoder = json.JSONDecoder()
+_STRUCTURE = re.compile(r'["\[\]{},]')
+_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+
+class _Reader:
+    """Buffered character reader that only keeps the unparsed tail of the file."""
+
+    def __init__(self, f: IO[str], chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int) -> bool:
+        """Read ``size`` more characters; returns False once the file is exhausted."""
+        if self.eof:
+            return False
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        # drop what was already consumed so the buffer stays about one entry long
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill(self.chunk_size):
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next JSON value, reading further chunks until it is complete."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill(size):
+                    raise
+                size *= 2  # grow the read size so one large entry isn't re-decoded per chunk
+                continue
+            # a number can be cut short by the chunk boundary ("1." decodes as 1), so
+            # only trust one that is followed by a delimiter or the end of the file
+            if (not isinstance(value, (dict, list, str))
+                    and (end == len(self.buf) or self.buf[end] not in _DELIMITERS) and self.fill(size)):
+                continue
+            self.pos = end
+            return value
+
+    def skip(self) -> int | None:
+        """Step over the next JSON value without building it.
+
+        Returns the number of elements (or members) for an array (or object). Only
+        strings and brackets are looked at, so malformed content inside the value
+        is not detected.
+        """
+        if self.peek() not in ("[", "{"):
+            self.value()
+            return None
+        self.pos += 1
+        count = 0 if self.peek() in ("]", "}") else 1
+        depth = 1
+        while True:
+            match = _STRUCTURE.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill(self.chunk_size):
+                    raise json.JSONDecodeError("Unterminated value", self.buf, self.pos)
+                continue
+            char = match.group()
+            if char == '"':
+                tail = _STRING_TAIL.match(self.buf, match.end())
+                if tail is None:
+                    # the string goes on in the next chunk
+                    self.pos = match.start()
+                    if not self.fill(self.chunk_size):
+                        raise json.JSONDecodeError("Unterminated string", self.buf, self.pos)
+                    continue
+                self.pos = tail.end()
+                continue
+            self.pos = match.end()
+            if char in "[{":
+                depth += 1
+            elif char in "]}":
+                depth -= 1
+                if depth == 0:
+                    return count
+            elif depth == 1:
+                count += 1
+
+
+def _keys(reader: _Reader) -> Iterator[str]:
+    """Yield the keys of the object at the reader, leaving it at each key's value for the caller to read."""
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name", reader.buf, reader.pos)
+        reader.expect(":")
+        yield key
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("}")
+        return
+
+
+def iter_entries(f: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, object]]:
+    """Yield ``(key, value)`` for each top-level entry of a JSON object, one at a time."""
+    reader = _Reader(f, chunk_size)
+    if reader.peek() == "":
+        return
+    for key in _keys(reader):
+        yield key, reader.value()
+
+
+def iter_headers(f: IO[str], children: str, count_key: str,
+                 chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, dict]]:
+    """Like ``iter_entries`` for a JSON object of records, but each record's ``children``
+    value is stepped over without being decoded; its length is stored under ``count_key``."""
+    reader = _Reader(f, chunk_size)
+    if reader.peek() == "":
+        return
+    for name in _keys(reader):
+        header = {}
+        for key in _keys(reader):
+            if key == children:
+                header[count_key] = reader.skip() or 0
+            else:
+                header[key] = reader.value()
+        yield name, header
+
+
+def write_entries(f: IO[str], entries: Iterable[Tuple[str, object]], indent: int = 4) -> None:
+    """Write ``(key, value)`` pairs as one JSON object, formatted like ``json.dump(..., indent=4)``."""
+    pad = " " * indent
+    first = True
+    for key, value in entries:
+        f.write("{\n" if first else ",\n")
+        first = False
+        body = json.dumps(value, indent=indent, ensure_ascii=False).replace("\n", "\n" + pad)
+        f.write(f"{pad}{json.dumps(key, ensure_ascii=False)}: {body}")
+    f.write("{}" if first else "\n}")
@@ -0,0 +1,50 @@
+"""Batch checks over itinerary datafiles.
+
+Reports every pair of double-booked activities, every activity dated outside
+its trip and every activity whose date or time cannot be read, one trip at a time so large datafiles are streamed rather
+than loaded whole::
+
+    python -m src.utils.validate src/datafiles/itineraries.json other.tpb
+
+Exits with status 1 if anything was reported.
+"""
+import argparse
+import sys
+from typing import Iterator, Tuple
+
+from src.modules.itinerary import Activity
+from src.utils.file import ITINERARIES_FILE, iter_itineraries
+
+
+def _describe(activity: Activity) -> str:
+    return f"{activity.date} {activity.start_time}-{activity.end_time} {activity.detail!r}"
+
+
+def find_problems(filename: str = ITINERARIES_FILE) -> Iterator[Tuple[str, str]]:
+    """Yield ``(trip name, description)`` for each problem found."""
+    for list_name, itinerary in iter_itineraries(filename):
+        for activity in itinerary.invalid():
+            yield list_name, f"{_describe(activity)} has an invalid date or time"
+        for activity in itinerary.out_of_range():
+            yield list_name, (f"{_describe(activity)} is outside the trip dates "
+                              f"({itinerary.start_date} - {itinerary.end_date})")
+        for earlier, later in itinerary.conflicts():
+            yield list_name, f"{_describe(earlier)} overlaps {_describe(later)}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Report scheduling problems in itinerary datafiles.")
+    parser.add_argument("paths", nargs="*", default=[ITINERARIES_FILE], help="itinerary datafiles (any format)")
+    args = parser.parse_args(argv)
+
+    problems = 0
+    for path in args.paths:
+        for list_name, problem in find_problems(path):
+            print(f"{path}: {list_name}: {problem}")
+            problems += 1
+    print(f"{problems} problem(s) found", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
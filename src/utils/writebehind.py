@@ -0,0 +1,131 @@
+import atexit
+import threading
+import time
+from typing import Dict
+
+from src.utils.cache import records_cache
+from src.utils.storage import open_storage
+
+
+class WriteBehindSaver:
+    """Collects per-trip changes and writes them to a datafile in the background.
+
+    ``put``/``remove`` only record the change in memory and mark the saver dirty.
+    A daemon thread writes the pending changes at most once every ``interval``
+    seconds, so a burst of edits costs one write. ``flush`` writes immediately and
+    should be called before the window closes; it is also registered with atexit.
+    """
+
+    def __init__(self, filename: str, kind: str, interval: float = 1.0):
+        self.filename = filename
+        self.kind = kind
+        self.interval = interval
+        self._pending: Dict[str, dict | None] = {}  # name -> record, or None for a delete
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        atexit.register(self.close)
+
+    # ---------- Recording changes ----------
+    def put(self, name: str, record: dict) -> None:
+        self._mark(name, record)
+
+    def remove(self, name: str) -> None:
+        self._mark(name, None)
+
+    def _mark(self, name, record):
+        # readers going through the record cache see the change before it is written
+        records_cache.update(self.filename, self.kind, name, record)
+        with self._cond:
+            self._pending[name] = record
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.kind}", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    @property
+    def dirty(self) -> bool:
+        with self._cond:
+            return bool(self._pending)
+
+    # ---------- Writing ----------
+    def flush(self) -> None:
+        """Write every pending change now."""
+        with self._flush_lock:
+            with self._cond:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            upserts = {name: record for name, record in pending.items() if record is not None}
+            deletes = {name for name, record in pending.items() if record is None}
+            try:
+                engine = open_storage(self.filename)
+                records = records_cache.peek(self.filename, self.kind) if engine.rewrites_whole_file else None
+                if records is not None:
+                    # write from the cached copy without re-reading the file; it may have been
+                    # loaded after the changes were queued, so apply them to it first
+                    for name in deletes:
+                        records.pop(name, None)
+                    records.update(upserts)
+                    engine.save(self.kind, records)
+                else:
+                    engine.apply(self.kind, upserts, deletes)
+            except Exception:
+                with self._cond:
+                    # keep the failed changes unless something newer replaced them meanwhile
+                    self._pending = {**pending, **self._pending}
+                raise
+            with self._cond:
+                # bring a cache entry loaded from disk meanwhile up to date; changes queued
+                # since the swap are newer and already in it
+                for name, record in pending.items():
+                    if name not in self._pending:
+                        records_cache.update(self.filename, self.kind, name, record)
+            records_cache.refresh(self.filename, self.kind)
+
+    def close(self) -> None:
+        """Flush and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # let further edits pile up for one interval before writing
+                deadline = time.monotonic() + self.interval
+                while not self._closed and (remaining := deadline - time.monotonic()) > 0:
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error while saving the file: {e}")
+
+
+_savers: Dict[tuple, WriteBehindSaver] = {}
+_savers_lock = threading.Lock()
+
+
+def saver_for(filename: str, kind: str, interval: float = 1.0) -> WriteBehindSaver:
+    """Return the shared saver of a datafile, so every window queues into the same one."""
+    with _savers_lock:
+        saver = _savers.get((filename, kind))
+        if saver is None:
+            saver = _savers[(filename, kind)] = WriteBehindSaver(filename, kind, interval)
+        return saver
+
+
+def flush_savers(filename: str, kind: str | None = None) -> None:
+    """Write out whatever the shared savers of a datafile still hold."""
+    with _savers_lock:
+        savers = [saver for (path, k), saver in _savers.items() if path == filename and kind in (None, k)]
+    for saver in savers:
+        saver.flush()
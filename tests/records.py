@@ -0,0 +1,36 @@
+"""Sample serialized records shared by the storage tests."""
+from src.utils.storage import BUDGETS, PACKING_LISTS, ITINERARIES
+
+BUDGET_RECORDS = {
+    "Paris": {"total_budget": 1500.0, "currency": "€", "categories": {"Hotel": 600.0, "Food": 210.5}},
+    "Empty": {"total_budget": 0.0, "currency": "RM", "categories": {}},
+}
+
+PACKING_RECORDS = {
+    "Beach week": {
+        "trip_name": "Beach week", "destination_type": "beach", "duration": 7, "weather": "sunny", "travelers": 2,
+        "items": [
+            {"name": "Socks", "category": "Clothing", "is_packed": True, "quantity": 14},
+            {"name": "Sunscreen", "category": "Supplies", "is_packed": False, "quantity": 1},
+        ],
+    },
+}
+
+ITINERARY_RECORDS = {
+    "Japan": {
+        "trip_name": "Japan", "location": "Tokyo", "start_date": "2025-04-01", "end_date": "2025-04-03",
+        "trip_type": "General",
+        "activities": [
+            {"date": "2025-04-01", "start_time": "09:00", "end_time": "11:30", "location": "Asakusa",
+             "detail": "Senso-ji", "notes": ""},
+            {"date": "2025-04-02", "start_time": "18:00", "end_time": "20:00", "location": "Shinjuku",
+             "detail": "Dinner", "notes": "book ahead"},
+        ],
+    },
+    "No plans": {
+        "trip_name": "No plans", "location": "", "start_date": "2025-05-01", "end_date": "2025-05-01",
+        "trip_type": "General", "activities": [],
+    },
+}
+
+RECORDS = {BUDGETS: BUDGET_RECORDS, PACKING_LISTS: PACKING_RECORDS, ITINERARIES: ITINERARY_RECORDS}
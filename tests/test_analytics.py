@@ -0,0 +1,89 @@
+import random
+import statistics
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.modules.budget import Budget
+from src.utils.analytics import BudgetMatrix, load_budget_matrix
+from src.utils.currency import RateTable
+from src.utils.storage import open_storage, BUDGETS
+from tests.records import BUDGET_RECORDS
+
+CATEGORIES = ["Hotel", "Food", "Transport", "Tickets"]
+RATES = RateTable("RM", {"RM": 1.0, "€": 4.93, "$": 4.22})
+
+
+def random_budgets(rng, count=60):
+    budgets = []
+    for i in range(count):
+        budget = Budget(f"trip {i}", rng.randrange(0, 500000) / 100, rng.choice(list(RATES.codes)))
+        for category in rng.sample(CATEGORIES, rng.randrange(len(CATEGORIES) + 1)):
+            budget.set_category(category, rng.randrange(0, 200000) / 100)
+        budgets.append(budget)
+    return budgets
+
+
+def test_matrix_matches_the_budgets():
+    budgets = random_budgets(random.Random(1))
+    matrix = BudgetMatrix.from_budgets(budgets)
+    assert list(matrix.allocated) == [sum(b.category_cents.values()) for b in budgets]
+    assert list(matrix.remaining) == [b.remaining_cents for b in budgets]
+    assert matrix.over_allocated() == [b.trip_name for b in budgets if b.remaining_cents < 0]
+    for i, budget in enumerate(budgets):
+        assert matrix.currencies[matrix.codes[i]] == budget.currency
+        assert {c for j, c in enumerate(matrix.categories) if matrix.present[i, j]} == set(budget.category_cents)
+
+
+def test_rollups_match_a_brute_force_sum():
+    budgets = random_budgets(random.Random(2))
+    rollups = BudgetMatrix.from_budgets(budgets).rollups()
+    assert set(rollups) == {b.currency for b in budgets}
+    for currency, rollup in rollups.items():
+        mine = [b for b in budgets if b.currency == currency]
+        assert rollup.trips == len(mine)
+        assert rollup.total == sum(b.total_cents for b in mine) / 100
+        assert rollup.allocated == sum(sum(b.category_cents.values()) for b in mine) / 100
+        expected = {}
+        for b in mine:
+            for category, cents in b.category_cents.items():
+                expected[category] = expected.get(category, 0) + cents
+        assert rollup.by_category == {category: cents / 100 for category, cents in expected.items()}
+
+
+def test_rollup_in_converts_every_trip():
+    budgets = random_budgets(random.Random(3))
+    rollup = BudgetMatrix.from_budgets(budgets).rollup_in("€", RATES)
+    assert rollup.total == sum(RATES.convert(b.total_cents, b.currency, "€") for b in budgets) / 100
+    food = sum(RATES.convert(b.category_cents["Food"], b.currency, "€") for b in budgets if "Food" in b.category_cents)
+    assert rollup.by_category["Food"] == food / 100
+    with pytest.raises(ValueError):
+        BudgetMatrix.from_budgets([Budget("Oslo", 10, "kr")]).rollup_in("RM", RATES)
+
+
+def test_top_trips_and_percentiles():
+    budgets = random_budgets(random.Random(4))
+    matrix = BudgetMatrix.from_budgets(budgets)
+    by_total = sorted(budgets, key=lambda b: -b.total_cents)
+    assert [cents for _, cents in matrix.top_trips(5, by="total")] == [b.total_cents / 100 for b in by_total[:5]]
+    assert len(matrix.top_trips(1000)) == len(budgets)
+    euro = matrix.top_trips(1000, by="Hotel", currency="€")
+    assert {name for name, _ in euro} == {b.trip_name for b in budgets if b.currency == "€"}
+    assert matrix.top_trips(3, currency="kr") == []
+    with pytest.raises(ValueError):
+        matrix.top_trips(3, by="Souvenirs")
+
+    percentiles = matrix.category_percentiles((50,))
+    for category in CATEGORIES:
+        values = [b.category_cents[category] / 100 for b in budgets if category in b.category_cents]
+        assert percentiles[category][50] == pytest.approx(statistics.median(values))
+    assert BudgetMatrix.from_budgets([Budget("Empty", 0)]).category_percentiles() == {}
+
+
+def test_load_budget_matrix_reads_the_datafile(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    open_storage(path).save(BUDGETS, BUDGET_RECORDS)
+    matrix = load_budget_matrix(path)
+    assert matrix.trips == list(BUDGET_RECORDS)
+    assert matrix.rollups()["€"].by_category == {"Hotel": 600.0, "Food": 210.5}
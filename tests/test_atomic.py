@@ -0,0 +1,115 @@
+import os
+import stat
+
+import pytest
+
+from src.utils.atomic import atomic_open, file_mode
+from src.utils.cache import records_cache
+from src.utils.file import load_packing_lists
+from src.utils.storage import open_storage, BUDGETS, PACKING_LISTS, ITINERARIES
+from src.utils.writebehind import WriteBehindSaver
+from tests.records import BUDGET_RECORDS, PACKING_RECORDS, ITINERARY_RECORDS
+
+
+def mode_of(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_atomic_open_replaces_the_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    with atomic_open(path) as f:
+        f.write("old")
+    with atomic_open(path) as f:
+        f.write("new")
+    assert open(path, encoding="utf-8").read() == "new"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_atomic_open_keeps_the_old_file_on_error(tmp_path):
+    path = str(tmp_path / "data.json")
+    with atomic_open(path) as f:
+        f.write("old")
+    with pytest.raises(RuntimeError):
+        with atomic_open(path) as f:
+            f.write("half written")
+            raise RuntimeError("crash")
+    assert open(path, encoding="utf-8").read() == "old"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_new_file_gets_the_umask_default(tmp_path):
+    path = str(tmp_path / "data.json")
+    with atomic_open(path) as f:
+        f.write("{}")
+    umask = os.umask(0)
+    os.umask(umask)
+    assert mode_of(path) == file_mode(path) == 0o666 & ~umask
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+@pytest.mark.parametrize("mode", [0o644, 0o640, 0o664])
+def test_rewrite_keeps_the_file_mode(tmp_path, mode):
+    path = str(tmp_path / "data.tpb")
+    open_storage(path).save(ITINERARIES, ITINERARY_RECORDS)
+    os.chmod(path, mode)
+    open_storage(path).save(ITINERARIES, {})
+    assert mode_of(path) == file_mode(path) == mode
+
+
+@pytest.mark.parametrize("suffix", [".json", ".db"])
+def test_write_behind_saver_coalesces_and_flushes(tmp_path, suffix):
+    path = str(tmp_path / ("budgets" + suffix))
+    open_storage(path).save(BUDGETS, BUDGET_RECORDS)
+    load = lambda: open_storage(path).load(BUDGETS)
+    records_cache.get(path, BUDGETS, load)
+    saver = WriteBehindSaver(path, BUDGETS, interval=60)
+    changed = dict(BUDGET_RECORDS["Paris"], total_budget=1.0)
+    saver.put("Paris", dict(BUDGET_RECORDS["Paris"], total_budget=999.0))
+    saver.put("Paris", changed)
+    saver.remove("Japan")
+    assert saver.dirty
+    # readers going through the cache see the changes before they are written
+    cached = records_cache.get(path, BUDGETS, load)
+    assert cached["Paris"] == changed and "Japan" not in cached
+    assert open_storage(path).load(BUDGETS) == BUDGET_RECORDS
+
+    saver.close()
+    assert not saver.dirty
+    expected = {name: record for name, record in BUDGET_RECORDS.items() if name != "Japan"}
+    expected["Paris"] = changed
+    assert open_storage(path).load(BUDGETS) == expected
+
+
+@pytest.mark.parametrize("suffix", [".json", ".db"])
+def test_write_behind_saver_keeps_changes_queued_before_the_cache_was_loaded(tmp_path, suffix):
+    path = str(tmp_path / ("packing_lists" + suffix))
+    open_storage(path).save(PACKING_LISTS, PACKING_RECORDS)
+    records_cache.invalidate(path)
+    saver = WriteBehindSaver(path, PACKING_LISTS, interval=60)
+    new = dict(next(iter(PACKING_RECORDS.values())), trip_name="New")
+    saver.put("New", new)
+    assert "New" not in load_packing_lists(path)  # loaded from disk, before the write
+    saver.flush()
+    expected = {**PACKING_RECORDS, "New": new}
+    assert open_storage(path).load(PACKING_LISTS) == expected
+    assert {name: p.to_dict() for name, p in load_packing_lists(path).items()} == expected
+    saver.close()
+
+
+def test_write_behind_saver_keeps_changes_that_failed_to_write(tmp_path, monkeypatch):
+    path = str(tmp_path / "budgets.json")
+    saver = WriteBehindSaver(path, BUDGETS, interval=60)
+    saver.put("Paris", BUDGET_RECORDS["Paris"])
+    records_cache.invalidate(path)
+
+    def fail(self, kind, upserts, deletes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(type(open_storage(path)), "apply", fail)
+    with pytest.raises(OSError):
+        saver.flush()
+    assert saver.dirty
+    monkeypatch.undo()
+    saver.close()
+    assert open_storage(path).load(BUDGETS) == {"Paris": BUDGET_RECORDS["Paris"]}
@@ -0,0 +1,79 @@
+import json
+import random
+
+import pytest
+
+from src.utils import binfmt
+from src.utils.compression import detect_codec
+from src.utils.storage import open_storage, ITINERARIES
+from tests.records import RECORDS, ITINERARY_RECORDS
+
+# strings that hit the date and time encodings and their near misses
+SPECIAL_STRINGS = ["2024-02-29", "2023-02-29", "0001-01-01", "9999-12-31", "0000-01-01", "2024-1-05",
+                   "00:00", "23:59", "24:00", "9:30", "12:60", "", "é東\U0001f30d", "09:00 "]
+
+
+def random_scalar(rng):
+    choice = rng.randrange(7)
+    if choice == 0:
+        return rng.choice([None, True, False])
+    if choice == 1:
+        return rng.choice([0, -1, 1, 127, 128, -(1 << 63), (1 << 63) - 1, rng.randint(-10 ** 9, 10 ** 9)])
+    if choice == 2:
+        return rng.choice([0.0, -0.5, 1e300, rng.random()])
+    if choice == 3:
+        return rng.choice(SPECIAL_STRINGS)
+    return "".join(rng.choice("abc ") for _ in range(rng.randrange(6)))
+
+
+def random_value(rng, depth=0):
+    choice = rng.randrange(6 if depth < 3 else 1)
+    if choice == 0 or choice == 1:
+        return random_scalar(rng)
+    if choice == 2:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    if choice == 3:
+        return {f"k{i}": random_value(rng, depth + 1) for i in range(rng.randrange(4))}
+    # lists of records with shared keys, typed per column (fixed-width rows) or mixed (tagged rows)
+    keys = [f"c{i}" for i in range(rng.randrange(4))]
+    if rng.random() < 0.5:
+        return [{key: random_scalar(rng) for key in keys} for _ in range(rng.randrange(5))]
+    row = {key: random_scalar(rng) for key in keys}
+    return [dict(row) for _ in range(rng.randrange(5))]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_documents_round_trip(seed):
+    rng = random.Random(seed)
+    document = {f"trip {i}": random_value(rng) for i in range(rng.randrange(6))}
+    assert binfmt.loads(binfmt.dumps(document)) == document
+
+
+@pytest.mark.parametrize("document", [[{}, {}], [{}], [], {}, {"a": [{}, {}, {}]}, [{"a": 1}, {"a": 2}]])
+def test_edge_cases_round_trip(document):
+    assert binfmt.loads(binfmt.dumps(document)) == document
+
+
+@pytest.mark.parametrize("kind", RECORDS)
+def test_datafiles_round_trip_and_shrink(kind):
+    data = binfmt.dumps(RECORDS[kind])
+    assert binfmt.loads(data) == RECORDS[kind]
+    assert len(data) < len(json.dumps(RECORDS[kind]).encode("utf-8"))
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        binfmt.loads(b"{}")
+    with pytest.raises(ValueError):
+        binfmt.dumps({"too big": 1 << 63})
+
+
+@pytest.mark.parametrize("suffix", [".json.gz", ".json.xz"])
+def test_convert_reads_and_writes_compressed_json(tmp_path, suffix):
+    src, tpb, back = (str(tmp_path / name) for name in ("src" + suffix, "trips.tpb", "back" + suffix))
+    open_storage(src).save(ITINERARIES, ITINERARY_RECORDS)
+    binfmt.main(["convert", src, tpb])
+    assert open_storage(tpb).load(ITINERARIES) == ITINERARY_RECORDS
+    binfmt.main(["convert", tpb, back])
+    assert detect_codec(back) == detect_codec(src) is not None
+    assert open_storage(back).load(ITINERARIES) == ITINERARY_RECORDS
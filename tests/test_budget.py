@@ -0,0 +1,46 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from src.modules.budget import Budget, to_cents, from_cents
+
+
+@pytest.mark.parametrize("amount, cents", [
+    (0, 0), (12, 1200), (-3, -300), (0.1, 10), (0.125, 13), (1.005, 101), (2.675, 268),
+    ("19.99", 1999), ("-0.005", -1), (Decimal("7.5"), 750), ("1e3", 100000), (True, 100),
+])
+def test_to_cents(amount, cents):
+    assert to_cents(amount) == cents
+
+
+@pytest.mark.parametrize("amount", [
+    float("nan"), float("inf"), float("-inf"), "nan", "NaN", "inf", "-Infinity", "sNaN",
+    Decimal("nan"), "", "abc", "1,5", "1e999999999", None,
+])
+def test_to_cents_rejects_non_finite_and_garbage(amount):
+    with pytest.raises(ValueError):
+        to_cents(amount)
+
+
+def test_budget_rejects_non_finite_amounts():
+    with pytest.raises(ValueError):
+        Budget("Paris", float("nan"))
+    budget = Budget("Paris", 100)
+    with pytest.raises(ValueError):
+        budget.set_category("Hotel", float("inf"))
+    assert budget.category_cents == {} and budget.allocated_cents == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_allocated_matches_the_categories(seed):
+    rng = random.Random(seed)
+    budget = Budget("Trip", 1000)
+    for _ in range(200):
+        category = rng.choice("ABCDE")
+        if rng.random() < 0.3 and category in budget.category_cents:
+            budget.delete_category(category)
+        else:
+            budget.set_category(category, round(rng.uniform(0, 500), rng.randrange(4)))
+        assert budget.allocated_cents == sum(budget.category_cents.values())
+        assert budget.remaining == from_cents(budget.total_cents - budget.allocated_cents)
@@ -0,0 +1,59 @@
+import os
+
+from src.utils.cache import RecordCache
+from src.utils.storage import open_storage, BUDGETS
+from tests.records import BUDGET_RECORDS
+
+
+def counting_loader(path, calls):
+    def load():
+        calls.append(path)
+        return open_storage(path).load(BUDGETS)
+    return load
+
+
+def test_file_is_parsed_again_only_after_it_changed(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    open_storage(path).save(BUDGETS, BUDGET_RECORDS)
+    cache, calls = RecordCache(), []
+    load = counting_loader(path, calls)
+    assert cache.get(path, BUDGETS, load) == BUDGET_RECORDS
+    assert cache.get(path, BUDGETS, load) is cache.get(path, BUDGETS, load)
+    assert len(calls) == 1
+
+    open_storage(path).save(BUDGETS, {"Paris": BUDGET_RECORDS["Paris"]})  # another writer
+    assert cache.get(path, BUDGETS, load) == {"Paris": BUDGET_RECORDS["Paris"]}
+    assert len(calls) == 2
+    os.remove(path)
+    assert cache.get(path, BUDGETS, load) == {}
+    assert len(calls) == 3
+
+
+def test_writers_keep_the_entry_current(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    cache, calls = RecordCache(), []
+    load = counting_loader(path, calls)
+    cache.get(path, BUDGETS, load)
+    cache.update(path, BUDGETS, "Paris", BUDGET_RECORDS["Paris"])
+    open_storage(path).upsert(BUDGETS, "Paris", BUDGET_RECORDS["Paris"])
+    assert cache.peek(path, BUDGETS) is None  # the file changed after the entry was made
+    cache.refresh(path, BUDGETS)
+    assert cache.get(path, BUDGETS, load) == {"Paris": BUDGET_RECORDS["Paris"]}
+    cache.update(path, BUDGETS, "Paris", None)
+    assert cache.peek(path, BUDGETS) == {}
+    assert len(calls) == 1
+
+
+def test_peek_store_and_invalidate(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    cache = RecordCache()
+    assert cache.peek(path, BUDGETS) is None
+    open_storage(path).save(BUDGETS, BUDGET_RECORDS)
+    cache.store(path, BUDGETS, dict(BUDGET_RECORDS))
+    peeked = cache.peek(path, BUDGETS)
+    peeked.clear()  # a copy: changing it leaves the entry alone
+    assert cache.peek(path, BUDGETS) == BUDGET_RECORDS
+    # entries are keyed by absolute path
+    assert cache.peek(os.path.relpath(path), BUDGETS) == BUDGET_RECORDS
+    cache.invalidate(path)
+    assert cache.peek(path, BUDGETS) is None
@@ -0,0 +1,121 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from src.modules.budget import Budget
+from src.modules.itinerary import Itinerary
+from src.modules.package import PackingList
+from src.utils.catalog import TripCatalog, INDEXED_FIELDS
+from src.utils.storage import open_storage, BUDGETS, PACKING_LISTS, ITINERARIES, KINDS
+from tests.records import RECORDS
+
+NAMES = ["Paris", "Japan", "Rome", "Oslo", "Lima"]
+VALUES = {"location": ["London", "london ", "Tokyo"], "trip_type": ["Company", "General"],
+          "destination_type": ["beach", "City"], "weather": ["sunny", "cold"], "currency": ["RM", "€"]}
+
+
+def make_catalog(tmp_path, records=None):
+    paths = {kind: str(tmp_path / f"{kind}.json") for kind in KINDS}
+    for kind in KINDS:
+        if records is not None:
+            open_storage(paths[kind]).save(kind, records[kind])
+    return TripCatalog(paths[BUDGETS], paths[PACKING_LISTS], paths[ITINERARIES]), paths
+
+
+def random_model(rng, kind, name):
+    if kind == BUDGETS:
+        return Budget(name, 100, rng.choice(VALUES["currency"]))
+    if kind == PACKING_LISTS:
+        return PackingList(name, rng.choice(VALUES["destination_type"]), 3, rng.choice(VALUES["weather"]), 1)
+    start = date(2025, 1, 1) + timedelta(days=rng.randrange(60))
+    end = start + timedelta(days=rng.randrange(-1, 10))  # sometimes ends before it starts
+    end = end.isoformat() if rng.random() < 0.8 else rng.choice(["", "someday"])
+    return Itinerary(name, rng.choice(VALUES["location"]), start.isoformat(), end, rng.choice(VALUES["trip_type"]))
+
+
+def test_load_joins_the_stores(tmp_path):
+    catalog, _ = make_catalog(tmp_path, RECORDS)
+    assert catalog.names() == sorted({name for kind in KINDS for name in RECORDS[kind]})
+    entry = catalog.get("Japan")
+    assert entry.itinerary.location == "Tokyo" and entry.budget is None
+    assert catalog.get("nowhere") is None
+    assert catalog.find(location="TOKYO") == ["Japan"]
+    assert catalog.values("currency") == ["rm", "€"]
+    with pytest.raises(ValueError):
+        catalog.find(colour="red")
+
+
+def test_changes_are_only_tracked_for_its_own_files(tmp_path):
+    catalog, paths = make_catalog(tmp_path, RECORDS)
+    catalog.put(Budget("Rome", 1, "RM"))  # before loading: ignored, loading reads the stores
+    catalog.load()
+    assert catalog.get("Rome") is None
+    catalog.put(Budget("Rome", 1, "RM"), filename=str(tmp_path / "other.json"))
+    assert catalog.get("Rome") is None
+    catalog.put(Budget("Rome", 1, "RM"), filename=paths[BUDGETS])
+    assert catalog.find(currency="rm") == ["Empty", "Rome"]
+    catalog.discard(BUDGETS, "Rome", paths[BUDGETS])
+    assert catalog.find(currency="rm") == ["Empty"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_find_matches_a_scan(tmp_path, seed):
+    rng = random.Random(seed)
+    catalog, _ = make_catalog(tmp_path)
+    catalog.load()
+    models = {kind: {} for kind in KINDS}
+    for _ in range(80):
+        kind, name = rng.choice(KINDS), rng.choice(NAMES)
+        if rng.random() < 0.3:
+            catalog.discard(kind, name)
+            models[kind].pop(name, None)
+        else:
+            models[kind][name] = random_model(rng, kind, name)
+            catalog.put(models[kind][name])
+        fields = rng.sample(sorted(INDEXED_FIELDS), rng.randrange(1, 3))
+        criteria = {field: rng.choice(VALUES[field]) for field in fields}
+        expected = sorted(name for name in NAMES if all(
+            name in models[INDEXED_FIELDS[field]]
+            and getattr(models[INDEXED_FIELDS[field]][name], field).strip().casefold() == value.strip().casefold()
+            for field, value in criteria.items()))
+        assert catalog.find(**criteria) == expected
+        assert catalog.names() == sorted(set().union(*models.values()))
+
+
+def itinerary_days(itinerary):
+    try:
+        first, last = date.fromisoformat(itinerary.start_date), date.fromisoformat(itinerary.end_date)
+    except ValueError:
+        return None  # never matches a date query
+    return first, max(first, last)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_date_queries_match_a_scan(tmp_path, seed):
+    rng = random.Random(seed)
+    catalog, _ = make_catalog(tmp_path)
+    catalog.load()
+    itineraries = {}
+    for _ in range(60):
+        name = rng.choice(NAMES)
+        if rng.random() < 0.25:
+            catalog.discard(ITINERARIES, name)
+            itineraries.pop(name, None)
+        else:
+            itineraries[name] = random_model(rng, ITINERARIES, name)
+            catalog.put(itineraries[name])
+        start = date(2024, 12, 25) + timedelta(days=rng.randrange(80))
+        end = start + timedelta(days=rng.randrange(5))
+        spans = {name: itinerary_days(i) for name, i in itineraries.items()}
+        assert catalog.overlapping(start.isoformat(), end.isoformat()) == sorted(
+            name for name, span in spans.items() if span and span[0] <= end and start <= span[1])
+        assert catalog.active_on(start.isoformat()) == sorted(
+            name for name, span in spans.items() if span and span[0] <= start <= span[1])
+
+
+def test_reversed_query_range_is_rejected(tmp_path):
+    catalog, _ = make_catalog(tmp_path, RECORDS)
+    assert catalog.active_on("2025-04-03") == ["Japan"]
+    with pytest.raises(ValueError):
+        catalog.overlapping("2025-04-03", "2025-04-01")
@@ -0,0 +1,53 @@
+import gzip
+import lzma
+import os
+
+import pytest
+
+from src.utils.compression import (GZIP, XZ, codec_for_path, detect_codec, open_text_read, open_text_write)
+from src.utils.storage import open_storage, ITINERARIES
+from tests.records import ITINERARY_RECORDS
+
+TEXT = '{"東京": "' + "x" * 5000 + '"}'
+
+
+@pytest.mark.parametrize("name, codec", [("a.json", None), ("a.json.gz", GZIP), ("A.JSON.XZ", XZ), ("a.gz.json", None)])
+def test_codec_for_path(name, codec):
+    assert codec_for_path(name) == codec
+
+
+@pytest.mark.parametrize("name, codec, opener", [("a.json.gz", GZIP, gzip.open), ("a.json.xz", XZ, lzma.open),
+                                                 ("a.json", None, open)])
+def test_written_files_are_standard_and_read_back(tmp_path, name, codec, opener):
+    path = str(tmp_path / name)
+    with open_text_write(path) as f:
+        f.write(TEXT)
+    assert detect_codec(path) == codec
+    with opener(path, "rt", encoding="utf-8") as f:
+        assert f.read() == TEXT
+    with open_text_read(path) as f:
+        assert f.read() == TEXT
+    if codec is not None:
+        assert os.path.getsize(path) < len(TEXT)
+
+
+def test_compressed_files_are_recognised_whatever_their_name(tmp_path):
+    path = str(tmp_path / "itineraries.json")
+    open_storage(str(tmp_path / "real.json.xz")).save(ITINERARIES, ITINERARY_RECORDS)
+    os.replace(str(tmp_path / "real.json.xz"), path)
+    assert detect_codec(path) == XZ
+    assert open_storage(path).load(ITINERARIES) == ITINERARY_RECORDS
+    assert dict(open_storage(path).iter_records(ITINERARIES)) == ITINERARY_RECORDS
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "a.json.gz")
+    with open_text_write(path) as f:
+        f.write(TEXT)
+    with pytest.raises(RuntimeError):
+        with open_text_write(path) as f:
+            f.write("partial")
+            raise RuntimeError
+    with open_text_read(path) as f:
+        assert f.read() == TEXT
+    assert os.listdir(tmp_path) == ["a.json.gz"]
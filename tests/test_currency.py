@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.modules.budget import Budget
+from src.utils.currency import RateTable, load_rates, RATES_FILE
+
+RATES = {"RM": 1.0, "$": 4.22, "€": 4.93}
+
+
+def test_rates_convert_through_the_base():
+    table = RateTable("RM", RATES)
+    assert table.rate("€", "RM") == 4.93
+    assert table.rate("RM", "$") == pytest.approx(1 / 4.22)
+    assert table.convert(10000, "€", "$") == round(10000 * 4.93 / 4.22)
+    assert table.convert(12345, "RM", "RM") == 12345
+    with pytest.raises(ValueError):
+        table.rate("kr", "RM")
+    with pytest.raises(ValueError):
+        RateTable("$", RATES)  # the base must be worth exactly 1
+
+
+def test_convert_many_matches_one_at_a_time():
+    table = RateTable("RM", RATES)
+    currencies = ["€", "RM", "$", "€"]
+    positions = table.positions(currencies)
+    cents = np.array([[100, 2550], [999, 1], [0, 333], [12345, 7]], dtype=np.int64)
+    converted = table.convert_many(cents, positions, "$")
+    assert converted.tolist() == [[table.convert(int(v), c, "$") for v in row] for row, c in zip(cents, currencies)]
+    assert table.convert_many(cents[:, 0], positions, "$").tolist() == converted[:, 0].tolist()
+
+
+def test_load_rates_reloads_only_after_the_file_changes(tmp_path):
+    path = str(tmp_path / "rates.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"base": "RM", "rates": RATES}, f)
+    first = load_rates(path)
+    assert load_rates(path) is first
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"base": "RM", "rates": {**RATES, "£": 5.69}}, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert load_rates(path).rate("£", "RM") == 5.69
+
+
+def test_shipped_rates_cover_the_budget_currencies():
+    table = load_rates(RATES_FILE)
+    assert table.base == "RM"
+    assert "RM" in table.index
+
+
+def test_budget_currency_round_trips():
+    budget = Budget("Paris", 100, "€")
+    assert Budget.from_dict("Paris", budget.to_dict()).currency == "€"
+    assert Budget.from_dict("Paris", {"total_budget": 1, "categories": {}}).currency == "RM"
@@ -0,0 +1,149 @@
+import random
+
+import pytest
+
+from src.modules.budget import Budget
+from src.modules.itinerary import Activity, Itinerary
+from src.modules.package import PackingList
+from src.utils.history import History, Snapshot
+from src.utils.persistent import PList
+from tests.records import ITINERARY_RECORDS, PACKING_RECORDS
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_plist_matches_a_list_and_keeps_old_versions(seed):
+    rng = random.Random(seed)
+    versions = [([], PList())]
+    for step in range(120):
+        values, plist = rng.choice(versions)
+        values = list(values)
+        op = rng.randrange(5)
+        if op == 0 and values:
+            i = rng.randrange(len(values))
+            values[i] = step
+            plist = plist.set(i, step)
+        elif op == 1:
+            i = rng.randrange(len(values) + 1)
+            values.insert(i, step)
+            plist = plist.insert(i, step)
+        elif op == 2 and values:
+            i = rng.randrange(-len(values), len(values))
+            del values[i]
+            plist = plist.delete(i)
+        elif op == 3:
+            start = rng.randrange(len(values) + 1)
+            stop = rng.randrange(start, len(values) + 1)
+            new = list(range(step * 10, step * 10 + rng.randrange(4)))
+            values[start:stop] = new
+            plist = plist.splice(start, stop, new)
+        else:
+            values.append(step)
+            plist = plist.append(step)
+        versions.append((values, plist))
+        # every earlier version is still intact
+        old_values, old_plist = rng.choice(versions)
+        assert old_plist.tolist() == old_values
+    for values, plist in versions:
+        assert len(plist) == len(values)
+        assert list(reversed(plist)) == values[::-1]
+        for i in range(-len(values), len(values)):
+            assert plist[i] == values[i]
+        start, stop = sorted(rng.randrange(-2, len(values) + 2) for _ in range(2))
+        assert plist[start:stop].tolist() == values[start:stop]
+        assert plist[::2].tolist() == values[::2]
+        with pytest.raises(IndexError):
+            plist[len(values)]
+
+
+def test_snapshots_share_unchanged_entries():
+    itinerary = Itinerary.from_dict(ITINERARY_RECORDS["Japan"])
+    first = Snapshot.capture(itinerary)
+    dinner = itinerary.activities[1]
+    itinerary.activities.replace(1, Activity.from_parsed(dinner.day, 0, 30, "Shinjuku", "Breakfast"))
+    second = Snapshot.capture(itinerary, first)
+    assert second.entries[0] is first.entries[0]  # the untouched activity is shared, not copied
+    assert second.entries[1].detail == "Breakfast" and first.entries[1] is dinner
+    assert Snapshot.capture(itinerary, second).entries is second.entries
+
+
+def test_budget_undo_redo():
+    budget = Budget("Paris", 1000, "€", {"Hotel": 600})
+    history = History(budget)
+    budget.set_category("Food", 200.5)
+    assert history.record(budget)
+    assert not history.record(budget)  # nothing changed
+    budget.total_budget = 1500
+    history.record(budget)
+
+    assert history.undo().restore().to_dict() == {"total_budget": 1000.0, "currency": "€",
+                                                  "categories": {"Hotel": 600.0, "Food": 200.5}}
+    assert history.undo().restore().to_dict() == Budget("Paris", 1000, "€", {"Hotel": 600}).to_dict()
+    assert history.undo() is None and not history.can_undo
+    assert history.redo().restore().total_budget == 1000
+    # recording after an undo drops the redo states
+    history.record(Budget("Paris", 1, "€"))
+    assert not history.can_redo and history.redo() is None
+    assert history.undo().restore().category_cents == {"Hotel": 60000, "Food": 20050}
+
+
+def test_packing_list_undo_restores_items():
+    packing_list = PackingList.from_dict(PACKING_RECORDS["Beach week"])
+    history = History(packing_list)
+    packing_list.toggle_packed("Sunscreen")
+    history.record(packing_list)
+    packing_list.add_item("Hat", "Clothing")
+    history.record(packing_list)
+    packing_list.remove_item("Socks")
+    history.record(packing_list)
+
+    def items(model):
+        return [(item.name, item.is_packed) for item in model.items]
+
+    assert items(history.undo().restore()) == [("Socks", True), ("Sunscreen", True), ("Hat", False)]
+    assert items(history.undo().restore()) == [("Socks", True), ("Sunscreen", True)]
+    assert history.undo().restore().to_dict() == PACKING_RECORDS["Beach week"]
+    assert items(history.redo().restore()) == [("Socks", True), ("Sunscreen", True)]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_edits_undo_to_every_recorded_state(seed):
+    rng = random.Random(seed)
+    budget = Budget("Trip", 100)
+    history = History(budget, limit=1000)
+    states = [budget.to_dict()]
+    for step in range(60):
+        if budget.category_cents and rng.random() < 0.3:
+            budget.delete_category(rng.choice(list(budget.category_cents)))
+        else:
+            budget.set_category(rng.choice("ABCDEFGH"), step)
+        if history.record(budget):
+            states.append(budget.to_dict())
+    for expected in reversed(states[:-1]):
+        assert history.undo().restore().to_dict() == expected
+    for expected in states[1:]:
+        assert history.redo().restore().to_dict() == expected
+
+
+def test_undo_and_redo_hand_back_the_stored_snapshots(monkeypatch):
+    itinerary = Itinerary.from_dict(ITINERARY_RECORDS["Japan"])
+    history = History(itinerary)
+    first = history.current
+    del itinerary.activities[0]
+    history.record(itinerary)
+    second = history.current
+    monkeypatch.setattr(Snapshot, "restore", lambda self: pytest.fail("undo/redo rebuilt a model"))
+    assert history.undo() is first and history.redo() is second
+    assert list(first.entries) == Itinerary.from_dict(ITINERARY_RECORDS["Japan"]).activities
+    assert history.undo().entries[1] is second.entries[0]  # activities are shared, not copied
+
+
+def test_history_keeps_at_most_limit_states():
+    budget = Budget("Trip", 0)
+    history = History(budget, limit=3)
+    for total in range(1, 10):
+        budget.total_budget = total
+        history.record(budget)
+    assert len(history) == 3
+    assert history.undo().restore().total_budget == 8
+    assert history.undo().restore().total_budget == 7
+    assert history.undo() is None
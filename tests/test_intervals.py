@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from src.modules.itinerary import Activity, ActivitySchedule
+from src.utils.intervals import IntervalIndex, overlapping_pairs
+
+
+class Value:
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+
+    def __repr__(self):
+        return f"Value({self.start}, {self.end})"
+
+
+def overlaps(a_start, a_end, b_start, b_end):
+    # zero-length ranges count as one unit long
+    return a_start < max(b_end, b_start + 1) and b_start < max(a_end, a_start + 1)
+
+
+def random_range(rng, limit=60):
+    start = rng.randrange(limit)
+    return start, start + rng.choice([0, 0, 1, 2, 5, 15, 40])
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_overlapping_matches_brute_force(seed):
+    rng = random.Random(seed)
+    index = IntervalIndex(seed=seed)
+    stored = []
+    for _ in range(150):
+        if stored and rng.random() < 0.35:
+            value = stored.pop(rng.randrange(len(stored)))
+            assert index.remove(value)
+            assert not index.remove(value)
+        else:
+            value = Value(*random_range(rng))
+            index.add(value.start, value.end, value)
+            stored.append(value)
+        start, end = random_range(rng)
+        found = index.overlapping(start, end)
+        expected = [v for v in stored if overlaps(v.start, v.end, start, end)]
+        assert sorted(map(id, found)) == sorted(map(id, expected))
+        assert [(v.start, max(v.end, v.start + 1)) for v in found] == sorted(
+            (v.start, max(v.end, v.start + 1)) for v in found)
+        assert len(index) == len(stored)
+    assert sorted(map(id, index)) == sorted(map(id, stored))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_overlapping_pairs_matches_brute_force(seed):
+    rng = random.Random(seed)
+    values = [Value(*random_range(rng)) for _ in range(rng.randrange(40))]
+    pairs = overlapping_pairs((v.start, v.end, v) for v in values)
+    expected = {frozenset((id(a), id(b))) for i, a in enumerate(values) for b in values[i + 1:]
+                if overlaps(a.start, a.end, b.start, b.end)}
+    assert len(pairs) == len(expected)
+    assert {frozenset((id(a), id(b))) for a, b in pairs} == expected
+    for earlier, later in pairs:
+        assert (earlier.start, max(earlier.end, earlier.start + 1)) <= (later.start, max(later.end, later.start + 1))
+
+
+def test_bad_input_is_rejected():
+    index = IntervalIndex()
+    value = Value(5, 3)
+    with pytest.raises(ValueError):
+        index.add(5, 3, value)
+    index.add(3, 5, value)
+    with pytest.raises(ValueError):
+        index.add(3, 5, value)
+    assert index.overlapping(5, 9) == [] and index.overlapping(4, 4) == [value]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_schedule_conflicts_match_brute_force(seed):
+    rng = random.Random(seed)
+    schedule = ActivitySchedule()
+
+    def activity():
+        start = rng.randrange(0, 20) * 30
+        return Activity.from_parsed(739000 + rng.randrange(3), start, start + rng.choice([0, 30, 60, 90]),
+                                    "", f"a{rng.randrange(1000)}")
+
+    def clash(a, b):
+        return a.day == b.day and overlaps(a.start_minute, a.end_minute, b.start_minute, b.end_minute)
+
+    for _ in range(80):
+        op = rng.random()
+        if schedule and op < 0.2:
+            del schedule[rng.randrange(len(schedule))]
+        elif schedule and op < 0.4:
+            schedule.replace(rng.randrange(len(schedule)), activity())
+        else:
+            schedule.add(activity())
+        assert [a.sort_key for a in schedule] == sorted(a.sort_key for a in schedule)
+        probe = activity()
+        assert sorted(map(id, schedule.conflicts_with(probe))) == sorted(
+            id(a) for a in schedule if clash(a, probe))
+        expected = {frozenset((id(a), id(b))) for i, a in enumerate(schedule) for b in schedule[i + 1:]
+                    if clash(a, b)}
+        assert {frozenset((id(a), id(b))) for a, b in schedule.conflicts()} == expected
@@ -0,0 +1,120 @@
+import copy
+
+import pytest
+
+from src.modules.itinerary import Activity, ActivitySchedule, Itinerary
+from src.utils.file import load_itineraries
+from src.utils.storage import open_storage, ITINERARIES
+from src.utils.validate import find_problems
+from tests.records import ITINERARY_RECORDS
+
+JAPAN = ITINERARY_RECORDS["Japan"]
+GOOD = JAPAN["activities"][0]
+
+
+def test_records_round_trip():
+    for record in ITINERARY_RECORDS.values():
+        assert Itinerary.from_dict(record).to_dict() == record
+
+
+def test_times_are_normalized():
+    activity = Activity.from_dict(dict(GOOD, start_time="9:00", date="2025-4-1"))
+    assert activity.valid
+    assert (activity.date, activity.start_time) == ("2025-04-01", "09:00")
+
+
+def test_constructor_rejects_bad_values():
+    with pytest.raises(ValueError):
+        Activity("2025-02-30", "09:00", "10:00", "", "detail")
+    with pytest.raises(ValueError):
+        Activity("2025-02-01", "25:00", "10:00", "", "detail")
+
+
+@pytest.mark.parametrize("field, value", [
+    ("date", "2025-02-30"), ("date", "someday"), ("date", None), ("date", 20250401),
+    ("start_time", "noon"), ("start_time", "24:00"), ("end_time", ""), ("end_time", ["09:00"]),
+])
+def test_bad_stored_values_are_kept_and_written_back(field, value):
+    record = dict(GOOD, **{field: value})
+    activity = Activity.from_dict(record)
+    assert not activity.valid
+    assert getattr(activity, field) == value
+    assert activity.to_dict() == record
+
+
+def test_missing_fields_load_as_invalid():
+    activity = Activity.from_dict({"detail": "?"})
+    assert not activity.valid
+    assert activity.to_dict() == {"date": None, "start_time": None, "end_time": None,
+                                  "location": "", "detail": "?", "notes": ""}
+
+
+@pytest.mark.parametrize("detail", [None, 7])
+def test_a_missing_detail_loads_as_invalid(detail):
+    record = {name: value for name, value in GOOD.items() if name != "detail"}
+    if detail is not None:
+        record["detail"] = detail
+    activity = Activity.from_dict(record)
+    assert not activity.valid
+    assert activity.date == GOOD["date"] and activity.raw == {"detail": detail}
+    assert activity.to_dict() == dict(GOOD, detail=detail)
+
+
+def test_fixing_a_bad_value_makes_the_activity_valid():
+    activity = Activity.from_dict(dict(GOOD, date="soon", end_time="late"))
+    activity.date = "2025-04-01"
+    assert not activity.valid and activity.date == "2025-04-01" and activity.end_time == "late"
+    activity.end_time = "11:30"
+    assert activity.valid
+    assert activity == Activity.from_dict(GOOD)
+
+
+def test_one_bad_activity_does_not_stop_the_itinerary():
+    record = copy.deepcopy(JAPAN)
+    bad = dict(GOOD, start_time="9am", detail="Breakfast")
+    record["activities"].append(bad)
+    record["activities"].append(dict(GOOD, date="2025-04-10", detail="Too late"))
+    itinerary = Itinerary.from_dict(record)
+    assert [a.detail for a in itinerary.invalid()] == ["Breakfast"]
+    assert [a.detail for a in itinerary.out_of_range()] == ["Too late"]
+    # the bad activity overlaps nothing, even though its date matches Senso-ji
+    assert itinerary.conflicts() == []
+    assert itinerary.activities.conflicts_with(itinerary.invalid()[0]) == []
+    assert itinerary.activities.conflicts_with(Activity.from_dict(GOOD)) == [itinerary.activities[1]]
+    assert bad in itinerary.to_dict()["activities"]
+
+
+@pytest.mark.parametrize("suffix", [".json", ".tpb", ".db"])
+def test_bad_activities_survive_storage_and_are_reported(tmp_path, suffix):
+    path = str(tmp_path / ("itineraries" + suffix))
+    record = copy.deepcopy(JAPAN)
+    record["activities"].append(dict(GOOD, date="2025-13-01", detail="Typo"))
+    open_storage(path).save(ITINERARIES, {"Japan": record})
+    # the bad activity has no day to sort by, so it comes first
+    assert load_itineraries(path)["Japan"].to_dict() == Itinerary.from_dict(record).to_dict()
+    assert load_itineraries(path)["Japan"].activities[0].date == "2025-13-01"
+    assert list(find_problems(path)) == [
+        ("Japan", "2025-13-01 09:00-11:30 'Typo' has an invalid date or time")]
+
+
+def test_schedule_keeps_order_and_ties_in_insertion_order():
+    day = Activity.from_dict(GOOD).day
+    first, second, third = (Activity.from_parsed(day, 600, 660, "", name) for name in ("first", "second", "third"))
+    early = Activity.from_parsed(day, 300, 360, "", "early")
+    schedule = ActivitySchedule([first, second])
+    schedule.add(early)
+    assert schedule.add(third) == 3
+    assert [a.detail for a in schedule] == ["early", "first", "second", "third"]
+    assert schedule.replace(0, Activity.from_parsed(day + 1, 0, 60, "", "tomorrow")) == 3
+    assert [a.detail for a in schedule] == ["first", "second", "third", "tomorrow"]
+
+
+def test_deleting_a_slice_updates_the_conflict_index():
+    day = Activity.from_dict(GOOD).day
+    schedule = ActivitySchedule(Activity.from_parsed(day, 60 * h, 60 * h + 90, "", str(h)) for h in range(6))
+    probe = Activity.from_parsed(day, 0, 24 * 60, "", "all day")
+    assert len(schedule.conflicts_with(probe)) == 6
+    del schedule[1:4]
+    assert [a.detail for a in schedule.conflicts_with(probe)] == ["0", "4", "5"]
+    schedule.clear()
+    assert schedule.conflicts_with(probe) == [] and len(schedule) == 0
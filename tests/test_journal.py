@@ -0,0 +1,59 @@
+import os
+
+from src.controllers.budgetcontroller import BudgetController
+from src.utils.file import load_budgets, load_budgets_journaled
+from src.utils.journal import Journal
+
+
+def snapshot(controller):
+    return {name: budget.to_dict() for name, budget in controller.budgets.items()}
+
+
+def test_mutations_are_journaled_and_replayed(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    controller = BudgetController(path)
+    controller.add_trip("Paris", currency="€")
+    controller.update_total("Paris", 1200)
+    controller.add_category("Paris", "Hotel", 500.5)
+    controller.edit_category("Paris", "Hotel", 450.25)
+    controller.add_category("Paris", "Food", 99.99)
+    controller.delete_category("Paris", "Food")
+    controller.add_trip("Rome")
+    controller.delete_trip("Rome")
+
+    assert not os.path.exists(path)  # nothing folded into the snapshot yet
+    assert snapshot(BudgetController(path)) == snapshot(controller) == {
+        "Paris": {"total_budget": 1200.0, "currency": "€", "categories": {"Hotel": 450.25}}}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    controller = BudgetController(path)
+    controller.add_trip("Paris")
+    controller.update_total("Paris", 300)
+    with open(Journal(path).path, "a", encoding="utf-8") as f:
+        f.write('{"op": "update_total", "trip": "Par')  # crash mid-append
+    assert snapshot(BudgetController(path)) == {"Paris": {"total_budget": 300.0, "currency": "RM", "categories": {}}}
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    controller = BudgetController(path)
+    controller.journal.compact_every = 5
+    controller.add_trip("Paris")
+    for amount in range(1, 10):
+        controller.add_category("Paris", f"Day {amount}", amount)
+    assert os.path.exists(path)
+    assert controller.journal.pending < 5
+    assert {name: b.to_dict() for name, b in load_budgets_journaled(path).items()} == snapshot(controller)
+    controller.compact()
+    assert not Journal(path).exists()
+    assert {name: b.to_dict() for name, b in load_budgets(path).items()} == snapshot(controller)
+
+
+def test_unknown_trip_records_are_skipped(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    journal = Journal(path)
+    journal.append("set_category", trip="Ghost", category="Food", amount=1)
+    journal.append("add_trip", trip="Real", currency="RM")
+    assert list(load_budgets_journaled(path)) == ["Real"]
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from src.controllers.budgetcontroller import BudgetController
+from src.utils.cache import records_cache
+from src.utils.loader import load_async, poll_future, prefetch_all
+from src.utils.storage import open_storage, BUDGETS, PACKING_LISTS, ITINERARIES, KINDS
+from tests.records import RECORDS
+
+
+class FakeWidget:
+    """Runs ``after`` callbacks in a loop on the calling thread, like a tiny mainloop."""
+
+    def __init__(self):
+        self.queue = []
+        self.exists = True
+
+    def winfo_exists(self):
+        return self.exists
+
+    def after(self, ms, callback):
+        self.queue.append(callback)
+
+    def mainloop(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.queue and time.monotonic() < deadline:
+            self.queue.pop(0)()
+            time.sleep(0.001)
+
+
+def test_result_is_delivered_on_the_polling_thread():
+    widget, results = FakeWidget(), []
+    release = threading.Event()
+
+    def load(value):
+        release.wait(5)
+        return value, threading.current_thread()
+
+    future = load_async(load, 42)
+    poll_future(widget, future, lambda result: results.append((result, threading.current_thread())))
+    widget.queue.pop(0)()  # not done yet: checks again later
+    assert results == [] and len(widget.queue) == 1
+    release.set()
+    widget.mainloop()
+    ((value, worker), caller), = results
+    assert value == 42 and worker is not threading.current_thread() and caller is threading.current_thread()
+
+
+def test_errors_go_to_on_error():
+    widget, errors = FakeWidget(), []
+
+    def load():
+        raise OSError("unreadable")
+
+    poll_future(widget, load_async(load), lambda result: None, errors.append)
+    widget.mainloop()
+    assert [str(e) for e in errors] == ["unreadable"]
+
+
+def test_destroyed_window_is_not_called_back():
+    widget, results = FakeWidget(), []
+    future = load_async(lambda: 1)
+    future.result(5)
+    widget.exists = False
+    poll_future(widget, future, results.append)
+    widget.mainloop()
+    assert results == []
+
+
+def test_prefetch_caches_raw_records_and_replays_the_budget_journal(tmp_path):
+    paths = {kind: str(tmp_path / f"{kind}.json") for kind in KINDS}
+    for kind in KINDS:
+        open_storage(paths[kind]).save(kind, RECORDS[kind])
+    BudgetController(paths[BUDGETS]).add_trip("Oslo")  # journaled, not in the snapshot yet
+    futures = prefetch_all(paths[BUDGETS], paths[PACKING_LISTS], paths[ITINERARIES])
+    assert "Oslo" in futures[BUDGETS].result(5)
+    for kind in (PACKING_LISTS, ITINERARIES):
+        assert futures[kind].result(5) is None
+        assert records_cache.peek(paths[kind], kind) == RECORDS[kind]
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+from src.modules.package import PackingItem, PackingList
+from tests.records import PACKING_RECORDS
+
+NAMES = ["Socks", "Hat", "Sunscreen", "Map"]
+CATEGORIES = ["Clothing", "Supplies"]
+
+
+class NaiveList:
+    """The same operations by linear scans over a plain list."""
+
+    def __init__(self):
+        self.items = []  # [name, category, is_packed, quantity]
+
+    def find(self, name, category=None):
+        for item in self.items:
+            if item[0] == name and category in (None, item[1]):
+                return item
+        return None
+
+    def add_item(self, name, category, quantity):
+        item = self.find(name, category)
+        if item is not None:
+            item[3] += quantity
+        else:
+            self.items.append([name, category, False, quantity])
+
+    def remove_item(self, name):
+        item = self.find(name)
+        if item is None:
+            return False
+        self.items.remove(item)
+        return True
+
+    def toggle_packed(self, name):
+        item = self.find(name)
+        if item is None:
+            return False
+        item[2] = not item[2]
+        return True
+
+    def set_quantity(self, name, quantity, category=None):
+        item = self.find(name, category)
+        if item is None:
+            return False
+        item[3] = quantity
+        return True
+
+
+def state(packing_list):
+    return [[i.name, i.category, i.is_packed, i.quantity] for i in packing_list.items]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_indexed_lookups_match_linear_scans(seed):
+    rng = random.Random(seed)
+    # start from a list as it may be stored, duplicates included
+    naive = NaiveList()
+    naive.items = [[rng.choice(NAMES), rng.choice(CATEGORIES), rng.random() < 0.5, rng.randrange(1, 3)]
+                   for _ in range(rng.randrange(8))]
+    packing_list = PackingList("Trip", "beach", 3, "sunny", 1, [PackingItem(*item) for item in naive.items])
+    for _ in range(200):
+        name, category = rng.choice(NAMES), rng.choice(CATEGORIES)
+        op = rng.randrange(4)
+        if op == 0:
+            quantity = rng.randrange(1, 4)
+            packing_list.add_item(name, category, quantity)
+            naive.add_item(name, category, quantity)
+        elif op == 1:
+            assert packing_list.remove_item(name) == naive.remove_item(name)
+        elif op == 2:
+            assert packing_list.toggle_packed(name) == naive.toggle_packed(name)
+        else:
+            quantity, category = rng.randrange(0, 5), rng.choice(CATEGORIES + [None])
+            assert packing_list.set_quantity(name, quantity, category) == naive.set_quantity(name, quantity, category)
+        assert state(packing_list) == naive.items
+        for name in NAMES:
+            for category in CATEGORIES + [None]:
+                item, expected = packing_list.get_item(name, category), naive.find(name, category)
+                assert (None if item is None else [item.name, item.category, item.is_packed, item.quantity]) == expected
+
+
+def test_lists_loaded_with_duplicates_find_the_first():
+    record = dict(PACKING_RECORDS["Beach week"], items=[
+        {"name": "Socks", "category": "Clothing", "quantity": 2},
+        {"name": "Socks", "category": "Clothing", "quantity": 5},
+        {"name": "Socks", "category": "Spare", "quantity": 1},
+    ])
+    packing_list = PackingList.from_dict(record)
+    assert packing_list.get_item("Socks").quantity == 2
+    assert packing_list.get_item("Socks", "Spare").quantity == 1
+    packing_list.remove_item("Socks")
+    assert packing_list.get_item("Socks").quantity == 5
+    assert packing_list.get_item("Socks", "Clothing").quantity == 5
+    assert packing_list.to_dict()["items"][0] == PackingItem("Socks", "Clothing", False, 5).to_dict()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_running_counters_match_the_items(seed, monkeypatch):
+    monkeypatch.setattr(PackingList, "check_counters", True)  # every read recomputes and asserts
+    rng = random.Random(seed)
+    packing_list = PackingList.from_dict(PACKING_RECORDS["Beach week"])
+    for _ in range(150):
+        name = rng.choice(NAMES + ["Socks"])
+        op = rng.randrange(4)
+        if op == 0:
+            packing_list.add_item(name, rng.choice(CATEGORIES), rng.randrange(1, 4))
+        elif op == 1:
+            packing_list.remove_item(name)
+        elif op == 2:
+            packing_list.toggle_packed(name)
+        else:
+            packing_list.set_quantity(name, rng.randrange(0, 6))
+        total = sum(item.quantity for item in packing_list.items)
+        packed = sum(item.quantity for item in packing_list.items if item.is_packed)
+        assert (packing_list.total_items, packing_list.packed_items) == (total, packed)
+        assert packing_list.packing_progress == (packed / total * 100 if total else 0.0)
+
+
+def test_counter_drift_is_caught(monkeypatch):
+    monkeypatch.setattr(PackingList, "check_counters", True)
+    packing_list = PackingList.from_dict(PACKING_RECORDS["Beach week"])
+    assert (packing_list.total_items, packing_list.packed_items) == (15, 14)
+    packing_list.items[0].quantity = 1  # changed behind the list's back
+    with pytest.raises(AssertionError):
+        packing_list.total_items
@@ -0,0 +1,48 @@
+from src.controllers.packageController import (
+    PackingController, PACKING_DATABASE, BASE_QUANTITIES, DURATION_ITEMS, PER_DAY, _generate)
+from src.modules.package import PackingList
+
+
+def reference_list(destination, duration, weather, travelers):
+    """the list built item by item straight from the database, without compiled rules"""
+    packing_list = PackingList("ref", destination, duration, weather, travelers)
+    for category, items in PACKING_DATABASE["base_items"].items():
+        for item in items:
+            quantity = BASE_QUANTITIES.get(item, 1)
+            if quantity == PER_DAY:
+                quantity = min(duration, 7) * travelers
+            elif not isinstance(quantity, int):
+                quantity = travelers
+            packing_list.add_item(item, category, quantity)
+    for section, value in (("destination_items", destination), ("weather_items", weather)):
+        for category, items in PACKING_DATABASE[section].get(value, {}).items():
+            for item in items:
+                packing_list.add_item(item, category, 1)
+    for days, category, item, quantity in DURATION_ITEMS:
+        if duration >= days:
+            packing_list.add_item(item, category, quantity)
+    return packing_list
+
+
+def test_generated_lists_match_the_database(tmp_path):
+    controller = PackingController(str(tmp_path / "packing_lists.json"))
+    for destination in list(PACKING_DATABASE["destination_items"]) + ["moon"]:
+        for weather in list(PACKING_DATABASE["weather_items"]) + [""]:
+            for duration in (1, 6, 7, 13, 14, 30):
+                for travelers in (1, 3):
+                    generated = controller.generate_packing_list(destination, duration, weather, travelers, "ref")
+                    assert generated.to_dict() == reference_list(destination, duration, weather, travelers).to_dict()
+
+
+def test_memoized_lists_do_not_share_items(tmp_path):
+    controller = PackingController(str(tmp_path / "packing_lists.json"))
+    _generate.cache_clear()
+    first = controller.generate_packing_list("beach", 5, "sunny", 2)
+    first.toggle_packed("Socks")
+    first.set_quantity("Sunscreen", 9, "Supplies")
+    second = controller.generate_packing_list("beach", 5, "sunny", 2, "Other beach")
+    assert _generate.cache_info().hits == 1
+    assert first.trip_name == "beach Trip" and second.trip_name == "Other beach"
+    assert second.packed_items == 0
+    assert second.get_item("Sunscreen", "Supplies").quantity == 1
+    assert all(a is not b for a, b in zip(first.items, second.items))
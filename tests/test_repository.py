@@ -0,0 +1,231 @@
+import os
+import random
+import stat
+
+import pytest
+
+from src.controllers.budgetcontroller import BudgetController
+from src.modules.budget import Budget
+from src.modules.itinerary import Itinerary
+from src.modules.package import PackingList
+from src.utils import repository
+from src.utils.repository import TripRepository, COMMIT_LOG
+from src.utils.storage import open_storage, BUDGETS, PACKING_LISTS, ITINERARIES, KINDS
+from tests.records import BUDGET_RECORDS, PACKING_RECORDS, ITINERARY_RECORDS, RECORDS
+
+LAYOUTS = {
+    "json": {kind: kind + ".json" for kind in KINDS},
+    "tpb": {kind: kind + ".tpb" for kind in KINDS},
+    "sqlite": {kind: "trips.db" for kind in KINDS},
+    "sharded": {kind: kind + "/" for kind in KINDS},
+}
+
+
+def make_paths(tmp_path, layout):
+    # keep a trailing separator, which the path join would drop
+    return {kind: os.path.join(tmp_path, name) for kind, name in LAYOUTS[layout].items()}
+
+
+def make_repo(paths):
+    return TripRepository(paths[BUDGETS], paths[PACKING_LISTS], paths[ITINERARIES])
+
+
+def fill(paths):
+    for kind in KINDS:
+        open_storage(paths[kind]).save(kind, RECORDS[kind])
+
+
+def stored(paths, kind):
+    if kind == BUDGETS:
+        return {name: budget.to_dict() for name, budget in BudgetController(paths[kind]).budgets.items()}
+    return open_storage(paths[kind]).load(kind)
+
+
+def model(kind, name, record):
+    if kind == BUDGETS:
+        return Budget.from_dict(name, record)
+    return PackingList.from_dict(record) if kind == PACKING_LISTS else Itinerary.from_dict(record)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_delete_trip_everywhere(tmp_path, layout):
+    paths = make_paths(tmp_path, layout)
+    fill(paths)
+    with make_repo(paths) as repo:
+        repo.delete_trip("Paris")
+        repo.delete_trip("Japan")
+        assert repo.get(BUDGETS, "Paris") is None and repo.get(ITINERARIES, "No plans") is not None
+    assert stored(paths, BUDGETS).keys() == BUDGET_RECORDS.keys() - {"Paris"}
+    assert stored(paths, ITINERARIES).keys() == ITINERARY_RECORDS.keys() - {"Japan"}
+    assert stored(paths, PACKING_LISTS) == PACKING_RECORDS
+    assert COMMIT_LOG not in os.listdir(tmp_path)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_deleting_a_missing_trip_creates_no_files(tmp_path, layout):
+    paths = make_paths(tmp_path, layout)
+    open_storage(paths[BUDGETS]).save(BUDGETS, BUDGET_RECORDS)
+    before = sorted(os.listdir(tmp_path))
+    with make_repo(paths) as repo:
+        repo.delete_trip("Nowhere")
+    assert sorted(os.listdir(tmp_path)) == before
+    with make_repo(paths) as repo:
+        repo.delete_trip("Paris")
+    assert sorted(os.listdir(tmp_path)) == before
+
+
+def test_rollback_and_exceptions_write_nothing(tmp_path):
+    paths = make_paths(tmp_path, "json")
+    fill(paths)
+    with pytest.raises(RuntimeError):
+        with make_repo(paths) as repo:
+            repo.delete_trip("Paris")
+            raise RuntimeError
+    repo = make_repo(paths)
+    repo.delete_trip("Paris")
+    assert repo.dirty
+    repo.rollback()
+    repo.commit()
+    assert stored(paths, BUDGETS) == BUDGET_RECORDS
+
+
+def test_live_budget_controller_does_not_resurrect_a_deleted_trip(tmp_path):
+    paths = make_paths(tmp_path, "json")
+    fill(paths)
+    controller = BudgetController(paths[BUDGETS])
+    controller.update_total("Empty", 10)  # leaves a journal behind
+    with make_repo(paths) as repo:
+        repo.delete_trip("Paris")
+    controller.compact()
+    assert "Paris" not in stored(paths, BUDGETS)
+    assert controller.get_trip("Empty").total_budget == 10
+    controller.add_category("Empty", "Food", 5)
+    assert BudgetController(paths[BUDGETS]).budgets.keys() == {"Empty"}
+
+
+@pytest.mark.parametrize("layout", ["sqlite", "sharded"])
+def test_budget_journal_is_folded_before_a_per_trip_commit(tmp_path, layout):
+    paths = make_paths(tmp_path, layout)
+    fill(paths)
+    controller = BudgetController(paths[BUDGETS])
+    controller.add_trip("Rome")
+    with make_repo(paths) as repo:
+        repo.remove(BUDGETS, "Rome")
+        repo.add(model(BUDGETS, "Oslo", BUDGET_RECORDS["Empty"]), "Oslo")
+    assert stored(paths, BUDGETS).keys() == {"Paris", "Empty", "Oslo"}
+    assert controller.get_trips() == ["Paris", "Empty", "Oslo"]
+
+
+def test_commit_spanning_engines_is_rejected(tmp_path):
+    paths = {BUDGETS: str(tmp_path / "budgets.json"), PACKING_LISTS: str(tmp_path / "packing_lists.json"),
+             ITINERARIES: str(tmp_path / "itineraries.db")}
+    fill(paths)
+    repo = make_repo(paths)
+    repo.delete_trip("Paris")
+    repo.delete_trip("Japan")
+    with pytest.raises(ValueError):
+        repo.commit()
+    assert stored(paths, BUDGETS) == BUDGET_RECORDS
+    assert stored(paths, ITINERARIES) == ITINERARY_RECORDS
+    # changes that only reach one of them are fine
+    repo.rollback()
+    repo.delete_trip("Japan")
+    repo.commit()
+    assert stored(paths, ITINERARIES).keys() == {"No plans"}
+
+
+def test_crash_after_the_commit_log_is_rolled_forward(tmp_path, monkeypatch):
+    paths = make_paths(tmp_path, "json")
+    fill(paths)
+    BudgetController(paths[BUDGETS]).add_trip("Rome")
+    monkeypatch.setattr(repository, "recover", lambda directory: False)
+    repo = make_repo(paths)
+    repo.delete_trip("Paris")
+    repo.delete_trip("Japan")
+    repo.commit()
+    # "crashed" before any staged file was moved into place
+    assert COMMIT_LOG in os.listdir(tmp_path)
+    assert open_storage(paths[ITINERARIES]).load(ITINERARIES) == ITINERARY_RECORDS
+    monkeypatch.undo()
+    make_repo(paths)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in paths.values())
+    assert stored(paths, BUDGETS).keys() == {"Empty", "Rome"}
+    assert stored(paths, ITINERARIES).keys() == {"No plans"}
+
+
+def test_crash_after_the_commit_log_rolls_a_sharded_store_forward(tmp_path, monkeypatch):
+    paths = make_paths(tmp_path, "sharded")
+    fill(paths)
+    monkeypatch.setattr(repository, "recover", lambda directory: False)
+    with make_repo(paths) as repo:
+        repo.delete_trip("Japan")
+        repo.add(model(ITINERARIES, "Rome", ITINERARY_RECORDS["Japan"]), "Rome")
+    assert COMMIT_LOG in os.listdir(tmp_path)
+    assert stored(paths, ITINERARIES) == ITINERARY_RECORDS
+    monkeypatch.undo()
+    make_repo(paths)
+    assert COMMIT_LOG not in os.listdir(tmp_path)
+    assert stored(paths, ITINERARIES) == {"No plans": ITINERARY_RECORDS["No plans"], "Rome": ITINERARY_RECORDS["Japan"]}
+    assert open_storage(paths[ITINERARIES]).verify() == []
+    assert len(os.listdir(paths[ITINERARIES])) == 3  # two shards and the manifest, nothing staged left
+
+
+def test_crash_while_staging_leaves_the_old_files(tmp_path, monkeypatch):
+    paths = make_paths(tmp_path, "json")
+    fill(paths)
+    before = {name: open(tmp_path / name, "rb").read() for name in os.listdir(tmp_path)}
+    saves = []
+
+    def save(self, kind, records):
+        saves.append(kind)
+        if len(saves) == 2:
+            raise OSError("disk full")
+        original(self, kind, records)
+
+    original = type(open_storage(paths[BUDGETS])).save
+    monkeypatch.setattr(type(open_storage(paths[BUDGETS])), "save", save)
+    with pytest.raises(OSError):
+        with make_repo(paths) as repo:
+            repo.delete_trip("Paris")
+            repo.delete_trip("Japan")
+    assert {name: open(tmp_path / name, "rb").read() for name in os.listdir(tmp_path)} == before
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_committed_files_keep_their_mode(tmp_path):
+    paths = make_paths(tmp_path, "json")
+    fill(paths)
+    os.chmod(paths[ITINERARIES], 0o640)
+    with make_repo(paths) as repo:
+        repo.delete_trip("Japan")
+    assert stat.S_IMODE(os.stat(paths[ITINERARIES]).st_mode) == 0o640
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("seed", range(5))
+def test_random_commits_match_a_dict(tmp_path, layout, seed):
+    rng = random.Random(seed)
+    paths = make_paths(tmp_path, layout)
+    expected = {kind: {} for kind in KINDS}
+    names = ["Paris", "Japan", "Rome", "東京"]
+    for _ in range(15):
+        repo = make_repo(paths)
+        for _ in range(rng.randrange(1, 4)):
+            kind, name = rng.choice(KINDS), rng.choice(names)
+            if rng.random() < 0.3:
+                repo.delete_trip(name)
+                for changes in expected.values():
+                    changes.pop(name, None)
+            elif rng.random() < 0.5:
+                repo.remove(kind, name)
+                expected[kind].pop(name, None)
+            else:
+                record = rng.choice(list(RECORDS[kind].values()))
+                repo.add(model(kind, name, record), name)
+                expected[kind][name] = model(kind, name, record).to_dict()
+        repo.commit()
+        for kind in KINDS:
+            if os.path.exists(paths[kind]):
+                assert stored(paths, kind) == expected[kind]
+            else:
+                assert expected[kind] == {}
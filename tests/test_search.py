@@ -0,0 +1,116 @@
+import json
+import os
+import random
+
+from src.modules.itinerary import Activity
+from src.utils.search import SearchIndex, tokenize, _fingerprint
+from src.utils.storage import open_storage, ITINERARIES
+from tests.records import ITINERARY_RECORDS
+
+WORDS = ["museum", "muse", "tower", "Tokyo", "tea", "team", "park", "café"]
+
+
+def make_index(tmp_path, records=ITINERARY_RECORDS):
+    path = str(tmp_path / "itineraries.json")
+    open_storage(path).save(ITINERARIES, records)
+    return SearchIndex(path).load(), path
+
+
+def random_activity(rng):
+    text = lambda: " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3)))
+    start = rng.randrange(0, 600, 30)
+    return Activity(f"2025-04-0{rng.randrange(1, 4)}", f"{start // 60:02d}:{start % 60:02d}",
+                    f"{start // 60 + 1:02d}:00", text(), text(), text())
+
+
+def hits(index, query):
+    return sorted((hit.trip_name, _fingerprint(hit.activity), round(hit.score, 9))
+                  for hit in index.search(query, limit=None))
+
+
+def test_tokenize_casefolds_and_splits_on_punctuation():
+    assert tokenize("Senso-ji, TOKYO!") == ["senso", "ji", "tokyo"]
+    assert tokenize("  ") == []
+
+
+def test_search_matches_prefixes_and_ranks_by_field(tmp_path):
+    index, _ = make_index(tmp_path)
+    assert [hit.activity.detail for hit in index.search("senso")] == ["Senso-ji"]
+    assert [hit.activity.detail for hit in index.search("shin din")] == ["Dinner"]
+    assert index.search("asakusa dinner") == []
+    assert index.search("") == []
+
+    index.update_trip("Rome", [Activity("2025-06-01", "10:00", "11:00", "Market", "Lunch", "Book a table"),
+                               Activity("2025-06-01", "12:00", "13:00", "Book shop", "Browse", "")])
+    # a location hit outweighs one in the notes (ties in indexing order), a whole word outweighs a prefix
+    assert [hit.activity.location for hit in index.search("book")] == ["Book shop", "Shinjuku", "Market"]
+    assert index.search("boo")[0].score < index.search("book")[0].score
+    assert len(index.search("book", limit=1)) == 1
+
+
+def test_incremental_updates_match_a_rebuild(tmp_path):
+    rng = random.Random(7)
+    index, path = make_index(tmp_path, {})
+    trips = {}
+    for _ in range(200):
+        name = rng.choice(["Paris", "Japan", "Rome"])
+        activities = list(trips.get(name, []))
+        if activities and rng.random() < 0.4:
+            del activities[rng.randrange(len(activities))]
+        else:
+            activities.append(rng.choice(activities) if activities and rng.random() < 0.2 else random_activity(rng))
+        trips[name] = activities
+        index.update_trip(name, activities)
+
+    fresh = SearchIndex(path)
+    fresh.loaded = True
+    for name, activities in trips.items():
+        fresh.update_trip(name, activities)
+    for query in WORDS + ["mu", "t", "tea park", "nothing"]:
+        expected = hits(fresh, query)
+        assert hits(index, query) == expected
+        # brute force: every query word is a prefix of a token of the activity
+        words = tokenize(query)
+        scan = sorted((name, _fingerprint(a)) for name, activities in trips.items() for a in activities
+                      if all(any(token.startswith(word) for token in tokenize(f"{a.location} {a.detail} {a.notes}"))
+                             for word in words))
+        assert [hit[:2] for hit in expected] == scan
+
+    index.remove_trip("Paris")
+    assert all(hit.trip_name != "Paris" for hit in index.search("t", limit=None))
+
+
+def test_saved_index_round_trips_until_the_datafile_changes(tmp_path):
+    index, path = make_index(tmp_path)
+    index.update_trip("Japan", [Activity("2025-04-01", "09:00", "10:00", "Ueno", "Museum", "")])
+    index.save()
+    with open(index.path, encoding="utf-8") as f:
+        assert json.load(f)["version"] == 2
+
+    reloaded = SearchIndex(path).load()  # read from the saved file: keeps the unsaved-datafile change
+    assert hits(reloaded, "museum") == hits(index, "museum")
+    assert reloaded.search("senso") == []
+
+    open_storage(path).save(ITINERARIES, ITINERARY_RECORDS)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    rebuilt = SearchIndex(path).load()  # stale: rebuilt from the datafile
+    assert rebuilt.search("museum") == []
+    assert [hit.activity.detail for hit in rebuilt.search("senso")] == ["Senso-ji"]
+
+
+def test_activities_with_a_bad_date_are_not_indexed(tmp_path):
+    japan = ITINERARY_RECORDS["Japan"]
+    bad = dict(japan["activities"][0], date="someday", detail="Museum")
+    index, _ = make_index(tmp_path, {"Japan": dict(japan, activities=[*japan["activities"], bad])})
+    assert index.search("museum") == []
+    index.update_trip("Japan", [Activity.from_dict(bad), Activity("2025-04-01", "09:00", "10:00", "Ueno", "Museum")])
+    assert [(hit.activity.date, hit.activity.location) for hit in index.search("museum")] == [("2025-04-01", "Ueno")]
+
+
+def test_missing_or_corrupt_index_is_rebuilt(tmp_path):
+    index, path = make_index(tmp_path)
+    with open(index.path, "w", encoding="utf-8") as f:
+        f.write("{truncated")
+    assert [hit.trip_name for hit in SearchIndex(path).load().search("dinner")] == ["Japan"]
+    assert SearchIndex(str(tmp_path / "missing.json")).load().search("dinner") == []
@@ -0,0 +1,80 @@
+import os
+import random
+
+import pytest
+
+from src.utils.storage import ShardedStorage, ITINERARIES
+from tests.records import ITINERARY_RECORDS
+
+NAMES = ["Japan", "Paris", "paris", "Paris!", "Paris?", "東京", "../escape", "", "." * 50, "x" * 80]
+
+
+def shard_files(path):
+    return sorted(f for f in os.listdir(path) if f != ShardedStorage.MANIFEST)
+
+
+def test_shard_names_never_collide():
+    files = [ShardedStorage.shard_name(name) for name in NAMES]
+    assert len(set(files)) == len(NAMES)
+    for file in files:
+        assert "/" not in file and not file.startswith(".")
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_changes_match_a_dict(tmp_path, seed):
+    rng = random.Random(seed)
+    path = str(tmp_path / "itineraries")
+    engine = ShardedStorage(path)
+    records = list(ITINERARY_RECORDS.values())
+    expected = {}
+    for _ in range(25):
+        op = rng.randrange(4)
+        if op == 0:
+            upserts = {name: rng.choice(records) for name in rng.sample(NAMES, rng.randrange(3))}
+            deletes = rng.sample(NAMES, rng.randrange(3))
+            engine.apply(ITINERARIES, upserts, deletes)
+            for name in deletes:
+                expected.pop(name, None)
+            expected.update(upserts)
+        elif op == 1:
+            name = rng.choice(NAMES)
+            expected[name] = rng.choice(records)
+            engine.upsert(ITINERARIES, name, expected[name])
+        elif op == 2:
+            name = rng.choice(NAMES)
+            assert engine.delete(ITINERARIES, name) == (expected.pop(name, None) is not None)
+        else:
+            expected = {name: rng.choice(records) for name in rng.sample(NAMES, rng.randrange(4))}
+            engine.save(ITINERARIES, expected)
+        assert ShardedStorage(path).load(ITINERARIES) == expected
+    assert engine.verify() == []
+    assert shard_files(path) == sorted(ShardedStorage.shard_name(name) for name in expected)
+
+
+def test_saving_one_trip_leaves_the_other_shards_alone(tmp_path):
+    path = str(tmp_path / "itineraries")
+    engine = ShardedStorage(path)
+    engine.save(ITINERARIES, ITINERARY_RECORDS)
+    before = {f: os.stat(os.path.join(path, f)).st_mtime_ns for f in shard_files(path)}
+    for f in before:
+        os.utime(os.path.join(path, f), ns=(0, 0))
+    engine.upsert(ITINERARIES, "Japan", dict(ITINERARY_RECORDS["Japan"], location="Kyoto"))
+    touched = [f for f in shard_files(path) if os.stat(os.path.join(path, f)).st_mtime_ns != 0]
+    assert touched == [ShardedStorage.shard_name("Japan")]
+
+
+def test_crash_before_the_manifest_keeps_the_old_trips(tmp_path, monkeypatch):
+    path = str(tmp_path / "itineraries")
+    engine = ShardedStorage(path)
+    engine.save(ITINERARIES, ITINERARY_RECORDS)
+
+    def crash(self, manifest):
+        raise OSError("power cut")
+
+    monkeypatch.setattr(ShardedStorage, "_write_manifest", crash)
+    with pytest.raises(OSError):
+        engine.apply(ITINERARIES, {"New": ITINERARY_RECORDS["Japan"]}, ["Japan"])
+    monkeypatch.undo()
+    # the new shard is not in the manifest and the deleted one was not removed yet
+    assert engine.load(ITINERARIES) == ITINERARY_RECORDS
+    assert engine.verify() == []
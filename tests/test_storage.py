@@ -0,0 +1,203 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from src.controllers.budgetcontroller import BudgetController
+from src.utils import binfmt
+from src.utils.file import (iter_budgets, load_budgets, load_itinerary, load_itinerary_headers, save_budgets_stream,
+                            iter_packing_lists, load_packing_lists, save_packing_lists_stream,
+                            iter_itineraries, load_itineraries, save_itineraries_stream)
+from src.utils.storage import (open_storage, migrate, SqliteStorage, BUDGETS, PACKING_LISTS, ITINERARIES, KINDS,
+                               CHILD_KEYS, CHILD_TABLES)
+from tests.records import RECORDS, ITINERARY_RECORDS
+
+SINGLE_KIND_SUFFIXES = [".json", ".json.gz", ".json.xz", ".tpb"]
+STREAM_FUNCTIONS = {
+    PACKING_LISTS: (load_packing_lists, iter_packing_lists, save_packing_lists_stream),
+    ITINERARIES: (load_itineraries, iter_itineraries, save_itineraries_stream),
+}
+
+
+def datafile(tmp_path, kind, suffix):
+    if suffix == "/":
+        return str(tmp_path / kind) + "/"
+    return str(tmp_path / (kind + suffix))
+
+
+@pytest.mark.parametrize("suffix", SINGLE_KIND_SUFFIXES + ["/", ".db"])
+@pytest.mark.parametrize("kind", KINDS)
+def test_round_trip(tmp_path, kind, suffix):
+    path = datafile(tmp_path, kind, suffix)
+    engine = open_storage(path)
+    engine.save(kind, RECORDS[kind])
+    assert open_storage(path).load(kind) == RECORDS[kind]
+    assert dict(open_storage(path).iter_records(kind)) == RECORDS[kind]
+    for name, record in RECORDS[kind].items():
+        assert open_storage(path).load_one(kind, name) == record
+    assert open_storage(path).load_one(kind, "missing") is None
+
+
+@pytest.mark.parametrize("suffix", SINGLE_KIND_SUFFIXES + ["/", ".db"])
+def test_upsert_delete_and_apply(tmp_path, suffix):
+    path = datafile(tmp_path, ITINERARIES, suffix)
+    engine = open_storage(path)
+    engine.save(ITINERARIES, ITINERARY_RECORDS)
+    changed = dict(ITINERARY_RECORDS["Japan"], location="Kyoto")
+    engine.upsert(ITINERARIES, "Japan", changed)
+    assert engine.delete(ITINERARIES, "No plans")
+    assert not engine.delete(ITINERARIES, "No plans")
+    assert engine.load(ITINERARIES) == {"Japan": changed}
+    engine.apply(ITINERARIES, {"New": ITINERARY_RECORDS["No plans"]}, ["Japan"])
+    assert engine.load(ITINERARIES) == {"New": ITINERARY_RECORDS["No plans"]}
+
+
+def test_sqlite_keeps_all_kinds_apart(tmp_path):
+    path = str(tmp_path / "trips.db")
+    for kind in KINDS:
+        open_storage(path).save(kind, RECORDS[kind])
+    for kind in KINDS:
+        assert open_storage(path).load(kind) == RECORDS[kind]
+
+
+@pytest.mark.parametrize("kind", [PACKING_LISTS, ITINERARIES])
+def test_sqlite_keeps_trip_name_apart_from_key(tmp_path, kind):
+    path = str(tmp_path / "trips.db")
+    record = dict(next(iter(RECORDS[kind].values())), trip_name="Real Name")
+    open_storage(path).upsert(kind, "key", record)
+    engine = open_storage(path)
+    assert engine.load(kind)["key"]["trip_name"] == "Real Name"
+    assert engine.load_one(kind, "key")["trip_name"] == "Real Name"
+    assert dict(engine.iter_records(kind))["key"]["trip_name"] == "Real Name"
+    assert engine.load_headers(kind)["key"]["trip_name"] == "Real Name"
+
+
+def test_sqlite_upgrades_database_without_trip_name_column(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE trips (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, name TEXT NOT NULL, "
+                     "location TEXT, start_date TEXT, end_date TEXT, trip_type TEXT, destination_type TEXT, "
+                     "duration INTEGER, weather TEXT, travelers INTEGER, total_budget REAL, currency TEXT, "
+                     "UNIQUE (kind, name))")
+        conn.execute("INSERT INTO trips (kind, name, location, start_date, end_date, trip_type) "
+                     "VALUES ('itineraries', 'Old', 'Rome', '2024-01-01', '2024-01-02', 'General')")
+    SqliteStorage._ready.discard(path)
+    assert open_storage(path).load(ITINERARIES)["Old"]["trip_name"] == "Old"
+
+
+def test_sqlite_iter_records_matches_load_after_deletes(tmp_path):
+    path = str(tmp_path / "trips.db")
+    records = {f"trip {i}": dict(ITINERARY_RECORDS["Japan"], trip_name=f"trip {i}") for i in range(30)}
+    records["trip 3"] = dict(ITINERARY_RECORDS["No plans"], trip_name="trip 3")
+    engine = open_storage(path)
+    engine.save(ITINERARIES, records)
+    for i in range(0, 30, 4):
+        engine.delete(ITINERARIES, f"trip {i}")
+        del records[f"trip {i}"]
+    assert list(engine.iter_records(ITINERARIES)) == list(engine.load(ITINERARIES).items())
+    assert dict(engine.iter_records(ITINERARIES)) == records
+
+
+def test_sharded_verify_reports_damaged_shards(tmp_path):
+    path = str(tmp_path / "itineraries") + "/"
+    engine = open_storage(path)
+    engine.save(ITINERARIES, ITINERARY_RECORDS)
+    assert engine.verify() == []
+    shard = tmp_path / "itineraries" / engine.read_manifest()["Japan"]["file"]
+    shard.write_text("{}", encoding="utf-8")
+    assert engine.verify() == ["Japan"]
+
+
+def journaled_budgets(tmp_path):
+    path = str(tmp_path / "budgets.json")
+    open_storage(path).save(BUDGETS, RECORDS[BUDGETS])
+    controller = BudgetController(path)
+    controller.add_trip("Japan")
+    controller.add_category("Japan", "Rail pass", 250)
+    controller.delete_trip("Empty")
+    expected = {name: budget.to_dict() for name, budget in controller.budgets.items()}
+    return path, expected
+
+
+@pytest.mark.parametrize("target", ["budgets.db", "budgets.tpb", "budgets/", "copy.json"])
+def test_migrate_includes_budget_journal(tmp_path, target):
+    path, expected = journaled_budgets(tmp_path)
+    dst = str(tmp_path / "out" / target)
+    counts = migrate(path, dst, [BUDGETS])
+    assert counts == {BUDGETS: len(expected)}
+    assert open_storage(dst).load(BUDGETS) == expected
+
+
+def test_migrate_drops_stale_journal_of_target(tmp_path):
+    path, expected = journaled_budgets(tmp_path)
+    dst = str(tmp_path / "other" / "budgets.json")
+    other = BudgetController(dst)
+    other.add_trip("Stale")
+    migrate(path, dst, [BUDGETS])
+    assert BudgetController(dst).budgets.keys() == expected.keys()
+
+
+def test_iter_and_stream_budgets_include_journal(tmp_path):
+    path, expected = journaled_budgets(tmp_path)
+    assert {name: budget.to_dict() for name, budget in iter_budgets(path)} == expected
+    save_budgets_stream(iter_budgets(path), path)
+    assert {name: budget.to_dict() for name, budget in load_budgets(path).items()} == expected
+    assert BudgetController(path).journal.pending == 0
+
+
+@pytest.mark.parametrize("kind, field, value", [(PACKING_LISTS, "weather", "rainy"),
+                                                (ITINERARIES, "trip_type", "Company")])
+def test_stream_saves_drop_the_cached_records(tmp_path, kind, field, value):
+    path = str(tmp_path / (kind + ".json"))
+    open_storage(path).save(kind, RECORDS[kind])
+    load, iterate, save_stream = STREAM_FUNCTIONS[kind]
+    assert load(path)
+    before = os.stat(path)
+    name = next(iter(RECORDS[kind]))
+    models = dict(iterate(path))
+    setattr(models[name], field, value)
+    save_stream(models.items(), path)
+    # same size, and the old mtime put back, so only the explicit invalidation shows the change
+    assert os.stat(path).st_size == before.st_size
+    os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+    assert getattr(load(path)[name], field) == value
+
+
+def test_binfmt_convert_includes_budget_journal(tmp_path):
+    path, expected = journaled_budgets(tmp_path)
+    dst = str(tmp_path / "budgets.tpb")
+    binfmt.main(["convert", path, dst])
+    assert open_storage(dst).load(BUDGETS) == expected
+    back = str(tmp_path / "back.json")
+    binfmt.main(["convert", dst, back])
+    with open(back, encoding="utf-8") as f:
+        assert json.load(f) == expected
+
+
+@pytest.mark.parametrize("suffix", SINGLE_KIND_SUFFIXES + ["/", ".db"])
+def test_itinerary_headers_materialize_to_the_full_itinerary(tmp_path, suffix):
+    path = datafile(tmp_path, ITINERARIES, suffix)
+    open_storage(path).save(ITINERARIES, ITINERARY_RECORDS)
+    headers = load_itinerary_headers(path)
+    assert list(headers) == list(ITINERARY_RECORDS)
+    for name, record in ITINERARY_RECORDS.items():
+        header = headers[name]
+        assert (header.trip_name, header.location, header.start_date, header.end_date, header.trip_type) == \
+            (record["trip_name"], record["location"], record["start_date"], record["end_date"], record["trip_type"])
+        assert header.activity_count == len(record["activities"])
+        assert header.materialize().to_dict() == record
+        assert header.to_dict() == load_itinerary(name, path).to_dict()
+
+
+@pytest.mark.parametrize("suffix", [".json", ".json.gz", ".json.xz"])
+@pytest.mark.parametrize("kind", KINDS)
+def test_json_headers_leave_out_child_rows(tmp_path, kind, suffix):
+    path = datafile(tmp_path, kind, suffix)
+    open_storage(path).save(kind, RECORDS[kind])
+    headers = open_storage(path).load_headers(kind)
+    assert list(headers) == list(RECORDS[kind])
+    for name, record in RECORDS[kind].items():
+        header = dict(headers[name])
+        assert header.pop(CHILD_TABLES[kind][1]) == len(record[CHILD_KEYS[kind]])
+        assert header == {key: value for key, value in record.items() if key != CHILD_KEYS[kind]}
@@ -0,0 +1,71 @@
+import io
+import json
+import random
+
+import pytest
+
+from src.utils.stream import iter_entries, iter_headers, write_entries
+
+
+def random_value(rng, depth=0):
+    choice = rng.randrange(8 if depth < 3 else 5)
+    if choice == 0:
+        return rng.randint(-10 ** 12, 10 ** 12)
+    if choice == 1:
+        return rng.random() * 10 ** rng.randint(-3, 8)
+    if choice == 2:
+        return "".join(rng.choice('ab "\\\né東\U0001f30d{}[],:') for _ in range(rng.randrange(12)))
+    if choice == 3:
+        return rng.choice([True, False, None])
+    if choice == 4:
+        return rng.randrange(10)
+    if choice == 5:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+    return {f"k{i}{rng.choice('xy{}:,')}": random_value(rng, depth + 1) for i in range(rng.randrange(5))}
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_iter_entries_matches_json_load(seed):
+    rng = random.Random(seed)
+    document = {f"trip {i}": random_value(rng) for i in range(rng.randrange(12))}
+    text = json.dumps(document, indent=rng.choice([None, 2, 4]), ensure_ascii=rng.random() < 0.5)
+    for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+        assert list(iter_entries(io.StringIO(text), chunk_size)) == list(document.items())
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_iter_headers_counts_children_without_decoding_them(seed):
+    rng = random.Random(seed)
+    document = {f"trip {i}": {"name": random_value(rng), "rows": random_value(rng, 1), "notes": random_value(rng)}
+                for i in range(rng.randrange(8))}
+    expected = [(key, {"name": record["name"], "rows_count": len(record["rows"])
+                       if isinstance(record["rows"], (list, dict)) else 0, "notes": record["notes"]})
+                for key, record in document.items()]
+    text = json.dumps(document, indent=rng.choice([None, 2, 4]), ensure_ascii=rng.random() < 0.5)
+    for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+        assert list(iter_headers(io.StringIO(text), "rows", "rows_count", chunk_size)) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_write_entries_matches_json_dump(seed):
+    rng = random.Random(seed)
+    document = {f"trip {i}": random_value(rng) for i in range(rng.randrange(6))}
+    out = io.StringIO()
+    write_entries(out, document.items())
+    assert out.getvalue() == json.dumps(document, indent=4, ensure_ascii=False)
+
+
+def test_number_split_by_chunk_boundary():
+    text = '{"a": 12345678901234567890, "b": -1.5e300}'
+    assert dict(iter_entries(io.StringIO(text), 1)) == {"a": 12345678901234567890, "b": -1.5e300}
+
+
+@pytest.mark.parametrize("text", ["", "   ", "{}", " { } "])
+def test_empty_documents(text):
+    assert list(iter_entries(io.StringIO(text))) == []
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a" 1}', '[1, 2]', '{"a": 1,}', '{1: 2}'])
+def test_malformed_documents_raise(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_entries(io.StringIO(text), 2))
@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.modules.timeparse import clear_caches, format_date, format_time, parse_date, parse_time
+
+
+def test_every_time_of_day_round_trips():
+    for minutes in range(24 * 60):
+        text = format_time(minutes)
+        assert parse_time(text) == minutes
+        assert text == datetime.strptime(text, "%H:%M").strftime("%H:%M")
+
+
+def test_dates_round_trip():
+    day = date(1999, 12, 25)
+    while day < date(2001, 3, 5):
+        assert parse_date(day.isoformat()) == day.toordinal()
+        assert format_date(day.toordinal()) == day.isoformat()
+        day += timedelta(days=1)
+
+
+@pytest.mark.parametrize("text, minutes", [("9:05", 545), ("09:5", 545), ("0:00", 0), ("23:59", 1439)])
+def test_loose_times_parse_like_strptime(text, minutes):
+    assert parse_time(text) == minutes
+
+
+@pytest.mark.parametrize("text, day", [("2024-2-9", date(2024, 2, 9)), ("2024-02-29", date(2024, 2, 29))])
+def test_loose_dates_parse_like_strptime(text, day):
+    assert parse_date(text) == day.toordinal()
+
+
+@pytest.mark.parametrize("text", ["24:00", "12:60", "noon", "", "1:2:3", "-1:00", "12:3x"])
+def test_bad_times_raise_value_error(text):
+    with pytest.raises(ValueError):
+        parse_time(text)
+
+
+@pytest.mark.parametrize("text", ["2023-02-29", "2024-13-01", "2024/01/01", "", "20240101", "2024-01-01x",
+                                  "2024-W01-1", "2024W011T0", "2024-001-1"])
+def test_bad_dates_raise_value_error(text):
+    with pytest.raises(ValueError):
+        parse_date(text)
+
+
+def test_repeated_strings_are_parsed_once():
+    clear_caches()
+    for _ in range(100):
+        parse_date("2025-04-01")
+        parse_time("09:00")
+    assert parse_date.cache_info().misses == 1 and parse_date.cache_info().hits == 99
+    assert parse_time.cache_info().misses == 1